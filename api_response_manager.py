@@ -1,37 +1,110 @@
 import uuid
-import json
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, List, Optional
+from response_storage import create_storage, split_rows
+from option_chain import OptionChain
+from serialization import dumps, loads
+from metrics import RESPONSE_STORE_SECONDS
 
 class APIResponseManager:
-    def __init__(self, response_dir='api_responses'):
+    def __init__(self, response_dir='api_responses', storage=None):
         self.response_dir = response_dir
         os.makedirs(self.response_dir, exist_ok=True)
+        self.storage = storage or create_storage(response_dir)
 
-    def store_response(self, response: Any) -> str:
+    @RESPONSE_STORE_SECONDS.time(operation="store")
+    def store_response(self, response: Any, encoded: Optional[bytes] = None) -> str:
         response_id = str(uuid.uuid4())
-        file_path = os.path.join(self.response_dir, f"{response_id}.json")
-        with open(file_path, 'w') as f:
-            json.dump(response, f)
+        if isinstance(response, OptionChain):
+            self.storage.put(response_id, response.to_bytes(), format='chain')
+            return response_id
+        split = split_rows(response)
+        if split is not None:
+            rows_key, rows, envelope = split
+            row_texts = [dumps(row) for row in rows]
+            envelope_text = dumps(envelope) if envelope is not None else None
+            self.storage.put_rows(response_id, envelope_text, rows_key, row_texts)
+        else:
+            self.storage.put(response_id, encoded if encoded is not None else dumps(response))
         return response_id
 
+    @RESPONSE_STORE_SECONDS.time(operation="read")
     def get_response(self, response_id: str) -> Any:
-        file_path = os.path.join(self.response_dir, f"{response_id}.json")
-        if os.path.exists(file_path):
-            with open(file_path, 'r') as f:
-                return json.load(f)
+        if self.storage.get_format(response_id) == 'chain':
+            return self.get_chain(response_id).to_payload()
+        data = self.storage.get(response_id)
+        if data is not None:
+            return loads(data)
         return None
 
+    @RESPONSE_STORE_SECONDS.time(operation="read_chain")
+    def get_chain(self, response_id: str) -> Optional[OptionChain]:
+        format = self.storage.get_format(response_id)
+        if format is None:
+            return None
+        data = self.storage.get(response_id)
+        if format == 'chain':
+            return OptionChain.from_bytes(data)
+        # Chains stored before the columnar format are converted on read
+        try:
+            return OptionChain.from_payload(loads(data))
+        except ValueError:
+            return None
+
+    @RESPONSE_STORE_SECONDS.time(operation="read_bytes")
+    def get_response_bytes(self, response_id: str) -> Optional[bytes]:
+        if self.storage.get_format(response_id) == 'chain':
+            return dumps(self.get_chain(response_id).to_payload())
+        return self.storage.get(response_id)
+
+    @RESPONSE_STORE_SECONDS.time(operation="read_page")
+    def get_response_page(self, response_id: str, offset: int = 0, limit: Optional[int] = None,
+                          fields: Optional[List[str]] = None, sort: Optional[str] = None,
+                          descending: bool = False) -> Optional[bytes]:
+        if self.storage.get_format(response_id) == 'chain':
+            chain = self.get_chain(response_id)
+            try:
+                total, rows = chain.page(offset, limit, fields, sort, descending)
+            except KeyError as e:
+                raise ValueError(f"Unknown field: {e.args[0]}")
+            row_texts = [dumps(row) for row in rows]
+        else:
+            page = self.storage.get_rows(response_id, offset, limit, fields, sort, descending)
+            if page is None:
+                return None
+            total, row_texts = page
+        header = dumps({"total": total, "offset": offset, "limit": limit})
+        return header[:-1] + b', "data": [' + b",".join(row_texts) + b"]}"
+
+    def iter_response(self, response_id: str) -> Optional[Iterator[bytes]]:
+        if self.storage.get_format(response_id) == 'chain':
+            return iter([self.get_response_bytes(response_id)])
+        return self.storage.iter_chunks(response_id)
+
+    def resolve(self, output: Any) -> Any:
+        """The full payload behind a tool output, following a large-response reference."""
+        try:
+            payload = loads(output) if isinstance(output, (str, bytes)) else output
+        except ValueError:
+            return output
+        if isinstance(payload, dict) and payload.get('type') == 'large_response':
+            return self.get_response(payload['id'])
+        return payload
+
     def get_response_summary(self, response: Any) -> str:
-        if isinstance(response, dict):
+        if isinstance(response, OptionChain):
+            return f"API Response: {response.summary()}"
+        elif isinstance(response, dict):
             return f"API Response: {len(response)} key-value pairs"
         elif isinstance(response, list):
             return f"API Response: List with {len(response)} items"
         else:
             return f"API Response: {type(response).__name__}"
 
-    def format_large_response(self, response: Any) -> Dict[str, Any]:
-        response_id = self.store_response(response)
+    def format_large_response(self, response: Any, encoded: Optional[bytes] = None) -> Dict[str, Any]:
+        response_id = self.store_response(response, encoded)
+        # Other workers (or the browser, via any worker) may look the id up as soon as it is handed out
+        self.storage.flush()
         summary = self.get_response_summary(response)
         return {
             "type": "large_response",
@@ -39,4 +112,7 @@ class APIResponseManager:
             "summary": summary
         }
 
+    def close(self):
+        self.storage.close()
+
 api_response_manager = APIResponseManager()
\ No newline at end of file
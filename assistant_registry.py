@@ -0,0 +1,130 @@
+import os
+import json
+import asyncio
+import hashlib
+import logging
+import contextlib
+import openai
+from assistants import (
+    create_assistant, update_assistant,
+    ASSISTANT_NAME, ASSISTANT_INSTRUCTIONS, ASSISTANT_MODEL)
+
+try:
+    import fcntl
+except ImportError:
+    # No cross-process locking without flock; workers may then each create an assistant once
+    fcntl = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REGISTRY_FILE = os.getenv("ASSISTANT_REGISTRY_FILE", "assistant_registry.json")
+
+
+def fingerprint(tools, name=ASSISTANT_NAME, model=ASSISTANT_MODEL, instructions=ASSISTANT_INSTRUCTIONS):
+    canonical = json.dumps({
+        "name": name,
+        "model": model,
+        "instructions": instructions,
+        "tools": sorted(tools, key=lambda tool: tool["function"]["name"]),
+    }, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class AssistantRegistry:
+    """Maps a tool-schema fingerprint to one reusable assistant.
+
+    The mapping is persisted so restarts keep using the same assistant. When
+    the schema set changes, the most recently used assistant is updated in
+    place rather than creating a new one for every combination we've seen.
+    Changes happen under a lock on ``<path>.lock``, so worker processes that
+    miss at the same time create one assistant between them. An assistant
+    that turns out to be gone is dropped with ``replace``.
+    """
+
+    def __init__(self, path=REGISTRY_FILE):
+        self.path = path
+        self.lock = asyncio.Lock()
+        self.data = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            data = {}
+        data.setdefault("assistants", {})
+        data.setdefault("current", None)
+        return data
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.data, f, indent=4)
+        os.replace(tmp_path, self.path)
+
+    @contextlib.asynccontextmanager
+    async def _locked(self):
+        async with self.lock:
+            if fcntl is None:
+                yield
+                return
+            with open(f"{self.path}.lock", "a") as f:
+                await asyncio.to_thread(fcntl.flock, f.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    async def get_assistant_id(self, tools):
+        key = fingerprint(tools)
+        assistant_id = self.data["assistants"].get(key)
+        if assistant_id:
+            return assistant_id
+
+        async with self._locked():
+            # Another request or worker may have registered it while we waited
+            self.data = self._load()
+            assistant_id = self.data["assistants"].get(key)
+            if assistant_id:
+                return assistant_id
+            return await self._register(key, tools)
+
+    async def replace(self, stale_id, tools):
+        """Forget ``stale_id`` (e.g. deleted on the OpenAI side) and return a working assistant for ``tools``."""
+        key = fingerprint(tools)
+        async with self._locked():
+            self.data = self._load()
+            assistant_id = self.data["assistants"].get(key)
+            if assistant_id and assistant_id != stale_id:
+                # Already replaced by another request or worker
+                return assistant_id
+            for stale_key in [k for k, v in self.data["assistants"].items() if v == stale_id]:
+                del self.data["assistants"][stale_key]
+            logger.warning(f"Assistant {stale_id} no longer exists, replacing it")
+            return await self._register(key, tools)
+
+    async def _register(self, key, tools):
+        current_key = self.data["current"]
+        current_id = self.data["assistants"].get(current_key)
+        assistant_id = None
+        if current_id:
+            try:
+                await update_assistant(current_id, tools)
+                del self.data["assistants"][current_key]
+                assistant_id = current_id
+            except openai.NotFoundError:
+                logger.warning(f"Assistant {current_id} no longer exists, creating a new one")
+                del self.data["assistants"][current_key]
+        if not assistant_id:
+            assistant = await create_assistant(tools)
+            assistant_id = assistant.id
+
+        self.data["assistants"][key] = assistant_id
+        self.data["current"] = key
+        self._save()
+        logger.info(f"Registered assistant {assistant_id} for tool fingerprint {key[:12]}")
+        return assistant_id
+
+
+assistant_registry = AssistantRegistry()
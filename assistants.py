@@ -1,30 +1,65 @@
 import os
 import logging
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, NotFoundError
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+ASSISTANT_NAME = "Chat Assistant"
+ASSISTANT_INSTRUCTIONS = "You are a helpful assistant specializing in options trading data. Use the provided tools to fetch and analyze options data when requested."
+ASSISTANT_MODEL = os.getenv("ASSISTANT_MODEL", "gpt-4-1106-preview")
 
-def create_assistant(tools):
+# One pooled async client per worker; every chat session shares its keep-alive connections.
+http_client = DefaultAsyncHttpxClient(
+    limits=httpx.Limits(
+        max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "200")),
+        max_keepalive_connections=int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "50")),
+    ),
+    timeout=httpx.Timeout(float(os.getenv("OPENAI_TIMEOUT", "60")), connect=10.0),
+)
+
+client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=http_client)
+
+async def close_client():
+    await client.close()
+
+async def create_assistant(tools):
     logger.info(f"Creating assistant with tools: {tools}")
-    assistant = client.beta.assistants.create(
-        name="Chat Assistant",
-        instructions="You are a helpful assistant specializing in options trading data. Use the provided tools to fetch and analyze options data when requested.",
+    assistant = await client.beta.assistants.create(
+        name=ASSISTANT_NAME,
+        instructions=ASSISTANT_INSTRUCTIONS,
         tools=tools,
-        model="gpt-4-1106-preview"
+        model=ASSISTANT_MODEL
     )
     logger.info(f"Created assistant with ID: {assistant.id}")
     return assistant
 
-def create_thread():
-    thread = client.beta.threads.create()
+async def update_assistant(assistant_id, tools):
+    assistant = await client.beta.assistants.update(
+        assistant_id,
+        name=ASSISTANT_NAME,
+        instructions=ASSISTANT_INSTRUCTIONS,
+        tools=tools,
+        model=ASSISTANT_MODEL
+    )
+    logger.info(f"Updated assistant {assistant_id} with tools: {[tool['function']['name'] for tool in tools]}")
+    return assistant
+
+async def assistant_exists(assistant_id):
+    try:
+        await client.beta.assistants.retrieve(assistant_id)
+    except NotFoundError:
+        return False
+    return True
+
+async def create_thread():
+    thread = await client.beta.threads.create()
     logger.info(f"Created thread with ID: {thread.id}")
     return thread
 
-def create_message(thread_id, content):
-    message = client.beta.threads.messages.create(
+async def create_message(thread_id, content):
+    message = await client.beta.threads.messages.create(
         thread_id=thread_id,
         role="user",
         content=content
@@ -32,29 +67,55 @@ def create_message(thread_id, content):
     logger.info(f"Created message in thread {thread_id}")
     return message
 
-def run_assistant(assistant_id, thread_id):
-    run = client.beta.threads.runs.create(
+async def run_assistant(assistant_id, thread_id):
+    run = await client.beta.threads.runs.create(
         thread_id=thread_id,
         assistant_id=assistant_id
     )
     logger.info(f"Started run {run.id} for assistant {assistant_id} in thread {thread_id}")
     return run
 
+async def stream_run(assistant_id, thread_id):
+    stream = await client.beta.threads.runs.create(
+        thread_id=thread_id,
+        assistant_id=assistant_id,
+        stream=True
+    )
+    logger.info(f"Started streamed run for assistant {assistant_id} in thread {thread_id}")
+    return stream
+
 
-def submit_tool_outputs(thread_id, run_id, tool_outputs):
-    client.beta.threads.runs.submit_tool_outputs(
+async def submit_tool_outputs(thread_id, run_id, tool_outputs):
+    await client.beta.threads.runs.submit_tool_outputs(
         thread_id=thread_id,
         run_id=run_id,
         tool_outputs=tool_outputs
     )
 
-def get_run_status(thread_id, run_id):
-    run = client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run_id)
+async def stream_tool_outputs(thread_id, run_id, tool_outputs):
+    return await client.beta.threads.runs.submit_tool_outputs(
+        thread_id=thread_id,
+        run_id=run_id,
+        tool_outputs=tool_outputs,
+        stream=True
+    )
+
+async def cancel_run(thread_id, run_id):
+    run = await client.beta.threads.runs.cancel(thread_id=thread_id, run_id=run_id)
+    logger.info(f"Cancelled run {run_id} in thread {thread_id}")
+    return run
+
+async def get_latest_run(thread_id):
+    runs = await client.beta.threads.runs.list(thread_id=thread_id, limit=1)
+    return runs.data[0] if runs.data else None
+
+async def get_run_status(thread_id, run_id):
+    run = await client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run_id)
     logger.info(f"Run {run_id} status: {run.status}")
     return run  # Return the full run object instead of just the status
 
 
-def get_assistant_response(thread_id):
-    messages = client.beta.threads.messages.list(thread_id=thread_id)
+async def get_assistant_response(thread_id):
+    messages = await client.beta.threads.messages.list(thread_id=thread_id, limit=1)
     logger.info(f"Retrieved messages for thread {thread_id}")
-    return messages.data[0].content[0].text.value
\ No newline at end of file
+    return messages.data[0].content[0].text.value
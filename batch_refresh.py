@@ -0,0 +1,55 @@
+import os
+import asyncio
+import logging
+from tool_cache import ToolResultCache
+from tool_manager import ToolNotFoundError
+from serialization import ndjson, output_frame, dumps_text
+
+logger = logging.getLogger(__name__)
+
+BATCH_CONCURRENCY = int(os.getenv("REFRESH_BATCH_CONCURRENCY", "8"))
+BATCH_MAX_CALLS = int(os.getenv("REFRESH_BATCH_MAX_CALLS", "100"))
+
+
+def dedupe(calls):
+    """Group identical (tool_name, args) pairs into (tool_name, args, indices)."""
+    groups = {}
+    for index, (tool_name, args) in enumerate(calls):
+        key = ToolResultCache.make_key(tool_name, args)
+        if key in groups:
+            groups[key][2].append(index)
+        else:
+            groups[key] = (tool_name, args, [index])
+    return list(groups.values())
+
+
+async def refresh_batch(tool_manager, calls, concurrency=BATCH_CONCURRENCY):
+    """Run a batch of tool calls and yield one NDJSON record per distinct call.
+
+    Records arrive in completion order; ``indices`` says which positions of
+    the request they answer, since identical calls are only run once.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(tool_name, args, indices):
+        async with semaphore:
+            try:
+                output = await tool_manager.execute_tool(tool_name, args)
+            except ToolNotFoundError:
+                output = dumps_text({"error": "Tool not found"})
+            except Exception as e:
+                logger.error(f"Error refreshing {tool_name}: {str(e)}")
+                output = dumps_text({"error": str(e)})
+        return tool_name, args, indices, output
+
+    unique = dedupe(calls)
+    logger.info(f"Refreshing {len(unique)} distinct calls out of {len(calls)}")
+    tasks = [asyncio.ensure_future(run_one(*call)) for call in unique]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            tool_name, args, indices, output = await next_done
+            yield ndjson({"indices": indices, "tool_name": tool_name, "args": args}, raw={"output": output_frame(output)})
+    finally:
+        # The client may disconnect mid-batch; don't leave calls running for nobody
+        for task in tasks:
+            task.cancel()
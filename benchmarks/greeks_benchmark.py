@@ -0,0 +1,135 @@
+"""Latency of the option_greeks analytics on recorded and fanned-out chains.
+
+First runs the full analysis (Greeks, smile/skew, gamma exposure, put/call
+aggregates) on each recorded Unusual Whales chain in api_responses/, valued
+as of the morning before its nearest expiry. Then fans the recorded rows out
+into one large synthetic chain (as screener_benchmark does) and compares the
+vectorized Black-Scholes Greeks and implied-volatility solve against a plain
+per-contract Python implementation over the same data.
+
+    python -m benchmarks.greeks_benchmark --contracts 100000
+"""
+import os
+import glob
+import json
+import math
+import argparse
+import datetime
+import numpy as np
+import greeks
+from option_chain import OptionChain
+from benchmarks.screener_benchmark import load_rows, synthetic_chain, timed
+
+
+def python_greeks(is_call, spot, strike, years, vol, rate):
+    # One contract at a time with math.erf, as a row-by-row tool would
+    cdf = lambda x: 0.5 * (1 + math.erf(x / math.sqrt(2)))
+    pdf = lambda x: math.exp(-0.5 * x * x) / math.sqrt(2 * math.pi)
+    out = []
+    for call, k, t, sigma in zip(is_call, strike, years, vol):
+        d1 = (math.log(spot / k) + (rate + 0.5 * sigma * sigma) * t) / (sigma * math.sqrt(t))
+        d2 = d1 - sigma * math.sqrt(t)
+        sign = 1.0 if call else -1.0
+        discount = math.exp(-rate * t)
+        out.append((
+            sign * cdf(sign * d1),
+            pdf(d1) / (spot * sigma * math.sqrt(t)),
+            spot * pdf(d1) * math.sqrt(t) / 100,
+            (-spot * pdf(d1) * sigma / (2 * math.sqrt(t)) - sign * rate * k * discount * cdf(sign * d2)) / 365,
+        ))
+    return out
+
+
+def python_implied_volatility(prices, is_call, spot, strike, years, rate, iterations=greeks.IV_ITERATIONS):
+    cdf = lambda x: 0.5 * (1 + math.erf(x / math.sqrt(2)))
+    out = []
+    for target, call, k, t in zip(prices, is_call, strike, years):
+        sign = 1.0 if call else -1.0
+        low, high = greeks.IV_BOUNDS
+        for _ in range(iterations):
+            sigma = (low + high) / 2
+            d1 = (math.log(spot / k) + (rate + 0.5 * sigma * sigma) * t) / (sigma * math.sqrt(t))
+            value = sign * (spot * cdf(sign * d1) - k * math.exp(-rate * t) * cdf(sign * (d1 - sigma * math.sqrt(t))))
+            low, high = (low, sigma) if value > target else (sigma, high)
+        out.append((low + high) / 2)
+    return out
+
+
+def recorded_chains(response_dir):
+    seen = set()
+    for path in sorted(glob.glob(os.path.join(response_dir, "*.json"))):
+        with open(path) as f:
+            payload = json.load(f)
+        try:
+            chain = OptionChain.from_payload(payload)
+        except ValueError:
+            continue
+        key = chain.columns["option_symbol"].tobytes()
+        if key not in seen:
+            seen.add(key)
+            yield os.path.basename(path), chain
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--contracts", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--response-dir", default="api_responses")
+    args = parser.parse_args()
+
+    print(f"{'recorded chain':<44}{'contracts':>10}{'spot':>10}{'analyze ms':>12}{'output B':>10}")
+    recorded = 0
+    for name, chain in recorded_chains(args.response_dir):
+        recorded += 1
+        spot = chain.estimate_spot()
+        if spot is None:
+            continue
+        nearest_expiry = chain.expiry[~np.isnat(chain.expiry)].min().astype(datetime.date)
+        as_of = datetime.datetime.combine(nearest_expiry - datetime.timedelta(days=1), datetime.time(10))
+        result = greeks.analyze(chain, spot, now=as_of)
+        analyze_ms = timed(lambda: greeks.analyze(chain, spot, now=as_of), args.repeat)
+        size = len(json.dumps(result, separators=(",", ":")))
+        print(f"{name:<44}{len(chain):>10}{spot:>10.2f}{analyze_ms:>12.2f}{size:>10}")
+    if not recorded:
+        raise SystemExit(f"No option chain payloads found in {args.response_dir}")
+
+    today = datetime.date.today()
+    chain = OptionChain.from_rows(synthetic_chain(load_rows(args.response_dir), args.contracts, "BENCH", today))
+    # As in screener_benchmark, the fanned-out quotes don't share an underlying, so pin the spot
+    spot = 250.0
+    rate = greeks.RISK_FREE_RATE
+    now = datetime.datetime.combine(today, datetime.time(10))
+    years = greeks.years_to_expiry(chain.expiry, now)
+    vol = chain.columns["implied_volatility"]
+    valid = np.flatnonzero(~np.isnan(years) & (vol > 0))
+    is_call, strike, years, vol = chain.is_call[valid], chain.strike[valid], years[valid], vol[valid]
+    prices = greeks.price(is_call, spot, strike, years, vol, rate)
+
+    # The Python baselines run on a slice and are scaled up to the full chain; they take seconds at full size
+    sample = slice(0, min(len(valid), 2000))
+    sample_size = len(is_call[sample])
+    python_rows = python_greeks(is_call[sample], spot, strike[sample], years[sample], vol[sample], rate)
+    vectorized = greeks.black_scholes(is_call, spot, strike, years, vol, rate)
+    error = max(np.nanmax(np.abs(np.array([row[i] for row in python_rows]) - vectorized[field][sample]))
+                for i, field in enumerate(("delta", "gamma", "vega", "theta")))
+    print(f"\n{len(valid)} priced contracts of {len(chain)}; max |vectorized - math.erf| over Greeks: {error:.2e}")
+
+    print(f"{'step':<26}{'vectorized ms':>15}{'python ms':>12}{'speedup':>9}")
+    steps = [
+        ("greeks", lambda: greeks.black_scholes(is_call, spot, strike, years, vol, rate),
+         lambda: python_greeks(is_call[sample], spot, strike[sample], years[sample], vol[sample], rate)),
+        ("implied volatility", lambda: greeks.implied_volatility(prices, is_call, spot, strike, years, rate),
+         lambda: python_implied_volatility(prices[sample], is_call[sample], spot, strike[sample], years[sample], rate)),
+        ("full analysis", lambda: greeks.analyze(chain, spot, now=now), None),
+    ]
+    for name, vectorized_step, python_step in steps:
+        vectorized_ms = timed(vectorized_step, max(1, args.repeat // 4))
+        if python_step is None:
+            print(f"{name:<26}{vectorized_ms:>15.1f}{'-':>12}{'-':>9}")
+            continue
+        python_ms = timed(python_step, 1) * len(valid) / sample_size
+        print(f"{name:<26}{vectorized_ms:>15.1f}{python_ms:>12.0f}{python_ms / vectorized_ms:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""Offline load test of /chat, /refresh_api_call and /api/response.
+
+Starts the stand-in OpenAI and Unusual Whales servers and the app itself
+(each as a local uvicorn process), then runs concurrent virtual users for a
+fixed duration. Each user keeps its own session cookie (so its own thread)
+and picks a scenario per iteration from the weighted mix:
+
+- chat: a message naming one to three tickers, so runs go through
+  requires_action with one tool call per ticker; the SSE stream is read to
+  the end and time to first byte is reported separately.
+- refresh: /refresh_api_call for get_option_contracts on a random ticker.
+- response: a page of a stored large response, from the ids seen so far.
+
+Reports throughput and p50/p95/p99 latency per scenario. Everything the
+servers write goes to a temporary directory, and the run fails if any file
+in the working tree changed.
+
+    python -m benchmarks.load_test --users 20 --duration 30
+    python -m benchmarks.load_test --app-url http://127.0.0.1:8000 --mix chat=1,refresh=0,response=0
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import httpx
+
+TICKERS = ["AAPL", "COIN", "GOOG", "MSFT", "NVDA", "TSLA"]
+DEFAULT_MIX = "chat=1,refresh=3,response=6"
+PAGE_SIZE = 50
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ("chat", "refresh", "response"):
+            raise ValueError(f"Unknown scenario: {name}")
+        mix[name] = float(weight or 1)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+class Results:
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self.response_ids = []
+
+    def record(self, scenario, seconds, ok=True):
+        if ok:
+            self.latencies.setdefault(scenario, []).append(seconds)
+        else:
+            self.errors[scenario] = self.errors.get(scenario, 0) + 1
+
+    def remember(self, output):
+        if isinstance(output, dict) and output.get("type") == "large_response":
+            self.response_ids.append(output["id"])
+
+    def report(self, elapsed):
+        rows = []
+        for scenario in sorted(set(self.latencies) | set(self.errors)):
+            ordered = sorted(self.latencies.get(scenario, []))
+            rows.append({
+                "scenario": scenario,
+                "requests": len(ordered),
+                "errors": self.errors.get(scenario, 0),
+                "rps": len(ordered) / elapsed,
+                "p50_ms": percentile(ordered, 0.50),
+                "p95_ms": percentile(ordered, 0.95),
+                "p99_ms": percentile(ordered, 0.99),
+                "max_ms": ordered[-1] if ordered else None,
+            })
+            for key in ("p50_ms", "p95_ms", "p99_ms", "max_ms"):
+                if rows[-1][key] is not None:
+                    rows[-1][key] *= 1000
+        return rows
+
+
+async def chat(client, results, rng):
+    tickers = rng.sample(TICKERS, rng.randint(1, 3))
+    message = f"Compare the option activity of {' and '.join(tickers)}"
+    started = time.perf_counter()
+    first_byte = None
+    buffer = b""
+    async with client.stream("POST", "/chat", data={"message": message}) as response:
+        if response.status_code != 200:
+            await response.aread()
+            results.record("chat", time.perf_counter() - started, ok=False)
+            return
+        async for chunk in response.aiter_bytes():
+            if first_byte is None:
+                first_byte = time.perf_counter() - started
+            buffer += chunk
+    ok = True
+    for line in buffer.split(b"\n"):
+        if not line.startswith(b"data: "):
+            continue
+        event = json.loads(line[6:])
+        if event.get("type") == "error":
+            ok = False
+        elif event.get("type") == "tool_output":
+            results.remember(event.get("output"))
+    results.record("chat", time.perf_counter() - started, ok)
+    if first_byte is not None:
+        results.record("chat_first_byte", first_byte, ok)
+
+
+async def refresh(client, results, rng):
+    args = json.dumps({"ticker": rng.choice(TICKERS)})
+    started = time.perf_counter()
+    response = await client.post("/refresh_api_call", data={"tool_name": "get_option_contracts", "args": args})
+    ok = response.status_code == 200
+    if ok:
+        output = response.json()
+        ok = not (isinstance(output, dict) and "error" in output)
+        results.remember(output)
+    results.record("refresh", time.perf_counter() - started, ok)
+
+
+async def read_response(client, results, rng):
+    if not results.response_ids:
+        # Nothing stored yet; produce something to read
+        await refresh(client, results, rng)
+        return
+    response_id = rng.choice(results.response_ids)
+    params = {"offset": rng.randrange(0, 500, PAGE_SIZE), "limit": PAGE_SIZE, "sort": "volume", "order": "desc"}
+    started = time.perf_counter()
+    response = await client.get(f"/api/response/{response_id}", params=params)
+    results.record("response", time.perf_counter() - started, response.status_code == 200)
+
+
+SCENARIOS = {"chat": chat, "refresh": refresh, "response": read_response}
+
+
+async def virtual_user(app_url, deadline, mix, results, seed):
+    rng = random.Random(seed)
+    names, weights = list(mix), list(mix.values())
+    async with httpx.AsyncClient(base_url=app_url, timeout=120) as client:
+        while time.monotonic() < deadline:
+            scenario = rng.choices(names, weights)[0]
+            try:
+                await SCENARIOS[scenario](client, results, rng)
+            except httpx.HTTPError as e:
+                results.record(scenario, 0.0, ok=False)
+                print(f"{scenario} failed: {e!r}", file=sys.stderr)
+
+
+async def wait_ready(url, timeout=60):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(timeout=2) as client:
+        while True:
+            try:
+                await client.get(url)
+                return
+            except httpx.HTTPError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"{url} did not come up within {timeout}s")
+                await asyncio.sleep(0.2)
+
+
+def tree_snapshot(root):
+    """(mtime, size) of every file under ``root``, ignored ones included, except .git and bytecode."""
+    snapshot = {}
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames[:] = [name for name in dirnames if name not in (".git", "__pycache__")]
+        for name in filenames:
+            path = os.path.join(directory, name)
+            stat = os.stat(path)
+            snapshot[os.path.relpath(path, root)] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def start_servers(options, workdir):
+    """Start the stand-ins and the app; returns (app_url, readiness urls, processes)."""
+    host = "127.0.0.1"
+    openai_url = f"http://{host}:{options.openai_port}"
+    uw_url = f"http://{host}:{options.uw_port}"
+    log = open(os.path.join(workdir, "servers.log"), "wb")
+    processes = [
+        subprocess.Popen([sys.executable, "-m", "benchmarks.stand_in_openai", "--port", str(options.openai_port)],
+                         stdout=log, stderr=subprocess.STDOUT),
+        subprocess.Popen([sys.executable, "-m", "benchmarks.stand_in_unusual_whales", "--port", str(options.uw_port)],
+                         stdout=log, stderr=subprocess.STDOUT),
+    ]
+    env = dict(os.environ)
+    env.update({
+        "OPENAI_BASE_URL": f"{openai_url}/v1",
+        "OPENAI_API_KEY": "stand-in",
+        "UNUSUAL_WHALES_BASE_URL": uw_url,
+        "UNUSUAL_WHALES_API_KEY": "stand-in",
+        # Keep everything the run writes out of the working tree; a stand-in assistant id
+        # left in assistant_registry.json would break the next real run
+        "API_RESPONSE_DB": os.path.join(workdir, "responses.db"),
+        "TIMESERIES_DIR": os.path.join(workdir, "timeseries"),
+        "ASSISTANT_REGISTRY_FILE": os.path.join(workdir, "assistant_registry.json"),
+        "TOOL_REGISTRY_DB": os.path.join(workdir, "tool_registry.db"),
+        "TOOL_MANIFEST_FILE": os.path.join(workdir, "tool_manifest.json"),
+        "COMPONENT_CACHE_FILE": os.path.join(workdir, "component_cache.json"),
+    })
+    # The real plan's rate limit would make this a benchmark of the token bucket
+    env.setdefault("UNUSUAL_WHALES_RATE_LIMIT", "1000000")
+    env.setdefault("UNUSUAL_WHALES_RATE_BURST", "1000")
+    processes.append(subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", host, "--port", str(options.app_port),
+         "--workers", str(options.workers), "--log-level", "warning"],
+        stdout=log, stderr=subprocess.STDOUT, env=env))
+    return f"http://{host}:{options.app_port}", [openai_url + "/docs", uw_url + "/docs"], processes
+
+
+async def run(options):
+    mix = parse_mix(options.mix)
+    processes = []
+    workdir = tempfile.mkdtemp(prefix="load_test_")
+    before = None if options.app_url else tree_snapshot(os.getcwd())
+    try:
+        if options.app_url:
+            app_url, ready_urls = options.app_url, []
+        else:
+            app_url, ready_urls, processes = start_servers(options, workdir)
+            print(f"Server logs: {os.path.join(workdir, 'servers.log')}")
+        for url in ready_urls + [app_url + "/metrics"]:
+            await wait_ready(url)
+
+        results = Results()
+        started = time.monotonic()
+        deadline = started + options.duration
+        await asyncio.gather(*[
+            virtual_user(app_url, deadline, mix, results, options.seed + user)
+            for user in range(options.users)
+        ])
+        elapsed = time.monotonic() - started
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+    rows = results.report(elapsed)
+    print(f"{options.users} users for {elapsed:.1f}s, mix {options.mix}")
+    print(f"{'scenario':<16}{'requests':>9}{'errors':>8}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for row in rows:
+        timings = "".join(f"{row[key]:>10.1f}" if row[key] is not None else f"{'-':>10}"
+                          for key in ("p50_ms", "p95_ms", "p99_ms", "max_ms"))
+        print(f"{row['scenario']:<16}{row['requests']:>9}{row['errors']:>8}{row['rps']:>9.1f}{timings}")
+    if options.json:
+        with open(options.json, "w") as f:
+            json.dump({"users": options.users, "duration": elapsed, "mix": mix, "results": rows}, f, indent=2)
+    if before is not None:
+        after = tree_snapshot(os.getcwd())
+        ignored = {os.path.relpath(os.path.abspath(options.json))} if options.json else set()
+        changed = sorted(path for path in before.keys() | after.keys() if before.get(path) != after.get(path) and path not in ignored)
+        if changed:
+            raise SystemExit(f"The run wrote to the working tree instead of {workdir}: {', '.join(changed)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=20, help="seconds to run for")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="scenario weights, e.g. chat=1,refresh=3,response=6")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--app-url", help="load an already running app instead of starting one")
+    parser.add_argument("--app-port", type=int, default=8300)
+    parser.add_argument("--openai-port", type=int, default=8101)
+    parser.add_argument("--uw-port", type=int, default=8201)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the app")
+    parser.add_argument("--json", help="also write the results to this file")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Filter latency of the local options screener on large chain snapshots.
+
+Builds synthetic chains from the recorded Unusual Whales payloads in
+api_responses/ (strikes and expiries are fanned out so every contract is
+distinct), then times typical chat refinements against both the vectorized
+engine and a plain per-row Python filter over the same data.
+
+    python -m benchmarks.screener_benchmark --contracts 100000
+"""
+import os
+import glob
+import json
+import time
+import argparse
+import datetime
+import statistics
+import screening
+from option_chain import OptionChain, OPTION_SYMBOL_PATTERN
+from chain_snapshots import ChainSnapshot
+
+QUERIES = {
+    "otm": {"is_otm": True},
+    "otm+dte": {"is_otm": True, "min_dte": 7, "max_dte": 45},
+    "vol>oi by premium": {"vol_greater_oi": True, "order": "premium", "order_direction": "desc"},
+    "oi+diff by volume": {"min_oi": 1000, "min_diff": 0.02, "max_diff": 0.15, "order": "volume"},
+}
+
+
+def load_rows(response_dir):
+    rows = []
+    for path in sorted(glob.glob(os.path.join(response_dir, "*.json"))):
+        with open(path) as f:
+            payload = json.load(f)
+        if isinstance(payload, dict) and isinstance(payload.get("data"), list):
+            rows.extend(row for row in payload["data"] if "option_symbol" in row)
+    return rows
+
+
+def synthetic_chain(rows, contracts, ticker, today):
+    """Fan the recorded rows out over expiries and strikes into one ticker's chain."""
+    out = []
+    index = 0
+    while len(out) < contracts:
+        row = dict(rows[index % len(rows)])
+        expiry = today + datetime.timedelta(days=1 + (index // len(rows)) % 120)
+        # Calls and puts alternate so every strike has a pair for the spot estimate
+        option_type = "CP"[index % 2]
+        strike = 50000 + ((index // 2) * 2500) % 400000
+        row["option_symbol"] = f"{ticker}{expiry:%y%m%d}{option_type}{strike:08d}"
+        out.append(row)
+        index += 1
+    return out
+
+
+def python_screen(rows, spot, params, today):
+    # What the tool would have to do without columns: parse and test each row
+    result = []
+    for row in rows:
+        match = OPTION_SYMBOL_PATTERN.match(row["option_symbol"])
+        expiry = match.group("expiry")
+        dte = (datetime.date(2000 + int(expiry[:2]), int(expiry[2:4]), int(expiry[4:])) - today).days
+        strike = int(match.group("strike")) / 1000
+        is_call = match.group("type") == "C"
+        diff = ((strike - spot) if is_call else (spot - strike)) / spot
+        if params.get("is_otm") is not None and (diff > 0) != params["is_otm"]:
+            continue
+        if params.get("min_dte") is not None and dte < params["min_dte"]:
+            continue
+        if params.get("max_dte") is not None and dte > params["max_dte"]:
+            continue
+        if params.get("min_diff") is not None and diff < params["min_diff"]:
+            continue
+        if params.get("max_diff") is not None and diff > params["max_diff"]:
+            continue
+        if params.get("min_oi") is not None and row["open_interest"] < params["min_oi"]:
+            continue
+        if params.get("vol_greater_oi") and row["volume"] <= row["open_interest"]:
+            continue
+        result.append(row)
+    order = params.get("order")
+    if order:
+        column = screening.order_column(order)
+        result.sort(key=lambda row: float(row[column]), reverse=params.get("order_direction", "desc") != "asc")
+    return result
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--contracts", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--response-dir", default="api_responses")
+    args = parser.parse_args()
+
+    today = datetime.date.today()
+    rows = load_rows(args.response_dir)
+    if not rows:
+        raise SystemExit(f"No option chain payloads found in {args.response_dir}")
+    chain_rows = synthetic_chain(rows, args.contracts, "BENCH", today)
+
+    start = time.perf_counter()
+    chain = OptionChain.from_rows(chain_rows)
+    build_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    spot = chain.estimate_spot()
+    spot_ms = (time.perf_counter() - start) * 1000
+    # The recorded quotes don't come from one underlying, so pin the spot to keep the filters meaningful
+    spot = 250.0
+    snapshot = ChainSnapshot("BENCH", chain, time.time(), spot=spot)
+    print(f"{len(chain)} contracts, {chain.nbytes / 1e6:.1f} MB columnar; "
+          f"snapshot build {build_ms:.0f} ms, spot estimate {spot_ms:.1f} ms (spot {spot:.2f})")
+
+    print(f"{'query':<22}{'matches':>9}{'local ms':>11}{'python ms':>11}{'speedup':>9}")
+    for name, query in QUERIES.items():
+        params = {"ticker_symbol": "BENCH", **query}
+        result = screening.screen(snapshot, params, today)
+        local_ms = timed(lambda: screening.screen(snapshot, params, today), args.repeat)
+        python_ms = timed(lambda: python_screen(chain_rows, spot, params, today), max(1, args.repeat // 5))
+        print(f"{name:<22}{len(result):>9}{local_ms:>11.2f}{python_ms:>11.1f}{python_ms / local_ms:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""Local stand-in for the OpenAI Assistants API.
+
+Implements just enough of the assistants, threads, messages and runs endpoints
+for the app to drive a full run lifecycle without spending API quota: polling
+(`queued` -> `in_progress` -> `requires_action` -> `completed`) and the streamed
+event protocol (`thread.run.*`, `thread.message.delta`, ...).
+
+A user message that mentions upper-case tickers (e.g. "compare NVDA and SPY")
+produces one `get_option_contracts` tool call per ticker before the run
+completes. Chat completions answer with a dashboard chart spec.
+
+    python -m benchmarks.stand_in_openai --port 8100
+    OPENAI_BASE_URL=http://127.0.0.1:8100/v1 OPENAI_API_KEY=test uvicorn main:app
+"""
+import os
+import re
+import json
+import time
+import uuid
+import asyncio
+import argparse
+from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+
+STEP_LATENCY = float(os.getenv("STAND_IN_STEP_LATENCY", "0.05"))
+TOKEN_LATENCY = float(os.getenv("STAND_IN_TOKEN_LATENCY", "0.005"))
+COMPLETION_LATENCY = float(os.getenv("STAND_IN_COMPLETION_LATENCY", "1.0"))
+TICKER_PATTERN = re.compile(r"\b[A-Z]{2,5}\b")
+FIELDS_PATTERN = re.compile(r"rows with these fields: (.*)\.")
+
+app = FastAPI()
+
+assistants = {}
+threads = {}
+runs = {}
+
+
+def new_id(prefix):
+    return f"{prefix}_{uuid.uuid4().hex[:24]}"
+
+
+def message_object(thread_id, role, text):
+    return {
+        "id": new_id("msg"),
+        "object": "thread.message",
+        "created_at": int(time.time()),
+        "thread_id": thread_id,
+        "role": role,
+        "status": "completed",
+        "content": [{"type": "text", "text": {"value": text, "annotations": []}}],
+    }
+
+
+def run_object(run):
+    return {key: value for key, value in run.items() if not key.startswith("_")}
+
+
+def plan_run(thread_id):
+    user_messages = [m for m in threads[thread_id]["messages"] if m["role"] == "user"]
+    text = user_messages[-1]["content"][0]["text"]["value"] if user_messages else ""
+    tickers = list(dict.fromkeys(TICKER_PATTERN.findall(text)))
+    tool_calls = [
+        {
+            "id": new_id("call"),
+            "type": "function",
+            "function": {"name": "get_option_contracts", "arguments": json.dumps({"ticker": ticker})},
+        }
+        for ticker in tickers
+    ]
+    reply = f"Here is what I found for {', '.join(tickers)}." if tickers else f"You said: {text}"
+    return tool_calls, reply
+
+
+def advance(run):
+    """Move a polled run along its lifecycle based on elapsed wall time."""
+    elapsed = time.monotonic() - run["_updated"]
+    if run["status"] == "queued" and elapsed >= STEP_LATENCY:
+        run["status"] = "in_progress"
+        run["_updated"] = time.monotonic()
+    elif run["status"] == "in_progress" and elapsed >= STEP_LATENCY:
+        if run["_pending_tool_calls"]:
+            run["status"] = "requires_action"
+            run["required_action"] = {
+                "type": "submit_tool_outputs",
+                "submit_tool_outputs": {"tool_calls": run["_pending_tool_calls"]},
+            }
+            run["_pending_tool_calls"] = []
+        else:
+            finish(run)
+        run["_updated"] = time.monotonic()
+
+
+def finish(run):
+    run["status"] = "completed"
+    run["required_action"] = None
+    run["completed_at"] = int(time.time())
+    threads[run["thread_id"]]["messages"].append(message_object(run["thread_id"], "assistant", run["_reply"]))
+
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def run_stream(run, created=True):
+    run["status"] = "queued"
+    if created:
+        yield sse("thread.run.created", run_object(run))
+    yield sse("thread.run.queued", run_object(run))
+    await asyncio.sleep(STEP_LATENCY)
+    run["status"] = "in_progress"
+    yield sse("thread.run.in_progress", run_object(run))
+    await asyncio.sleep(STEP_LATENCY)
+    if run["_pending_tool_calls"]:
+        run["status"] = "requires_action"
+        run["required_action"] = {
+            "type": "submit_tool_outputs",
+            "submit_tool_outputs": {"tool_calls": run["_pending_tool_calls"]},
+        }
+        run["_pending_tool_calls"] = []
+        yield sse("thread.run.requires_action", run_object(run))
+    else:
+        message = message_object(run["thread_id"], "assistant", "")
+        message["status"] = "in_progress"
+        yield sse("thread.message.created", message)
+        for token in re.findall(r"\S+\s*", run["_reply"]):
+            await asyncio.sleep(TOKEN_LATENCY)
+            yield sse("thread.message.delta", {
+                "id": message["id"],
+                "object": "thread.message.delta",
+                "delta": {"content": [{"index": 0, "type": "text", "text": {"value": token}}]},
+            })
+        finish(run)
+        yield sse("thread.message.completed", threads[run["thread_id"]]["messages"][-1])
+        yield sse("thread.run.completed", run_object(run))
+    yield "event: done\ndata: [DONE]\n\n"
+
+
+def get_run(thread_id, run_id):
+    run = runs.get(run_id)
+    if run is None or run["thread_id"] != thread_id:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return run
+
+
+@app.post("/v1/assistants")
+async def create_assistant(request: Request):
+    body = await request.json()
+    assistant = {"id": new_id("asst"), "object": "assistant", "created_at": int(time.time()), **body}
+    assistants[assistant["id"]] = assistant
+    return JSONResponse(content=assistant)
+
+
+@app.post("/v1/assistants/{assistant_id}")
+async def update_assistant(assistant_id: str, request: Request):
+    if assistant_id not in assistants:
+        raise HTTPException(status_code=404, detail="Assistant not found")
+    assistants[assistant_id].update(await request.json())
+    return JSONResponse(content=assistants[assistant_id])
+
+
+@app.get("/v1/assistants/{assistant_id}")
+async def retrieve_assistant(assistant_id: str):
+    if assistant_id not in assistants:
+        raise HTTPException(status_code=404, detail="Assistant not found")
+    return JSONResponse(content=assistants[assistant_id])
+
+
+@app.post("/v1/threads")
+async def create_thread():
+    thread_id = new_id("thread")
+    threads[thread_id] = {"messages": []}
+    return JSONResponse(content={"id": thread_id, "object": "thread", "created_at": int(time.time()), "metadata": {}})
+
+
+@app.post("/v1/threads/{thread_id}/messages")
+async def create_message(thread_id: str, request: Request):
+    if thread_id not in threads:
+        raise HTTPException(status_code=404, detail="Thread not found")
+    body = await request.json()
+    message = message_object(thread_id, body.get("role", "user"), body["content"])
+    threads[thread_id]["messages"].append(message)
+    return JSONResponse(content=message)
+
+
+@app.get("/v1/threads/{thread_id}/messages")
+async def list_messages(thread_id: str, limit: int = 20):
+    if thread_id not in threads:
+        raise HTTPException(status_code=404, detail="Thread not found")
+    data = list(reversed(threads[thread_id]["messages"]))[:limit]
+    return JSONResponse(content={"object": "list", "data": data, "has_more": False})
+
+
+@app.post("/v1/threads/{thread_id}/runs")
+async def create_run(thread_id: str, request: Request):
+    if thread_id not in threads:
+        raise HTTPException(status_code=404, detail="Thread not found")
+    body = await request.json()
+    tool_calls, reply = plan_run(thread_id)
+    run = {
+        "id": new_id("run"),
+        "object": "thread.run",
+        "created_at": int(time.time()),
+        "thread_id": thread_id,
+        "assistant_id": body["assistant_id"],
+        "status": "queued",
+        "required_action": None,
+        "last_error": None,
+        "_pending_tool_calls": tool_calls,
+        "_reply": reply,
+        "_updated": time.monotonic(),
+    }
+    runs[run["id"]] = run
+    if body.get("stream"):
+        return StreamingResponse(run_stream(run), media_type="text/event-stream")
+    return JSONResponse(content=run_object(run))
+
+
+@app.get("/v1/threads/{thread_id}/runs/{run_id}")
+async def retrieve_run(thread_id: str, run_id: str):
+    run = get_run(thread_id, run_id)
+    advance(run)
+    return JSONResponse(content=run_object(run))
+
+
+@app.post("/v1/threads/{thread_id}/runs/{run_id}/submit_tool_outputs")
+async def submit_tool_outputs(thread_id: str, run_id: str, request: Request):
+    run = get_run(thread_id, run_id)
+    if run["status"] != "requires_action":
+        raise HTTPException(status_code=400, detail=f"Run is {run['status']}, not requires_action")
+    body = await request.json()
+    expected = {call["id"] for call in run["required_action"]["submit_tool_outputs"]["tool_calls"]}
+    received = {output["tool_call_id"] for output in body["tool_outputs"]}
+    if expected != received:
+        raise HTTPException(status_code=400, detail="Tool outputs do not match the requested tool calls")
+    run["status"] = "queued"
+    run["required_action"] = None
+    run["_updated"] = time.monotonic()
+    if body.get("stream"):
+        return StreamingResponse(run_stream(run, created=False), media_type="text/event-stream")
+    return JSONResponse(content=run_object(run))
+
+
+@app.post("/v1/threads/{thread_id}/runs/{run_id}/cancel")
+async def cancel_run(thread_id: str, run_id: str):
+    run = get_run(thread_id, run_id)
+    if run["status"] not in ["completed", "failed", "expired", "cancelled"]:
+        run["status"] = "cancelled"
+        run["required_action"] = None
+    return JSONResponse(content=run_object(run))
+
+
+@app.post("/v1/chat/completions")
+async def create_chat_completion(request: Request):
+    # Enough for the dashboard component generator: a chart bound to the fields named in the prompt
+    body = await request.json()
+    prompt = body["messages"][-1]["content"]
+    match = FIELDS_PATTERN.search(prompt)
+    fields = [field.strip() for field in match.group(1).split(",")] if match else []
+    spec = {"type": "chart", "title": "Stand-in chart", "id": new_id("component"),
+            "data": [{"type": "bar", "x": ["a", "b"], "y": [1, 2]}], "layout": {}}
+    if fields:
+        x = "option_symbol" if "option_symbol" in fields else fields[0]
+        y = "volume" if "volume" in fields else fields[-1]
+        spec["binding"] = {"x": x, "y": [y], "trace_type": "bar"}
+    await asyncio.sleep(COMPLETION_LATENCY)
+    return JSONResponse(content={
+        "id": new_id("chatcmpl"),
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model"),
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": json.dumps(spec)}}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    })
+
+
+if __name__ == "__main__":
+    import uvicorn
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    options = parser.parse_args()
+    uvicorn.run(app, host=options.host, port=options.port)
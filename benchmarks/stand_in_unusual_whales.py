@@ -0,0 +1,150 @@
+"""Local stand-in for the Unusual Whales endpoints the tool plugins call.
+
+Replays the recorded option-contract payloads in api_responses/ with a
+configurable latency, so tools can be load tested without spending API quota:
+
+- /api/stock/{ticker}/option-contracts cycles through the recorded payloads
+  for the ticker. Tickers that were never recorded get a recorded chain with
+  the symbols rewritten to theirs.
+- /api/option-contract/{id}/historic returns a synthetic daily history for
+  the contract, honouring ``limit``.
+- /api/screener/option-contracts returns recorded contracts for
+  ``ticker_symbol`` (or every ticker), up to ``limit``.
+
+    python -m benchmarks.stand_in_unusual_whales --port 8200
+    UNUSUAL_WHALES_BASE_URL=http://127.0.0.1:8200 UNUSUAL_WHALES_API_KEY=test uvicorn main:app
+"""
+import os
+import glob
+import json
+import random
+import asyncio
+import hashlib
+import argparse
+import datetime
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+from option_chain import OPTION_SYMBOL_PATTERN
+
+LATENCY = float(os.getenv("STAND_IN_UW_LATENCY", "0.1"))
+JITTER = float(os.getenv("STAND_IN_UW_JITTER", "0.05"))
+# Share of requests answered with a 429, to exercise the client's retries
+ERROR_RATE = float(os.getenv("STAND_IN_UW_ERROR_RATE", "0"))
+RESPONSE_DIR = os.getenv("STAND_IN_UW_RESPONSE_DIR", "api_responses")
+HISTORY_DAYS = int(os.getenv("STAND_IN_UW_HISTORY_DAYS", "120"))
+
+app = FastAPI()
+
+payloads = {}
+rewritten = {}
+requests_served = {}
+
+
+def load_payloads(response_dir):
+    by_ticker = {}
+    for path in sorted(glob.glob(os.path.join(response_dir, "*.json"))):
+        with open(path, "rb") as f:
+            data = f.read()
+        rows = json.loads(data).get("data") or []
+        match = OPTION_SYMBOL_PATTERN.match(rows[0].get("option_symbol", "")) if rows else None
+        if match:
+            by_ticker.setdefault(match.group(1), []).append(data)
+    return by_ticker
+
+
+def recorded_chains(ticker):
+    if ticker in payloads:
+        return payloads[ticker]
+    if ticker not in rewritten:
+        # Borrow a recorded chain, picked by ticker so repeated calls agree
+        source = sorted(payloads)[int(hashlib.sha1(ticker.encode("utf-8")).hexdigest(), 16) % len(payloads)]
+        rewritten[ticker] = [data.replace(source.encode("ascii"), ticker.encode("ascii")) for data in payloads[source]]
+    return rewritten[ticker]
+
+
+def all_rows(tickers=None):
+    for ticker in tickers or sorted(payloads):
+        for row in json.loads(recorded_chains(ticker)[0])["data"]:
+            yield ticker, row
+
+
+async def respond(endpoint):
+    requests_served[endpoint] = requests_served.get(endpoint, 0) + 1
+    await asyncio.sleep(max(0.0, random.gauss(LATENCY, JITTER)))
+    if ERROR_RATE and random.random() < ERROR_RATE:
+        return JSONResponse(status_code=429, content={"error": "rate limited"}, headers={"Retry-After": "0.1"})
+    return None
+
+
+@app.on_event("startup")
+async def startup():
+    payloads.update(load_payloads(RESPONSE_DIR))
+    if not payloads:
+        raise RuntimeError(f"No recorded option-contract payloads in {RESPONSE_DIR}")
+
+
+@app.get("/api/stock/{ticker}/option-contracts")
+async def option_contracts(ticker: str):
+    error = await respond("option-contracts")
+    if error:
+        return error
+    chains = recorded_chains(ticker.upper())
+    # Successive calls walk through the recordings so refreshes see changing data
+    return Response(content=chains[requests_served["option-contracts"] % len(chains)], media_type="application/json")
+
+
+@app.get("/api/option-contract/{contract_id}/historic")
+async def option_contract_historic(contract_id: str, limit: int = HISTORY_DAYS):
+    error = await respond("historic")
+    if error:
+        return error
+    rng = random.Random(contract_id)
+    today = datetime.date.today()
+    price = rng.uniform(0.5, 20.0)
+    open_interest = rng.randint(100, 50000)
+    chains = []
+    for offset in range(HISTORY_DAYS - 1, -1, -1):
+        price = max(0.01, price * (1 + rng.gauss(0, 0.05)))
+        open_interest = max(0, open_interest + rng.randint(-500, 500))
+        volume = rng.randint(0, 20000)
+        chains.append({
+            "date": (today - datetime.timedelta(days=offset)).isoformat(),
+            "last_price": f"{price:.2f}",
+            "high_price": f"{price * 1.05:.2f}",
+            "low_price": f"{price * 0.95:.2f}",
+            "volume": volume,
+            "open_interest": open_interest,
+            "implied_volatility": f"{rng.uniform(0.2, 1.2):.6f}",
+            "total_premium": f"{price * volume * 100:.2f}",
+        })
+    return {"chains": chains[-limit:] if limit else []}
+
+
+@app.get("/api/screener/option-contracts")
+async def screener(request: Request):
+    error = await respond("screener")
+    if error:
+        return error
+    params = request.query_params
+    tickers = [ticker.strip().upper() for ticker in params.get("ticker_symbol", "").split(",") if ticker.strip()]
+    limit = int(params.get("limit", 50))
+    rows = []
+    for ticker, row in all_rows(tickers):
+        rows.append({**row, "ticker_symbol": ticker})
+        if len(rows) >= limit:
+            break
+    return {"data": rows}
+
+
+@app.get("/stats")
+async def stats():
+    return {"requests": requests_served, "tickers": sorted(payloads)}
+
+
+if __name__ == "__main__":
+    import uvicorn
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8200)
+    options = parser.parse_args()
+    uvicorn.run(app, host=options.host, port=options.port)
@@ -0,0 +1,219 @@
+import os
+import time
+import asyncio
+import logging
+import datetime
+from zoneinfo import ZoneInfo
+from tool_manager import ToolNotFoundError
+from chain_snapshots import chain_snapshots
+from serialization import loads
+from metrics import WARM_TICKERS, WARM_TIMESTAMP
+
+logger = logging.getLogger(__name__)
+
+# Comma separated, e.g. "SPY,QQQ,NVDA"; empty turns the warmer off
+WATCHLIST = os.getenv("WARM_WATCHLIST", "")
+# Cron expressions (minute hour day month weekday) separated by ";", in WARM_TIMEZONE:
+# pre-market at 08:30, then every 5 minutes through the session
+SCHEDULE = os.getenv("WARM_SCHEDULE", "30 8 * * 1-5; */5 9-15 * * 1-5")
+TIMEZONE = os.getenv("WARM_TIMEZONE", "America/New_York")
+# Age after which a ticker is reported stale; should cover the gap between scheduled runs
+MAX_AGE = float(os.getenv("WARM_MAX_AGE", "300"))
+HISTORY_CONTRACTS = int(os.getenv("WARM_HISTORY_CONTRACTS", "5"))
+CONCURRENCY = int(os.getenv("WARM_CONCURRENCY", "4"))
+WARM_ON_STARTUP = os.getenv("WARM_ON_STARTUP", "1") == "1"
+
+CHAIN_TOOL = "get_option_contracts"
+HISTORY_TOOL = "get_option_contract_historic"
+CRON_FIELDS = (("minute", 0, 59), ("hour", 0, 23), ("day", 1, 31), ("month", 1, 12), ("weekday", 0, 6))
+
+
+def parse_cron_field(text, low, high):
+    values = set()
+    for part in text.split(","):
+        spec, _, step = part.partition("/")
+        if spec == "*":
+            start, end = low, high
+        elif "-" in spec:
+            start, end = (int(value) for value in spec.split("-", 1))
+        else:
+            start = end = int(spec)
+        if start < low or end > high + (high == 6) or start > end:
+            raise ValueError(f"Cron field out of range: {part}")
+        # Sunday may be written as 7 as well as 0
+        values.update(value % 7 if high == 6 else value for value in range(start, end + 1, int(step) if step else 1))
+    return values
+
+
+class CronSchedule:
+    """Five-field cron expression: minute hour day month weekday (0 = Sunday)."""
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != len(CRON_FIELDS):
+            raise ValueError(f"Expected {len(CRON_FIELDS)} cron fields, got: {expression}")
+        self.expression = expression
+        self.minute, self.hour, self.day, self.month, self.weekday = (
+            parse_cron_field(field, low, high) for field, (_, low, high) in zip(fields, CRON_FIELDS))
+
+    def matches(self, moment):
+        return (moment.minute in self.minute and moment.hour in self.hour and moment.day in self.day
+                and moment.month in self.month and (moment.weekday() + 1) % 7 in self.weekday)
+
+    def next_after(self, moment):
+        """The first matching minute after ``moment``, or None within a year."""
+        candidate = moment.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        for _ in range(366 * 24 * 60):
+            if self.matches(candidate):
+                return candidate
+            candidate += datetime.timedelta(minutes=1)
+        return None
+
+
+def parse_schedule(text):
+    return [CronSchedule(expression.strip()) for expression in text.split(";") if expression.strip()]
+
+
+class CacheWarmer:
+    """Prefetches option chains and contract history for a watchlist on a schedule.
+
+    Each run fetches every ticker's chain through get_option_contracts (which
+    also stores it for /api/response and for options_screener) and the history
+    of its most traded contracts through get_option_contract_historic (which
+    keeps it in the time-series store). Both results also go into the tool
+    cache, but only for each tool's own cache_ttl: a warm run never makes
+    chats, refreshes or live subscriptions see data older than they would
+    otherwise. What lasts between runs is the stored chain, the chain
+    snapshot and the contract history.
+
+    Every uvicorn worker warms its own tool cache, so each one makes these
+    calls; keep the watchlist to the tickers that are actually asked about.
+    """
+
+    def __init__(self, tool_manager, watchlist=WATCHLIST, schedule=SCHEDULE, timezone=TIMEZONE,
+                 max_age=MAX_AGE, history_contracts=HISTORY_CONTRACTS, concurrency=CONCURRENCY):
+        self.tool_manager = tool_manager
+        self.watchlist = [ticker.strip().upper() for ticker in watchlist.split(",") if ticker.strip()]
+        self.schedule = parse_schedule(schedule)
+        self.timezone = ZoneInfo(timezone)
+        self.max_age = max_age
+        self.history_contracts = history_contracts
+        self.concurrency = concurrency
+        self.state = {}
+        self.current = None
+        self.next_run_at = None
+        self.runs = 0
+
+    def next_run(self, after=None):
+        after = after or datetime.datetime.now(self.timezone)
+        times = [moment for moment in (schedule.next_after(after) for schedule in self.schedule) if moment]
+        return min(times) if times else None
+
+    async def run(self, on_startup=WARM_ON_STARTUP):
+        if not self.watchlist:
+            return
+        logger.info(f"Warming {', '.join(self.watchlist)} on schedule "
+                    f"{'; '.join(schedule.expression for schedule in self.schedule)} ({self.timezone.key})")
+        if on_startup:
+            await self.warm()
+        while True:
+            self.next_run_at = self.next_run()
+            if self.next_run_at is None:
+                logger.warning("Cache warming schedule never fires again; stopping")
+                return
+            await asyncio.sleep(max(0.0, self.next_run_at.timestamp() - time.time()))
+            try:
+                await self.warm()
+            except Exception as e:
+                logger.error(f"Error warming caches: {str(e)}")
+
+    async def warm(self):
+        """Warm every watchlist ticker now; joins a run that is already going."""
+        if self.current is None or self.current.done():
+            self.current = asyncio.ensure_future(self._warm_all())
+        await asyncio.shield(self.current)
+
+    async def _warm_all(self):
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def warm_one(ticker):
+            async with semaphore:
+                await self.warm_ticker(ticker)
+
+        await asyncio.gather(*(warm_one(ticker) for ticker in self.watchlist))
+        self.runs += 1
+        failed = [ticker for ticker in self.watchlist if self.state[ticker]["error"]]
+        logger.info(f"Warmed {len(self.watchlist) - len(failed)} of {len(self.watchlist)} tickers "
+                    f"in {time.perf_counter() - started:.1f}s" + (f"; failed: {', '.join(failed)}" if failed else ""))
+
+    async def warm_ticker(self, ticker):
+        started = time.perf_counter()
+        state = self.state.setdefault(ticker, {"warmed_at": None, "response_id": None, "contracts": []})
+        state["attempted_at"] = time.time()
+        try:
+            output = await self.tool_manager.execute_tool(CHAIN_TOOL, {"ticker": ticker}, refresh=True)
+            result = loads(output)
+            if isinstance(result, dict) and "error" in result:
+                raise ValueError(result["error"])
+            contracts = self.top_contracts(ticker)
+            history = await asyncio.gather(*(self.warm_history(contract) for contract in contracts))
+        except Exception as e:
+            state["error"] = str(e)
+            WARM_TICKERS.inc(outcome="error")
+            logger.warning(f"Could not warm {ticker}: {str(e)}")
+            return
+        finally:
+            state["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        state.update({
+            "warmed_at": time.time(),
+            "response_id": result.get("id") if isinstance(result, dict) and result.get("type") == "large_response" else None,
+            "contracts": [contract for contract, ok in zip(contracts, history) if ok],
+            "error": None,
+        })
+        WARM_TICKERS.inc(outcome="ok")
+        WARM_TIMESTAMP.set(state["warmed_at"], ticker=ticker)
+
+    def top_contracts(self, ticker):
+        """The most traded contracts of the chain just fetched, by volume."""
+        snapshot = chain_snapshots.get(ticker)
+        if snapshot is None or not self.history_contracts or "volume" not in snapshot.chain.columns:
+            return []
+        chain = snapshot.chain
+        indices = chain.sort_indices("volume", descending=True)[:self.history_contracts]
+        return [symbol.decode("ascii") for symbol in chain.column("option_symbol")[indices].tolist()]
+
+    async def warm_history(self, contract_id):
+        try:
+            output = await self.tool_manager.execute_tool(
+                HISTORY_TOOL, {"contract_id": contract_id}, refresh=True)
+        except ToolNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"Could not warm history for {contract_id}: {str(e)}")
+            return False
+        result = loads(output)
+        if isinstance(result, dict) and "error" in result:
+            logger.warning(f"Could not warm history for {contract_id}: {result['error']}")
+            return False
+        return True
+
+    def report(self):
+        now = time.time()
+        tickers = {}
+        for ticker in self.watchlist:
+            state = dict(self.state.get(ticker) or {"warmed_at": None})
+            age = now - state["warmed_at"] if state["warmed_at"] else None
+            state["age_seconds"] = round(age, 1) if age is not None else None
+            state["fresh"] = age is not None and age <= self.max_age
+            tickers[ticker] = state
+        return {
+            "watchlist": self.watchlist,
+            "schedule": [schedule.expression for schedule in self.schedule],
+            "timezone": self.timezone.key,
+            "max_age": self.max_age,
+            "runs": self.runs,
+            "running": self.current is not None and not self.current.done(),
+            "next_run": self.next_run_at.isoformat() if self.next_run_at else None,
+            "tickers": tickers,
+        }
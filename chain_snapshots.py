@@ -0,0 +1,73 @@
+import os
+import time
+import threading
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+MAX_AGE = float(os.getenv("CHAIN_SNAPSHOT_MAX_AGE", "300"))
+MAX_TICKERS = int(os.getenv("CHAIN_SNAPSHOT_MAX_TICKERS", "500"))
+
+
+class ChainSnapshot:
+    def __init__(self, ticker, chain, fetched_at, spot=None):
+        self.ticker = ticker
+        self.chain = chain
+        self.fetched_at = fetched_at
+        self._spot = spot
+        self._spot_estimated = spot is not None
+
+    @property
+    def spot(self):
+        # Estimated once per snapshot; None when the chain has no call/put pairs
+        if not self._spot_estimated:
+            self._spot = self.chain.estimate_spot()
+            self._spot_estimated = True
+        return self._spot
+
+    @property
+    def age(self):
+        return time.time() - self.fetched_at
+
+
+class ChainSnapshotStore:
+    """Latest option chain per ticker, as fetched by get_option_contracts.
+
+    Snapshots older than ``max_age`` seconds are treated as missing, and the
+    least recently used tickers are dropped beyond ``max_tickers``.
+    """
+
+    def __init__(self, max_age=MAX_AGE, max_tickers=MAX_TICKERS):
+        self.max_age = max_age
+        self.max_tickers = max_tickers
+        self.snapshots = OrderedDict()
+        self.lock = threading.Lock()
+
+    def put(self, ticker, chain, fetched_at=None):
+        ticker = ticker.upper()
+        snapshot = ChainSnapshot(ticker, chain, fetched_at or time.time())
+        with self.lock:
+            self.snapshots[ticker] = snapshot
+            self.snapshots.move_to_end(ticker)
+            while len(self.snapshots) > self.max_tickers:
+                self.snapshots.popitem(last=False)
+
+    def get(self, ticker):
+        ticker = ticker.upper()
+        with self.lock:
+            snapshot = self.snapshots.get(ticker)
+            if snapshot is None:
+                return None
+            if snapshot.age > self.max_age:
+                del self.snapshots[ticker]
+                return None
+            self.snapshots.move_to_end(ticker)
+            return snapshot
+
+    def tickers(self):
+        with self.lock:
+            return [ticker for ticker, snapshot in self.snapshots.items() if snapshot.age <= self.max_age]
+
+
+chain_snapshots = ChainSnapshotStore()
@@ -0,0 +1,267 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import openai
+from tool_manager import ToolNotFoundError
+from serialization import sse, output_frame, dumps_text
+from compaction import compact_output
+from metrics import STAGE_SECONDS
+from run_control import run_in_background
+from assistants import (
+    run_assistant, stream_run, get_run_status, get_assistant_response,
+    submit_tool_outputs, stream_tool_outputs, cancel_run, get_latest_run, assistant_exists)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RUN_MODE = os.getenv("ASSISTANT_RUN_MODE", "stream")
+POLL_INITIAL_DELAY = float(os.getenv("ASSISTANT_POLL_INITIAL_DELAY", "0.2"))
+POLL_MAX_DELAY = float(os.getenv("ASSISTANT_POLL_MAX_DELAY", "2.0"))
+POLL_BACKOFF = float(os.getenv("ASSISTANT_POLL_BACKOFF", "1.5"))
+TOOL_CALL_CONCURRENCY = int(os.getenv("TOOL_CALL_CONCURRENCY", "8"))
+
+TERMINAL_ERROR_STATUSES = ["failed", "expired", "cancelled"]
+# A run in one of these can still finish, so a chat that lost track of its run picks it back up
+RESUMABLE_RUN_STATUSES = ("queued", "in_progress", "requires_action")
+# Run statuses whose duration is recorded as a "run_<status>" stage
+TIMED_RUN_STATUSES = ("queued", "in_progress")
+
+
+class RunTimer:
+    """Records how long a run spends in each status.
+
+    Streamed runs report every transition; polled runs only as precisely as
+    the poll interval allows.
+    """
+
+    def __init__(self):
+        self.status = None
+        self.since = None
+
+    def update(self, status):
+        if status == self.status:
+            return
+        now = time.perf_counter()
+        if self.status in TIMED_RUN_STATUSES:
+            STAGE_SECONDS.observe(now - self.since, stage=f"run_{self.status}")
+        self.status = status
+        self.since = now
+
+
+class ActiveRun:
+    """The run a chat is driving, so it can be cancelled if the chat is abandoned."""
+
+    def __init__(self, thread_id):
+        self.thread_id = thread_id
+        self.run_id = None
+
+
+class ChatRunner:
+    def __init__(self, tool_manager, mode=RUN_MODE, tool_concurrency=TOOL_CALL_CONCURRENCY, assistant_registry=None):
+        self.tool_manager = tool_manager
+        self.mode = mode
+        self.tool_concurrency = tool_concurrency
+        self.assistant_registry = assistant_registry
+
+    async def events(self, assistant_id, thread_id):
+        active = ActiveRun(thread_id)
+        finished = False
+        try:
+            if self.mode == "stream":
+                async for event in self.stream_events(assistant_id, thread_id, active):
+                    yield event
+            else:
+                run = await self.start_run(run_assistant, assistant_id, thread_id)
+                active.run_id = run.id
+                logger.info(f"Started run: {run.id}")
+                async for event in self.poll_events(thread_id, run.id):
+                    yield event
+            finished = True
+        finally:
+            if not finished and active.run_id:
+                # Closed early (client gone, deadline, error): stop the run spending tokens and tool calls.
+                # Scheduled rather than awaited since this generator may be closing under cancellation.
+                run_in_background(self.cancel(active))
+
+    async def start_run(self, start, assistant_id, thread_id):
+        """Start a run with ``start`` (``run_assistant`` or ``stream_run``).
+
+        If the assistant was deleted on the OpenAI side, its registry entry is
+        replaced and the run is started once more with the new assistant.
+        """
+        try:
+            return await start(assistant_id, thread_id)
+        except openai.NotFoundError:
+            # The thread may be the missing one; only a missing assistant is ours to fix
+            if self.assistant_registry is None or await assistant_exists(assistant_id):
+                raise
+        assistant_id = await self.assistant_registry.replace(assistant_id, self.tool_manager.get_available_tools())
+        return await start(assistant_id, thread_id)
+
+    async def cancel(self, active):
+        try:
+            await cancel_run(active.thread_id, active.run_id)
+        except Exception as e:
+            # Usually the run already reached a terminal state
+            logger.warning(f"Could not cancel run {active.run_id}: {str(e)}")
+
+    async def stream_events(self, assistant_id, thread_id, active):
+        run_id = None
+        timer = RunTimer()
+        try:
+            stream = await self.start_run(stream_run, assistant_id, thread_id)
+            while stream is not None:
+                next_stream = None
+                message_text = []
+                async with stream:
+                    async for event in stream:
+                        if event.event.startswith("thread.run.") and not event.event.startswith("thread.run.step."):
+                            timer.update(event.data.status)
+                        if event.event == "thread.run.created":
+                            run_id = active.run_id = event.data.id
+                            logger.info(f"Started streamed run: {run_id}")
+                        elif event.event == "thread.message.delta":
+                            for block in event.data.delta.content or []:
+                                if block.type == "text" and block.text and block.text.value:
+                                    message_text.append(block.text.value)
+                                    yield sse({'type': 'assistant_delta', 'content': block.text.value})
+                        elif event.event == "thread.message.completed":
+                            text_blocks = [block.text.value for block in event.data.content if block.type == "text"]
+                            content = "".join(text_blocks) if text_blocks else "".join(message_text)
+                            message_text = []
+                            yield sse({'type': 'assistant_message', 'content': content, 'streamed': True})
+                        elif event.event == "thread.run.requires_action":
+                            run = event.data
+                            required_action = run.required_action
+                            if not required_action or required_action.type != "submit_tool_outputs":
+                                logger.error(f"Unexpected required action: {required_action}")
+                                yield sse({'type': 'error', 'content': 'An unexpected action is required. Please try again.'})
+                                return
+                            tool_outputs = []
+                            async for frame in self.run_tool_calls(required_action.submit_tool_outputs.tool_calls, tool_outputs):
+                                yield frame
+                            with STAGE_SECONDS.time(stage="submit_tool_outputs"):
+                                next_stream = await stream_tool_outputs(thread_id, run.id, tool_outputs)
+                            timer.update("queued")
+                            logger.info(f"Submitted tool outputs for run {run.id}")
+                        elif event.event in ["thread.run.failed", "thread.run.expired", "thread.run.cancelled"]:
+                            run = event.data
+                            error_message = f"Run failed with status: {run.status}"
+                            if getattr(run, 'last_error', None):
+                                error_message += f", Error: {run.last_error}"
+                            logger.error(error_message)
+                            yield sse({'type': 'error', 'content': error_message})
+                            return
+                        elif event.event == "error":
+                            raise RuntimeError(f"Run stream error: {event.data}")
+                stream = next_stream
+        except Exception as e:
+            # The event stream is an optimisation; fall back to polling rather than failing the chat.
+            logger.warning(f"Run stream interrupted, falling back to polling: {str(e)}")
+            if run_id is None:
+                # The stream may have broken after the run was created but before we saw it;
+                # a second run would answer twice (or be refused while the first is active)
+                run = await get_latest_run(thread_id)
+                if run is not None and run.status in RESUMABLE_RUN_STATUSES:
+                    logger.info(f"Resuming run {run.id} ({run.status})")
+                else:
+                    run = await self.start_run(run_assistant, assistant_id, thread_id)
+                run_id = active.run_id = run.id
+            async for event in self.poll_events(thread_id, run_id):
+                yield event
+
+    async def poll_events(self, thread_id, run_id):
+        delay = POLL_INITIAL_DELAY
+        last_status = None
+        timer = RunTimer()
+        while True:
+            run = await get_run_status(thread_id, run_id)
+            timer.update(run.status)
+            if run.status != last_status:
+                delay = POLL_INITIAL_DELAY
+                last_status = run.status
+            if run.status == "completed":
+                response = await get_assistant_response(thread_id)
+                logger.info(f"Assistant response: {response}")
+                yield sse({'type': 'assistant_message', 'content': response})
+                break
+            elif run.status == "requires_action":
+                required_action = run.required_action
+                if required_action and required_action.type == "submit_tool_outputs":
+                    tool_outputs = []
+                    async for frame in self.run_tool_calls(required_action.submit_tool_outputs.tool_calls, tool_outputs):
+                        yield frame
+                    with STAGE_SECONDS.time(stage="submit_tool_outputs"):
+                        await submit_tool_outputs(thread_id, run.id, tool_outputs)
+                    timer.update("queued")
+                    logger.info(f"Submitted tool outputs for run {run.id}")
+                    last_status = None
+                else:
+                    logger.error(f"Unexpected required action: {required_action}")
+                    yield sse({'type': 'error', 'content': 'An unexpected action is required. Please try again.'})
+                    break
+            elif run.status in TERMINAL_ERROR_STATUSES:
+                error_message = f"Run failed with status: {run.status}"
+                if hasattr(run, 'last_error'):
+                    error_message += f", Error: {run.last_error}"
+                logger.error(error_message)
+                yield sse({'type': 'error', 'content': error_message})
+                break
+            elif run.status in ["queued", "in_progress", "cancelling"]:
+                await asyncio.sleep(delay)
+                delay = min(delay * POLL_BACKOFF, POLL_MAX_DELAY)
+            else:
+                logger.error(f"Unexpected run status: {run.status}")
+                yield sse({'type': 'error', 'content': 'An unexpected error occurred. Please try again.'})
+                break
+
+    async def run_tool_calls(self, tool_calls, tool_outputs):
+        semaphore = asyncio.Semaphore(self.tool_concurrency)
+
+        async def run_one(index, tool_call):
+            async with semaphore:
+                output = await self.execute_tool_call(tool_call)
+                # The model gets a digest within the tool's token budget, ordered as the call asked; the UI still gets the full output
+                config = self.tool_manager.get_compaction_config(tool_call.function.name)
+                model_output = await asyncio.to_thread(compact_output, output, config, call_args(tool_call))
+                return index, tool_call.function.name, output, model_output
+
+        def call_args(tool_call):
+            try:
+                return json.loads(tool_call.function.arguments)
+            except ValueError:
+                return None
+
+        started = time.perf_counter()
+        tasks = [asyncio.ensure_future(run_one(index, tool_call)) for index, tool_call in enumerate(tool_calls)]
+        outputs = [None] * len(tool_calls)
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, tool_name, output, model_output = await next_done
+                outputs[index] = {
+                    "tool_call_id": tool_calls[index].id,
+                    "output": model_output
+                }
+                # The args let the dashboard re-run the call later
+                yield sse({'type': 'tool_output', 'name': tool_name, 'args': call_args(tool_calls[index])},
+                          raw={'output': output_frame(output)})
+        finally:
+            for task in tasks:
+                task.cancel()
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage="tool_calls")
+        # The run expects the whole batch in one submission, in the order the calls were issued
+        tool_outputs.extend(outputs)
+
+    async def execute_tool_call(self, tool_call):
+        tool_name = tool_call.function.name
+        try:
+            args = json.loads(tool_call.function.arguments)
+            return await self.tool_manager.execute_tool(tool_name, args)
+        except ToolNotFoundError:
+            logger.error(f"Tool not found: {tool_name}")
+            return dumps_text({"error": "Tool not found"})
+        except Exception as e:
+            logger.error(f"Error executing tool {tool_name}: {str(e)}")
+            return dumps_text({"error": str(e)})
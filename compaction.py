@@ -0,0 +1,173 @@
+import os
+import logging
+from functools import partial
+import numpy as np
+from api_response_manager import api_response_manager
+from response_storage import split_rows, sort_rows
+from screening import order_column
+from serialization import dumps, dumps_text, loads
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOKEN_BUDGET = int(os.getenv("TOOL_OUTPUT_TOKEN_BUDGET", "1000"))
+DEFAULT_TOP_K = int(os.getenv("TOOL_OUTPUT_TOP_K", "5"))
+# Rough size of a token in JSON text; close enough to keep prompts within budget without a tokenizer
+BYTES_PER_TOKEN = 4
+MAX_AGGREGATE_COLUMNS = 8
+
+
+def estimate_tokens(data):
+    return len(data) // BYTES_PER_TOKEN + 1
+
+
+def rounded(value, digits=4):
+    if value is None or value != value:
+        return None
+    return float(f"{value:.{digits}g}")
+
+
+def chain_aggregates(chain):
+    """Totals and ranges the assistant would otherwise have to fetch rows for."""
+    aggregates = {
+        "contracts": len(chain),
+        "underlyings": sorted({value.decode("ascii") for value in np.unique(chain.underlying) if value}),
+    }
+    expiries = chain.expiry[~np.isnat(chain.expiry)]
+    if len(expiries):
+        aggregates["expiries"] = [str(expiries.min()), str(expiries.max())]
+        aggregates["strikes"] = [rounded(np.nanmin(chain.strike)), rounded(np.nanmax(chain.strike))]
+    for name in ("volume", "open_interest", "total_premium"):
+        if name in chain.columns and chain.columns[name].dtype.kind in "if":
+            total_name = name if name.startswith("total_") else f"total_{name}"
+            aggregates[total_name] = rounded(chain.total(name), 10)
+            aggregates[f"put_call_{name}_ratio"] = rounded(chain.put_call_ratio(name))
+    iv = chain.columns.get("implied_volatility")
+    if iv is not None and iv.dtype.kind == "f" and not np.isnan(iv).all():
+        aggregates["iv_range"] = [rounded(np.nanmin(iv)), rounded(np.nanmedian(iv)), rounded(np.nanmax(iv))]
+    spot = chain.estimate_spot()
+    if spot is not None:
+        aggregates["implied_spot"] = rounded(spot)
+    return aggregates
+
+
+def numeric(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def row_aggregates(rows):
+    aggregates = {"rows": len(rows)}
+    for name in list(rows[0].keys()):
+        values = [numeric(row.get(name)) for row in rows]
+        if any(value is None for value in values) or isinstance(rows[0].get(name), bool):
+            continue
+        aggregates[name] = {"sum": rounded(sum(values), 10), "min": rounded(min(values)), "max": rounded(max(values))}
+        if len(aggregates) > MAX_AGGREGATE_COLUMNS:
+            break
+    return aggregates
+
+
+def find_rows(payload):
+    """Like split_rows, but also finds rows under other keys (e.g. "chains" in contract history)."""
+    split = split_rows(payload)
+    if split is None and isinstance(payload, dict):
+        for key, value in payload.items():
+            if isinstance(value, list) and value and all(isinstance(row, dict) for row in value):
+                return key, value, {k: v for k, v in payload.items() if k != key}
+    return split
+
+
+def ordering(config, args):
+    """The sort key and direction for the top rows: the call's own order when it asked for one, else the config's."""
+    if args and args.get("order"):
+        return args["order"], args.get("order_direction", "desc") != "asc"
+    return config.get("sort_key"), True
+
+
+def chain_top(chain, sort_key, descending, columns, k):
+    fields = [name for name in columns if name in chain.columns or name in ("strike", "expiry")] if columns else None
+    if sort_key and sort_key not in chain.columns:
+        sort_key = order_column(sort_key)
+    if sort_key and (sort_key in chain.columns or sort_key in ("strike", "expiry")):
+        indices = chain.sort_indices(sort_key, descending=descending)[:k]
+    else:
+        indices = np.arange(min(k, len(chain)))
+    return chain.to_rows(indices, fields)
+
+
+def rows_top(rows, sort_key, descending, columns, k):
+    if sort_key and not any(sort_key in row for row in rows):
+        sort_key = order_column(sort_key)
+    if sort_key and any(sort_key in row for row in rows):
+        # Numbers by value, then text, then missing values, as /api/response pages are sorted
+        rows = sort_rows(rows, sort_key, descending)
+    top = rows[:k]
+    if columns:
+        fields = [name for name in columns if name in rows[0]] or list(rows[0])
+        top = [{name: row.get(name) for name in fields} for row in top]
+    return top
+
+
+def compact_output(output, config=None, args=None):
+    """What the model sees for a tool output, kept within the tool's token budget.
+
+    Outputs already within budget pass through. Large responses are replaced
+    by a digest: aggregates over every row, the top-k rows restricted to
+    ``columns``, and the response id so the full data stays reachable. k is
+    halved until the digest fits.
+
+    ``config`` is the tool's "compaction" entry in tools_config.json:
+    token_budget, top_k, sort_key and columns. ``args`` are the call's
+    arguments; when they carry ``order``/``order_direction`` the top rows
+    follow them, so the model sees the rows it asked for, and ``sort_key``
+    (descending) applies only when they don't.
+    """
+    config = config or {}
+    budget = config.get("token_budget", DEFAULT_TOKEN_BUDGET)
+    reference = None
+    try:
+        payload = loads(output)
+    except ValueError:
+        return output
+    if isinstance(payload, dict) and payload.get("type") == "large_response":
+        reference = payload
+    elif estimate_tokens(dumps(payload)) <= budget:
+        return output
+
+    top_k = config.get("top_k", DEFAULT_TOP_K)
+    sort_key, descending = ordering(config, args)
+    columns = config.get("columns")
+    digest = {"summary": reference["summary"]} if reference else {}
+    if reference:
+        digest["id"] = reference["id"]
+        chain = api_response_manager.get_chain(reference["id"])
+        if chain is not None and len(chain):
+            digest["columns"] = list(chain.columns)
+            digest["aggregates"] = chain_aggregates(chain)
+            top = partial(chain_top, chain, sort_key, descending, columns)
+        else:
+            payload = api_response_manager.get_response(reference["id"])
+    if "aggregates" not in digest:
+        split = find_rows(payload)
+        if split is None:
+            # Nothing row-shaped to summarise; the reference is all we can usefully send
+            return output if reference else dumps_text({"truncated": dumps(payload)[:budget * BYTES_PER_TOKEN].decode("utf-8", "ignore")})
+        rows = split[1]
+        digest["columns"] = list(rows[0])
+        digest["aggregates"] = row_aggregates(rows)
+        top = partial(rows_top, rows, sort_key, descending, columns)
+
+    k = top_k
+    while True:
+        digest.pop("top", None)
+        if k:
+            digest["top"] = {"sort_key": sort_key, "order_direction": "desc" if descending else "asc", "rows": top(k)}
+        encoded = dumps(digest)
+        if k == 0 or estimate_tokens(encoded) <= budget:
+            break
+        k //= 2
+    if estimate_tokens(encoded) > budget:
+        logger.warning(f"Compacted output still exceeds {budget} tokens ({estimate_tokens(encoded)})")
+    return dumps_text(digest)
@@ -0,0 +1,179 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+import logging
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE = os.getenv("COMPONENT_CACHE_FILE", "component_cache.json")
+MAX_ENTRIES = int(os.getenv("COMPONENT_CACHE_MAX_ENTRIES", "500"))
+TABLE_ROW_LIMIT = int(os.getenv("COMPONENT_TABLE_ROW_LIMIT", "50"))
+LATENCY_SAMPLES = 500
+
+# Words that don't change which component a query asks for
+STOPWORDS = {"a", "an", "the", "of", "for", "to", "in", "on", "by", "me", "show", "please", "with", "and", "display", "create", "make"}
+TOKEN_PATTERN = re.compile(r"[a-z0-9_]+")
+FENCE_PATTERN = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def normalize_query(query):
+    """Canonical form of a component query: lower-case, no filler words or plurals.
+
+    "Show me the NVDA call volume chart" and "nvda call volumes chart"
+    normalize to the same key. Word order is kept, since it carries meaning
+    ("call volume vs put open interest" is not "put volume vs call open interest").
+    """
+    tokens = []
+    for token in TOKEN_PATTERN.findall(query.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return " ".join(tokens)
+
+
+def spec_key(query, columns=None, model=""):
+    source = ",".join(sorted(columns or []))
+    digest = hashlib.sha256(f"{model}|{source}".encode("utf-8")).hexdigest()[:16]
+    return f"{normalize_query(query)}|{digest}"
+
+
+def parse_spec(content):
+    """Parse the model's JSON answer, tolerating a Markdown code fence around it."""
+    return json.loads(FENCE_PATTERN.sub("", content.strip()))
+
+
+def bind(spec, rows):
+    """Fill a component spec's data from fresh rows using its ``binding``.
+
+    Specs without a usable binding keep the data the model generated.
+    """
+    binding = spec.get("binding")
+    if not isinstance(binding, dict) or not rows:
+        return spec
+    columns = set(rows[0])
+    component = dict(spec)
+    if spec.get("type") == "chart" and binding.get("x") in columns:
+        y_fields = [field for field in binding.get("y") or [] if field in columns]
+        if y_fields:
+            component["data"] = [
+                {
+                    "type": binding.get("trace_type", "bar"),
+                    "name": field,
+                    "x": [row.get(binding["x"]) for row in rows],
+                    "y": [row.get(field) for row in rows],
+                }
+                for field in y_fields
+            ]
+    elif spec.get("type") == "table":
+        fields = [field for field in binding.get("columns") or [] if field in columns] or list(rows[0])
+        limit = binding.get("limit") or TABLE_ROW_LIMIT
+        component["data"] = [{field: row.get(field) for field in fields} for row in rows[:limit]]
+    elif spec.get("type") == "metric" and binding.get("field") in columns:
+        values = []
+        for row in rows:
+            try:
+                values.append(float(row.get(binding["field"])))
+            except (TypeError, ValueError):
+                pass
+        aggregate = binding.get("aggregate", "sum")
+        if aggregate == "count":
+            value = len(rows)
+        elif not values:
+            value = None
+        elif aggregate == "mean":
+            value = sum(values) / len(values)
+        elif aggregate == "max":
+            value = max(values)
+        elif aggregate == "min":
+            value = min(values)
+        else:
+            value = sum(values)
+        label = (spec.get("data") or {}).get("label") if isinstance(spec.get("data"), dict) else None
+        component["data"] = {"value": value, "label": binding.get("label") or label or binding["field"]}
+    return component
+
+
+class ComponentSpecCache:
+    """Persistent cache of generated component specs, keyed on normalized queries.
+
+    Specs are small (the data is re-bound on every request), so the whole
+    cache lives in one JSON file that is re-read before writing, like the
+    assistant registry, so several workers can share it.
+    """
+
+    def __init__(self, path=CACHE_FILE, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = self._load()
+        self.hits = 0
+        self.misses = 0
+        self.latencies = {"hit": deque(maxlen=LATENCY_SAMPLES), "miss": deque(maxlen=LATENCY_SAMPLES)}
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                # Another worker may have generated it since we loaded
+                self.entries = self._load()
+                entry = self.entries.get(key)
+            if entry is None:
+                return None
+            entry["used_at"] = time.time()
+            return entry["spec"]
+
+    def put(self, key, spec):
+        with self.lock:
+            self.entries = self._load()
+            self.entries[key] = {"spec": spec, "used_at": time.time()}
+            if len(self.entries) > self.max_entries:
+                for old_key in sorted(self.entries, key=lambda k: self.entries[k]["used_at"])[:len(self.entries) - self.max_entries]:
+                    del self.entries[old_key]
+            self._save()
+
+    def record(self, hit, seconds):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        self.latencies["hit" if hit else "miss"].append(seconds * 1000)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        latency = {}
+        for outcome, samples in self.latencies.items():
+            ordered = sorted(samples)
+            latency[outcome] = {
+                "count": len(ordered),
+                "mean_ms": sum(ordered) / len(ordered) if ordered else None,
+                "p95_ms": ordered[int(0.95 * (len(ordered) - 1))] if ordered else None,
+            }
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.entries),
+            "latency": latency,
+        }
+
+
+component_spec_cache = ComponentSpecCache()
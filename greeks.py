@@ -0,0 +1,239 @@
+import os
+import datetime
+import numpy as np
+from zoneinfo import ZoneInfo
+from compaction import rounded
+
+RISK_FREE_RATE = float(os.getenv("GREEKS_RISK_FREE_RATE", "0.04"))
+MARKET_TIMEZONE = ZoneInfo("America/New_York")
+# Contracts stop trading at 16:00 ET on their expiry date
+EXPIRY_CLOSE = np.timedelta64(16 * 3600, "s")
+SECONDS_PER_YEAR = 365 * 24 * 3600
+# Floor on time to expiry (one hour) so contracts expiring today keep finite Greeks
+MIN_YEARS = 1 / (365 * 24)
+CONTRACT_MULTIPLIER = 100
+IV_BOUNDS = (1e-4, 5.0)
+IV_ITERATIONS = 40
+SKEW_DELTA = 0.25
+SMILE_MONEYNESS = (0.9, 0.95, 1.0, 1.05, 1.1)
+SQRT_2PI = np.sqrt(2 * np.pi)
+
+
+def norm_pdf(x):
+    return np.exp(-0.5 * x * x) / SQRT_2PI
+
+
+def norm_cdf(x):
+    # Abramowitz & Stegun 26.2.17 (error < 7.5e-8); NumPy has no vectorized erf
+    t = 1 / (1 + 0.2316419 * np.abs(x))
+    poly = t * (0.319381530 + t * (-0.356563782 + t * (1.781477937 + t * (-1.821255978 + t * 1.330274429))))
+    upper = norm_pdf(x) * poly
+    return np.where(x >= 0, 1 - upper, upper)
+
+
+def market_now(now=None):
+    """``now`` (a naive datetime in ET) or the current time, to the second."""
+    return np.datetime64(now or datetime.datetime.now(MARKET_TIMEZONE).replace(tzinfo=None), "s")
+
+
+def years_to_expiry(expiry, now=None):
+    """Years from ``now`` to each expiry's close; NaN once expired."""
+    now = market_now(now)
+    seconds = (expiry.astype("datetime64[s]") + EXPIRY_CLOSE - now).astype(np.float64)
+    seconds[np.isnat(expiry)] = np.nan
+    with np.errstate(invalid="ignore"):
+        return np.where(seconds > 0, np.maximum(seconds / SECONDS_PER_YEAR, MIN_YEARS), np.nan)
+
+
+def _d1_d2(spot, strike, years, vol, rate, dividend):
+    sqrt_t = np.sqrt(years)
+    d1 = (np.log(spot / strike) + (rate - dividend + 0.5 * vol * vol) * years) / (vol * sqrt_t)
+    return d1, d1 - vol * sqrt_t, sqrt_t
+
+
+def price(is_call, spot, strike, years, vol, rate=RISK_FREE_RATE, dividend=0.0):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        d1, d2, _ = _d1_d2(spot, strike, years, vol, rate, dividend)
+        sign = np.where(is_call, 1.0, -1.0)
+        return sign * (spot * np.exp(-dividend * years) * norm_cdf(sign * d1)
+                       - strike * np.exp(-rate * years) * norm_cdf(sign * d2))
+
+
+def black_scholes(is_call, spot, strike, years, vol, rate=RISK_FREE_RATE, dividend=0.0):
+    """Price and Greeks for arrays of European options.
+
+    Vega and rho are per volatility/rate point (1%), theta per calendar day.
+    Entries with a non-positive volatility or time come out as NaN.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        d1, d2, sqrt_t = _d1_d2(spot, strike, years, vol, rate, dividend)
+        sign = np.where(is_call, 1.0, -1.0)
+        carry = np.exp(-dividend * years)
+        discount = np.exp(-rate * years)
+        cdf_d1 = norm_cdf(sign * d1)
+        cdf_d2 = norm_cdf(sign * d2)
+        pdf_d1 = norm_pdf(d1)
+        return {
+            "price": sign * (spot * carry * cdf_d1 - strike * discount * cdf_d2),
+            "delta": sign * carry * cdf_d1,
+            "gamma": carry * pdf_d1 / (spot * vol * sqrt_t),
+            "vega": spot * carry * pdf_d1 * sqrt_t / 100,
+            "theta": (-spot * carry * pdf_d1 * vol / (2 * sqrt_t)
+                      - sign * rate * strike * discount * cdf_d2
+                      + sign * dividend * spot * carry * cdf_d1) / 365,
+            "rho": sign * strike * years * discount * cdf_d2 / 100,
+        }
+
+
+def implied_volatility(option_price, is_call, spot, strike, years, rate=RISK_FREE_RATE, dividend=0.0,
+                       iterations=IV_ITERATIONS):
+    """Volatility that reprices each option, by bisection over every contract at once.
+
+    NaN where the price is outside what IV_BOUNDS can produce (e.g. below intrinsic value).
+    """
+    low = np.full(np.shape(option_price), IV_BOUNDS[0])
+    high = np.full(np.shape(option_price), IV_BOUNDS[1])
+    for _ in range(iterations):
+        middle = (low + high) / 2
+        above = price(is_call, spot, strike, years, middle, rate, dividend) > option_price
+        high = np.where(above, middle, high)
+        low = np.where(above, low, middle)
+    solvable = ((price(is_call, spot, strike, years, IV_BOUNDS[0], rate, dividend) <= option_price)
+                & (option_price <= price(is_call, spot, strike, years, IV_BOUNDS[1], rate, dividend)))
+    return np.where(solvable, (low + high) / 2, np.nan)
+
+
+def nearest(values, target, mask):
+    """Index of the entry of ``values`` closest to ``target`` among ``mask``, or None."""
+    candidates = np.flatnonzero(mask & ~np.isnan(values))
+    if not len(candidates):
+        return None
+    return candidates[np.argmin(np.abs(values[candidates] - target))]
+
+
+def expiry_profile(strike, is_call, iv, delta, mid, years, spot):
+    """ATM IV, smile, 25-delta skew and expected move for the contracts of one expiry."""
+    profile = {}
+    atm = nearest(strike, spot, np.ones(len(strike), dtype=bool))
+    atm_strike = strike[atm]
+    at_strike = strike == atm_strike
+    atm_iv = float(np.nanmean(iv[at_strike]))
+    profile["atm_strike"] = rounded(atm_strike)
+    profile["atm_iv"] = rounded(atm_iv)
+    # Out-of-the-money side of the curve: puts below the spot, calls above
+    otm = np.flatnonzero(np.where(is_call, strike >= spot, strike < spot) & ~np.isnan(iv))
+    if len(otm) > 1:
+        order = otm[np.argsort(strike[otm], kind="stable")]
+        levels = spot * np.array(SMILE_MONEYNESS)
+        smile = np.interp(levels, strike[order], iv[order], left=np.nan, right=np.nan)
+        profile["smile"] = {f"{moneyness:g}": rounded(value) for moneyness, value in zip(SMILE_MONEYNESS, smile)}
+    call = nearest(delta, SKEW_DELTA, is_call)
+    put = nearest(delta, -SKEW_DELTA, ~is_call)
+    if call is not None and put is not None:
+        profile["call_25d_iv"] = rounded(iv[call])
+        profile["put_25d_iv"] = rounded(iv[put])
+        profile["risk_reversal"] = rounded(iv[call] - iv[put])
+        if atm_iv == atm_iv:
+            profile["butterfly"] = rounded((iv[call] + iv[put]) / 2 - atm_iv)
+    straddle = mid[at_strike & is_call][:1].tolist() + mid[at_strike & ~is_call][:1].tolist()
+    if len(straddle) == 2 and not np.isnan(straddle).any():
+        profile["straddle"] = rounded(sum(straddle))
+    if atm_iv == atm_iv:
+        move = spot * atm_iv * np.sqrt(years)
+        profile["expected_move"] = rounded(move)
+        profile["expected_move_pct"] = rounded(100 * move / spot)
+    return profile
+
+
+def side_totals(chain, name, mask):
+    if name not in chain.columns or chain.columns[name].dtype.kind not in "if":
+        return None
+    calls = chain.total(name, mask & chain.is_call)
+    puts = chain.total(name, mask & ~chain.is_call)
+    return {"calls": rounded(calls, 6), "puts": rounded(puts, 6), "put_call_ratio": rounded(puts / calls) if calls else None}
+
+
+def analyze(chain, spot, now=None, rate=RISK_FREE_RATE, dividend=0.0, expiry=None, max_dte=None,
+            max_expiries=8, top_strikes=10, top_contracts=5):
+    """Greeks and chain-level analytics for one underlying, as a compact dict.
+
+    IVs come from the chain's implied_volatility column; contracts without one
+    are solved from their mid price. Gamma exposure assumes dealers are long
+    calls and short puts, in dollars per 1% move of the underlying.
+    """
+    now = market_now(now)
+    years = years_to_expiry(chain.expiry, now)
+    dte = (chain.expiry - now.astype("datetime64[D]")).astype(np.int64)
+    mask = ~np.isnan(years) & ~np.isnan(chain.strike)
+    if expiry is not None:
+        mask &= chain.expiry == np.datetime64(expiry, "D")
+    if max_dte is not None:
+        mask &= dte <= max_dte
+    mid = chain.mid_prices()
+    iv = chain.columns.get("implied_volatility")
+    iv = iv.copy() if iv is not None and iv.dtype == np.float64 else np.full(len(chain), np.nan)
+    unquoted = mask & ~(iv > 0) & (mid > 0)
+    if unquoted.any():
+        iv[unquoted] = implied_volatility(mid[unquoted], chain.is_call[unquoted], spot, chain.strike[unquoted],
+                                          years[unquoted], rate, dividend)
+    mask &= iv > 0
+    indices = np.flatnonzero(mask)
+    result = {"spot": rounded(spot, 6), "as_of": str(now), "rate": rate, "contracts": len(indices), "iv_solved": int((unquoted & mask).sum()),
+              "skipped": len(chain) - len(indices)}
+    if not len(indices):
+        return result
+
+    is_call = chain.is_call[indices]
+    strike = chain.strike[indices]
+    greeks = black_scholes(is_call, spot, strike, years[indices], iv[indices], rate, dividend)
+    open_interest = chain.columns.get("open_interest")
+    open_interest = (open_interest[indices].astype(np.float64) if open_interest is not None and open_interest.dtype.kind in "if"
+                     else np.zeros(len(indices)))
+    open_interest = np.nan_to_num(open_interest)
+
+    aggregates = {name: side_totals(chain, name, mask) for name in ("volume", "open_interest", "total_premium")}
+    aggregates = {name: totals for name, totals in aggregates.items() if totals is not None}
+    exposure = CONTRACT_MULTIPLIER * open_interest
+    aggregates["delta_notional"] = {
+        "calls": rounded(float(np.nansum((greeks["delta"] * exposure * spot)[is_call])), 6),
+        "puts": rounded(float(np.nansum((greeks["delta"] * exposure * spot)[~is_call])), 6),
+    }
+    aggregates["vega_exposure"] = rounded(float(np.nansum(greeks["vega"] * exposure)), 6)
+    result["aggregates"] = aggregates
+
+    expiries, group = np.unique(chain.expiry[indices], return_inverse=True)
+    profiles = []
+    for position, expiry_date in enumerate(expiries[:max_expiries]):
+        members = group == position
+        profile = {"expiry": str(expiry_date), "dte": int(dte[indices][members][0]), "contracts": int(members.sum())}
+        profile.update(expiry_profile(strike[members], is_call[members], iv[indices][members], greeks["delta"][members],
+                                      mid[indices][members], years[indices][members][0], spot))
+        profiles.append(profile)
+    result["expiries"] = profiles
+    if len(expiries) > max_expiries:
+        result["more_expiries"] = len(expiries) - max_expiries
+
+    # Dollar gamma per 1% move, signed by who is assumed to hold it, summed per strike
+    gex = greeks["gamma"] * exposure * spot * spot * 0.01 * np.where(is_call, 1.0, -1.0)
+    gex = np.nan_to_num(gex)
+    strikes, by_strike = np.unique(strike, return_inverse=True)
+    net = np.bincount(by_strike, weights=gex, minlength=len(strikes))
+    calls = np.bincount(by_strike, weights=np.where(is_call, gex, 0.0), minlength=len(strikes))
+    puts = net - calls
+    top = np.argsort(-np.abs(net), kind="stable")[:top_strikes]
+    result["gamma_exposure"] = {
+        "net": rounded(float(net.sum()), 6),
+        "call_wall": rounded(strikes[np.argmax(calls)]) if calls.max() > 0 else None,
+        "put_wall": rounded(strikes[np.argmin(puts)]) if puts.min() < 0 else None,
+        "by_strike": [{"strike": rounded(strikes[i]), "net": rounded(net[i], 6)} for i in sorted(top, key=lambda i: strikes[i])],
+    }
+
+    if top_contracts and "volume" in chain.columns:
+        busiest = np.argsort(-chain.columns["volume"][indices], kind="stable")[:top_contracts]
+        symbols = chain.columns["option_symbol"][indices][busiest].tolist()
+        result["top_contracts"] = [{
+            "option_symbol": symbol.decode("ascii"),
+            "iv": rounded(iv[indices][i]),
+            **{name: rounded(greeks[name][i]) for name in ("delta", "gamma", "theta", "vega")},
+        } for symbol, i in zip(symbols, busiest.tolist())]
+    return result
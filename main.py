@@ -1,20 +1,37 @@
 import os
+import time
+import uuid
 import asyncio
 import logging
 import json
 from dotenv import load_dotenv
-from fastapi import FastAPI, Request, Form, HTTPException, status
+from typing import Optional, List, Dict, Any
+from pydantic import BaseModel
+from fastapi import FastAPI, Request, Form, HTTPException, Query, status
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, StreamingResponse, JSONResponse
+from fastapi.responses import HTMLResponse, StreamingResponse, JSONResponse, Response, PlainTextResponse
+from starlette.concurrency import run_in_threadpool, iterate_in_threadpool
 from starlette.middleware.sessions import SessionMiddleware
-from assistants import (
-    create_assistant, create_thread, create_message, 
-    run_assistant, get_run_status, get_assistant_response, submit_tool_outputs)
-
-from tool_manager import ToolManager
+from starlette.background import BackgroundTask
+from assistants import create_thread, create_message, close_client
+from assistant_registry import assistant_registry
+from chat_runner import ChatRunner
+
+from tool_manager import ToolManager, ToolNotFoundError
+from tool_cache import tool_cache
+from tool_sandbox import tool_sandbox
 from error_handlers import AppException, app_exception_handler, validation_exception_handler, general_exception_handler
 from api_response_manager import api_response_manager
+from serialization import output_frame
+from batch_refresh import refresh_batch, BATCH_MAX_CALLS
+from subscriptions import SubscriptionHub
+from component_specs import component_spec_cache, bind
+from response_storage import split_rows
+from tool_plugins.unusual_whales_client import unusual_whales_client
+from cache_warmer import CacheWarmer
+from run_control import admission_controller, AdmissionRejected, supervise
+from metrics import registry, STAGE_SECONDS, CONTENT_TYPE, TRACE_ID_HEADER, new_trace_id, traced_stream
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -41,6 +58,32 @@ templates = Jinja2Templates(directory="templates")
 
 # Initialize ToolManager
 tool_manager = ToolManager()
+chat_runner = ChatRunner(tool_manager, assistant_registry=assistant_registry)
+subscription_hub = SubscriptionHub(tool_manager)
+cache_warmer = CacheWarmer(tool_manager)
+
+registry_watcher = None
+warm_scheduler = None
+
+@app.on_event("startup")
+async def startup():
+    global registry_watcher, warm_scheduler
+    # Tools created through any worker (or node sharing the registry) show up here too
+    registry_watcher = asyncio.ensure_future(tool_manager.watch_registry(on_change=sync_assistant))
+    # Prefetch the watchlist so the first chats of the day don't wait on a cold upstream fetch
+    warm_scheduler = asyncio.ensure_future(cache_warmer.run())
+
+@app.on_event("shutdown")
+async def shutdown():
+    for task in (registry_watcher, warm_scheduler, cache_warmer.current):
+        if task is not None:
+            task.cancel()
+    await subscription_hub.close()
+    await close_client()
+    await unusual_whales_client.aclose()
+    tool_sandbox.close()
+    tool_manager.registry.close()
+    api_response_manager.close()
 
 @app.get("/", response_class=HTMLResponse)
 async def chat_page(request: Request):
@@ -55,113 +98,71 @@ async def tools_page(request: Request):
 
 @app.post("/chat")
 async def chat(request: Request, message: str = Form(...)):
-    logging.info(f"Received chat message: {message}")
+    started = time.perf_counter()
+    trace_id = new_trace_id(request.headers.get(TRACE_ID_HEADER))
+    logging.info(f"[{trace_id}] Received chat message: {message}")
+    session_key = request.session.setdefault("session_id", uuid.uuid4().hex)
+    try:
+        ticket = await admission_controller.acquire(session_key)
+    except AdmissionRejected as e:
+        logging.warning(f"[{trace_id}] Chat not admitted: {e.detail}")
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers={"Retry-After": str(int(e.retry_after))})
     try:
-        # Get or create assistant and thread
-        assistant_id = request.session.get("assistant_id")
+        # Reuse the assistant registered for the current tool set; get or create the thread
+        with STAGE_SECONDS.time(stage="assistant_lookup"):
+            assistant_id = await assistant_registry.get_assistant_id(tool_manager.get_available_tools())
         thread_id = request.session.get("thread_id")
         
-        logging.info(f"Assistant ID: {assistant_id}, Thread ID: {thread_id}")
-
-        if not assistant_id:
-            tools = tool_manager.get_available_tools()
-            assistant = create_assistant(tools)
-            request.session["assistant_id"] = assistant.id
-            assistant_id = assistant.id
-            logging.info(f"Created new assistant: {assistant_id}")
-        
+        logging.info(f"[{trace_id}] Assistant ID: {assistant_id}, Thread ID: {thread_id}")
+
         if not thread_id:
-            thread = create_thread()
+            with STAGE_SECONDS.time(stage="thread_create"):
+                thread = await create_thread()
             request.session["thread_id"] = thread.id
             thread_id = thread.id
-            logging.info(f"Created new thread: {thread_id}")
-
-        create_message(thread_id, message)
-        logging.info(f"Created message in thread {thread_id}")
-
-        async def event_generator():
-            run = run_assistant(assistant_id, thread_id)
-            logging.info(f"Started run: {run.id}")
-            while True:
-                run = get_run_status(thread_id, run.id)
-                logging.info(f"Run status: {run.status}")
-                if run.status == "completed":
-                    response = get_assistant_response(thread_id)
-                    logging.info(f"Assistant response: {response}")
-                    yield f"data: {json.dumps({'type': 'assistant_message', 'content': response})}\n\n"
-                    break
-                elif run.status == "requires_action":
-                    required_action = run.required_action
-                    if required_action and required_action.type == "submit_tool_outputs":
-                        tool_calls = required_action.submit_tool_outputs.tool_calls
-                        tool_outputs = []
-                        for tool_call in tool_calls:
-                            tool_name = tool_call.function.name
-                            tool = tool_manager.get_tool(tool_name)
-                            if tool:
-                                try:
-                                    args = json.loads(tool_call.function.arguments)
-                                    result = tool.execute(**args)
-                                    tool_outputs.append({
-                                        "tool_call_id": tool_call.id,
-                                        "output": result
-                                    })
-                                    yield f"data: {json.dumps({'type': 'tool_output', 'name': tool_name, 'output': json.loads(result)})}\n\n"
-                                except Exception as e:
-                                    logging.error(f"Error executing tool {tool_name}: {str(e)}")
-                                    error_output = json.dumps({"error": str(e)})
-                                    tool_outputs.append({
-                                        "tool_call_id": tool_call.id,
-                                        "output": error_output
-                                    })
-                                    yield f"data: {json.dumps({'type': 'tool_output', 'name': tool_name, 'output': json.loads(error_output)})}\n\n"
-                            else:
-                                logging.error(f"Tool not found: {tool_name}")
-                                error_output = json.dumps({"error": "Tool not found"})
-                                tool_outputs.append({
-                                    "tool_call_id": tool_call.id,
-                                    "output": error_output
-                                })
-                                yield f"data: {json.dumps({'type': 'tool_output', 'name': tool_name, 'output': json.loads(error_output)})}\n\n"
-                        
-                        submit_tool_outputs(thread_id, run.id, tool_outputs)
-                        logging.info(f"Submitted tool outputs for run {run.id}")
-                    
-                    else:
-                        logging.error(f"Unexpected required action: {required_action}")
-                        yield f"data: {json.dumps({'type': 'error', 'content': 'An unexpected action is required. Please try again.'})}\n\n"
-                        break
-                elif run.status in ["failed", "expired", "cancelled"]:
-                    error_message = f"Run failed with status: {run.status}"
-                    if hasattr(run, 'last_error'):
-                        error_message += f", Error: {run.last_error}"
-                    logging.error(error_message)
-                    yield f"data: {json.dumps({'type': 'error', 'content': error_message})}\n\n"
-                    break
-                elif run.status in ["queued", "in_progress"]:
-                    await asyncio.sleep(1)
-                else:
-                    logging.error(f"Unexpected run status: {run.status}")
-                    yield f"data: {json.dumps({'type': 'error', 'content': 'An unexpected error occurred. Please try again.'})}\n\n"
-                    break
-
-
-        return StreamingResponse(event_generator(), media_type="text/event-stream")
+            logging.info(f"[{trace_id}] Created new thread: {thread_id}")
+
+        with STAGE_SECONDS.time(stage="message_create"):
+            await create_message(thread_id, message)
+        logging.info(f"[{trace_id}] Created message in thread {thread_id}")
+
+        # Stops the run if the client goes away; the background task covers a stream that never started
+        events = traced_stream(supervise(request, chat_runner.events(assistant_id, thread_id), ticket), trace_id, started)
+        return StreamingResponse(events, media_type="text/event-stream", headers={TRACE_ID_HEADER: trace_id},
+                                 background=BackgroundTask(ticket.release))
     except Exception as e:
-        logging.error(f"Error in chat endpoint: {str(e)}")
+        ticket.release()
+        logging.error(f"[{trace_id}] Error in chat endpoint: {str(e)}")
         raise AppException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An error occurred during the chat process.")
 
 
+@app.get("/metrics")
+async def prometheus_metrics():
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
+
+
+async def sync_assistant():
+    # Push the new schema set to the shared assistant now rather than on the next chat
+    try:
+        await assistant_registry.get_assistant_id(tool_manager.get_available_tools())
+    except Exception as e:
+        logger.error(f"Error syncing assistant tools: {str(e)}")
+
+
 @app.get("/api/tools")
 async def get_tools():
     try:
         tools = tool_manager.get_all_tools()
         logger.info(f"Retrieved tools: {list(tools.keys())}")
-        return JSONResponse(content={name: tool.__class__.__name__ for name, tool in tools.items()})
+        return JSONResponse(content={name: tool_manager.get_tool_class_name(name) for name in tools})
     except Exception as e:
         logger.error(f"Error getting tools: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/tool_status")
+async def get_tool_status():
+    return JSONResponse(content=tool_manager.get_load_report())
+
 @app.get("/api/tools/{tool_name}")
 async def get_tool(tool_name: str):
     tool_code = tool_manager.get_tool_code(tool_name)
@@ -172,26 +173,48 @@ async def get_tool(tool_name: str):
 @app.put("/api/tools/{tool_name}")
 async def update_tool(tool_name: str, code: str = Form(...)):
     try:
-        tool_manager.update_tool(tool_name, code)
-        return JSONResponse(content={"message": "Tool updated successfully"})
+        # Sandboxed tools are described by a worker process; don't block the loop on it
+        await run_in_threadpool(tool_manager.update_tool, tool_name, code)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    await sync_assistant()
+    return JSONResponse(content={"message": "Tool updated successfully"})
 
 @app.post("/api/tools")
 async def create_tool(name: str = Form(...), code: str = Form(...)):
     try:
-        tool_manager.create_tool(name, code)
-        return JSONResponse(content={"message": "Tool created successfully"})
+        await run_in_threadpool(tool_manager.create_tool, name, code)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    await sync_assistant()
+    return JSONResponse(content={"message": "Tool created successfully"})
 
 
 @app.get("/api/response/{response_id}")
-async def get_api_response(response_id: str):
-    response = api_response_manager.get_response(response_id)
-    if response is None:
+async def get_api_response(response_id: str, offset: int = Query(0, ge=0), limit: Optional[int] = Query(None, ge=1),
+                           fields: Optional[str] = None, sort: Optional[str] = None,
+                           order: str = "asc", stream: bool = False):
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+    if stream:
+        chunks = await run_in_threadpool(api_response_manager.iter_response, response_id)
+        if chunks is None:
+            raise HTTPException(status_code=404, detail="Response not found")
+        return StreamingResponse(iterate_in_threadpool(chunks), media_type="application/json")
+
+    if limit is None and not offset and fields is None and sort is None:
+        data = await run_in_threadpool(api_response_manager.get_response_bytes, response_id)
+    else:
+        field_list = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+        try:
+            data = await run_in_threadpool(
+                api_response_manager.get_response_page, response_id, offset, limit,
+                field_list, sort, order == "desc")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    if data is None:
         raise HTTPException(status_code=404, detail="Response not found")
-    return JSONResponse(content=response)
+    return Response(content=data, media_type="application/json")
 
 
 @app.get("/dashboard", response_class=HTMLResponse)
@@ -199,34 +222,104 @@ async def dashboard_page(request: Request):
     return templates.TemplateResponse("dashboard.html", {"request": request})
 
 @app.post("/generate_dashboard_component")
-async def generate_component(request: Request, query: str = Form(...)):
+async def generate_component(request: Request, query: str = Form(...),
+                             tool_name: Optional[str] = Form(None), args: Optional[str] = Form(None)):
     try:
         tool = tool_manager.get_tool("dashboard_component_generator")
         if tool:
-            result = tool.execute(query=query)
-            # Return the raw component data
-            return JSONResponse(content=json.loads(result))
+            rows = []
+            if tool_name:
+                # The widget's own data: bound into the spec so cached specs still show fresh numbers
+                output = await tool_manager.execute_tool(tool_name, json.loads(args or "{}"))
+                split = split_rows(await run_in_threadpool(api_response_manager.resolve, output))
+                rows = split[1] if split else []
+            columns = list(rows[0].keys()) if rows else None
+            result = await tool.aexecute(query=query, columns=columns)
+            spec = await run_in_threadpool(api_response_manager.resolve, result)
+            return JSONResponse(content=bind(spec, rows))
         else:
             raise HTTPException(status_code=404, detail="Dashboard component generator tool not found")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error generating dashboard component: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/dashboard_components/stats")
+async def get_component_stats():
+    return JSONResponse(content=component_spec_cache.stats())
+
+
 @app.post("/refresh_api_call")
 async def refresh_api_call(request: Request, tool_name: str = Form(...), args: str = Form(...)):
     try:
-        tool = tool_manager.get_tool(tool_name)
-        if tool:
-            arguments = json.loads(args)
-            result = tool.execute(**arguments)
-            return JSONResponse(content=json.loads(result))
-        else:
-            raise HTTPException(status_code=404, detail="Tool not found")
+        arguments = json.loads(args)
+        result = await tool_manager.execute_tool(tool_name, arguments)
+        return Response(content=output_frame(result), media_type="application/json")
+    except ToolNotFoundError:
+        raise HTTPException(status_code=404, detail="Tool not found")
     except Exception as e:
         logger.error(f"Error refreshing API call: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+
+class ToolCall(BaseModel):
+    tool_name: str
+    args: Dict[str, Any] = {}
+
+
+class RefreshBatch(BaseModel):
+    calls: List[ToolCall]
+
+
+@app.post("/api/refresh_batch")
+async def refresh_api_calls(batch: RefreshBatch):
+    if len(batch.calls) > BATCH_MAX_CALLS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_CALLS} calls per batch")
+    calls = [(call.tool_name, call.args) for call in batch.calls]
+    # One NDJSON line per distinct call, as each one finishes
+    return StreamingResponse(refresh_batch(tool_manager, calls), media_type="application/x-ndjson")
+
+
+@app.get("/api/subscribe")
+async def subscribe(tool_name: str, args: str = "{}"):
+    if tool_manager.get_tool(tool_name) is None:
+        raise HTTPException(status_code=404, detail="Tool not found")
+    try:
+        arguments = json.loads(args)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="args must be a JSON object")
+    if not isinstance(arguments, dict):
+        raise HTTPException(status_code=400, detail="args must be a JSON object")
+    # Every subscriber to the same call shares one upstream poller
+    return StreamingResponse(subscription_hub.subscribe(tool_name, arguments), media_type="text/event-stream")
+
+
+@app.get("/api/subscriptions")
+async def get_subscriptions():
+    return JSONResponse(content=subscription_hub.stats())
+
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    return JSONResponse(content=tool_cache.stats())
+
+@app.get("/api/cache/freshness")
+async def get_cache_freshness():
+    return JSONResponse(content=cache_warmer.report())
+
+@app.post("/api/cache/warm")
+async def warm_cache():
+    if not cache_warmer.watchlist:
+        raise HTTPException(status_code=400, detail="No watchlist configured (WARM_WATCHLIST)")
+    await cache_warmer.warm()
+    return JSONResponse(content=cache_warmer.report())
+
+@app.get("/api/runs/stats")
+async def get_run_stats():
+    return JSONResponse(content=admission_controller.stats())
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,194 @@
+import os
+import re
+import time
+import uuid
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Upper bounds in seconds; wide enough for both cache hits and slow assistant runs
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+METRICS_PREFIX = os.getenv("METRICS_PREFIX", "unusual_chats")
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+TRACE_ID_HEADER = "X-Trace-Id"
+TRACE_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names, values, extra=()):
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{escape(value)}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = f"{METRICS_PREFIX}_{name}"
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.series = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            series = sorted(self.series.items())
+            lines.extend(line for key, value in series for line in self._samples(key, value))
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.series[key] = self.series.get(key, 0) + amount
+
+    def _samples(self, key, value):
+        yield f"{self.name}_total{format_labels(self.labelnames, key)} {format_value(value)}"
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.series[key] = value
+
+    def _samples(self, key, value):
+        yield f"{self.name}{format_labels(self.labelnames, key)} {format_value(value)}"
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            counts = self.series.get(key)
+            if counts is None:
+                # Per-bucket counts, then an overflow slot, then the sum
+                counts = self.series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of the block; works around awaits as well."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self, key, counts):
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            labels = format_labels(self.labelnames, key, [("le", format_value(bound))])
+            yield f"{self.name}_bucket{labels} {cumulative}"
+        labels = format_labels(self.labelnames, key)
+        yield f"{self.name}_sum{labels} {format_value(counts[-1])}"
+        yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = [line for metric in self.metrics for line in metric.render()]
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.register(Histogram(
+    "stage_seconds", "Time spent in each stage of a chat request.", ["stage"]))
+TOOL_SECONDS = registry.register(Histogram(
+    "tool_execute_seconds", "Tool execution time, excluding cache hits.", ["tool"]))
+TOOL_CALLS = registry.register(Counter(
+    "tool_calls", "Tool calls by outcome.", ["tool", "outcome"]))
+UPSTREAM_SECONDS = registry.register(Histogram(
+    "upstream_request_seconds", "Unusual Whales HTTP request time per attempt.", ["endpoint", "status"]))
+RESPONSE_STORE_SECONDS = registry.register(Histogram(
+    "response_store_seconds", "Response store operation time.", ["operation"]))
+SSE_FIRST_BYTE_SECONDS = registry.register(Histogram(
+    "sse_first_byte_seconds", "Time from receiving a chat message to the first SSE frame.", ["endpoint"]))
+CHAT_REQUESTS = registry.register(Counter(
+    "chat_requests", "Chat requests by outcome.", ["outcome"]))
+ACTIVE_RUNS = registry.register(Gauge(
+    "active_runs", "Chats admitted and still streaming in this worker."))
+QUEUED_RUNS = registry.register(Gauge(
+    "queued_runs", "Chats waiting for admission in this worker."))
+ADMISSION_REJECTED = registry.register(Counter(
+    "admission_rejected", "Chats turned away by admission control.", ["reason"]))
+RUNS_CANCELLED = registry.register(Counter(
+    "runs_cancelled", "Assistant runs cancelled before they finished.", ["reason"]))
+WARM_TICKERS = registry.register(Counter(
+    "cache_warm_tickers", "Watchlist tickers warmed by outcome.", ["outcome"]))
+WARM_TIMESTAMP = registry.register(Gauge(
+    "cache_warm_last_success_timestamp_seconds", "When each watchlist ticker was last warmed.", ["ticker"]))
+
+# Ticker and contract path segments would give every symbol its own series
+ENDPOINT_ID_PATTERN = re.compile(r"/(?=[^/]*[A-Z0-9])[A-Z0-9._-]+(?=/|$)")
+
+
+def endpoint_label(path):
+    """"/api/stock/NVDA/option-contracts" -> "/api/stock/{id}/option-contracts"."""
+    return ENDPOINT_ID_PATTERN.sub("/{id}", "/" + path.lstrip("/"))
+
+
+def new_trace_id(requested=None):
+    """Reuse a well-formed incoming trace id so logs line up across services."""
+    if requested and TRACE_ID_PATTERN.match(requested):
+        return requested
+    return uuid.uuid4().hex[:16]
+
+
+async def traced_stream(frames, trace_id, started, endpoint="chat"):
+    """Stamp every SSE frame with the trace id and record time to first byte."""
+    stamp = f'data: {{"trace_id":"{trace_id}",'.encode("ascii")
+    first = True
+    outcome = "ok"
+    try:
+        async for frame in frames:
+            if first:
+                SSE_FIRST_BYTE_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint)
+                first = False
+            if b'"error"' in frame[:48]:
+                outcome = "error"
+            yield frame.replace(b"data: {", stamp, 1)
+    except BaseException:
+        outcome = "aborted"
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage=f"{endpoint}_total")
+        CHAT_REQUESTS.inc(outcome=outcome)
@@ -0,0 +1,247 @@
+import re
+import json
+import struct
+import numpy as np
+
+OPTION_SYMBOL_PATTERN = re.compile(r"^(?P<underlying>[A-Z.]{1,6}?)(?P<expiry>\d{6})(?P<type>[CP])(?P<strike>\d{8})$")
+SYMBOL_COLUMN = "option_symbol"
+FORMAT_MAGIC = b"OCHN1"
+
+
+def _column_array(values):
+    """Pick the narrowest useful dtype for one column of API values."""
+    if all(isinstance(value, bool) for value in values):
+        return np.array(values, dtype=np.bool_)
+    if all(isinstance(value, int) and not isinstance(value, bool) for value in values):
+        return np.array(values, dtype=np.int64)
+    try:
+        # Unusual Whales sends prices, IVs and premiums as decimal strings
+        return np.array([np.nan if value is None else float(value) for value in values], dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.array(["" if value is None else str(value) for value in values], dtype=np.str_).astype(np.bytes_)
+
+
+def _missing(values):
+    """Where a column has no value: NaN numbers, NaT dates and empty text (how None is stored)."""
+    if values.dtype.kind == "f":
+        return np.isnan(values)
+    if values.dtype.kind == "M":
+        return np.isnat(values)
+    if values.dtype.kind in "SU":
+        return np.char.str_len(values) == 0
+    return np.zeros(len(values), dtype=np.bool_)
+
+
+class OptionChain:
+    """Columnar, typed option chain.
+
+    Every API column becomes one NumPy array (ints, floats, or fixed-width
+    bytes for text), and the option symbol is parsed once into underlying,
+    expiry, call/put and strike columns so filters and aggregations are
+    vectorized. ``extra`` keeps any non-row keys of the original payload.
+    """
+
+    def __init__(self, columns, extra=None, parsed=None):
+        self.columns = columns
+        self.extra = extra or {}
+        if parsed is None:
+            self._parse_symbols()
+        else:
+            self.underlying, self.expiry, self.is_call, self.strike = parsed
+
+    def __len__(self):
+        return len(self.columns[SYMBOL_COLUMN])
+
+    @classmethod
+    def from_rows(cls, rows, extra=None):
+        if not rows or SYMBOL_COLUMN not in rows[0]:
+            raise ValueError("Rows do not describe option contracts")
+        names = list(rows[0].keys())
+        for row in rows:
+            for name in row:
+                if name not in names:
+                    names.append(name)
+        columns = {name: _column_array([row.get(name) for row in rows]) for name in names}
+        return cls(columns, extra)
+
+    @classmethod
+    def from_payload(cls, payload):
+        if isinstance(payload, list):
+            return cls.from_rows(payload)
+        if isinstance(payload, dict) and isinstance(payload.get("data"), list):
+            return cls.from_rows(payload["data"], {k: v for k, v in payload.items() if k != "data"})
+        raise ValueError("Payload is not an option chain")
+
+    def _parse_symbols(self):
+        matches = [OPTION_SYMBOL_PATTERN.match(symbol.decode("ascii", "replace"))
+                   for symbol in self.columns[SYMBOL_COLUMN].tolist()]
+        parts = [match.groups() if match else ("", None, "", None) for match in matches]
+        self.underlying = np.array([underlying for underlying, _, _, _ in parts], dtype="S6")
+        self.expiry = np.array([f"20{expiry[:2]}-{expiry[2:4]}-{expiry[4:]}" if expiry else "NaT"
+                                for _, expiry, _, _ in parts], dtype="datetime64[D]")
+        self.is_call = np.array([option_type == "C" for _, _, option_type, _ in parts], dtype=np.bool_)
+        self.strike = np.array([int(strike) / 1000.0 if strike else np.nan for _, _, _, strike in parts])
+
+    def _parsed(self, indices=None):
+        parsed = (self.underlying, self.expiry, self.is_call, self.strike)
+        if indices is None:
+            return parsed
+        return tuple(values[indices] for values in parsed)
+
+    @property
+    def nbytes(self):
+        derived = self.underlying.nbytes + self.expiry.nbytes + self.is_call.nbytes + self.strike.nbytes
+        return sum(column.nbytes for column in self.columns.values()) + derived
+
+    def column(self, name):
+        if name == "underlying":
+            return self.underlying
+        if name == "expiry":
+            return self.expiry
+        if name == "is_call":
+            return self.is_call
+        if name == "strike":
+            return self.strike
+        return self.columns[name]
+
+    @classmethod
+    def concat(cls, chains):
+        # Keep the columns every chain has with a compatible type (text stays text, numbers stay numbers)
+        first = chains[0].columns
+        names = [name for name in first
+                 if all(name in chain.columns and chain.columns[name].dtype.kind == first[name].dtype.kind for chain in chains)]
+        parsed = tuple(np.concatenate(values) for values in zip(*(chain._parsed() for chain in chains)))
+        return cls({name: np.concatenate([chain.columns[name] for chain in chains]) for name in names}, parsed=parsed)
+
+    def with_columns(self, **columns):
+        return OptionChain({**self.columns, **columns}, self.extra, self._parsed())
+
+    def mid_prices(self):
+        bid = self.columns.get("nbbo_bid")
+        ask = self.columns.get("nbbo_ask")
+        last = self.columns.get("last_price", np.full(len(self), np.nan))
+        if bid is None or ask is None or bid.dtype != np.float64 or ask.dtype != np.float64:
+            return last
+        quoted = (bid > 0) & (ask > 0)
+        return np.where(quoted, (bid + ask) / 2, last)
+
+    def estimate_spot(self, pairs=5):
+        """Underlying price implied by put-call parity, S ~ K + C - P.
+
+        Uses the call/put pairs closest to at-the-money (smallest |C - P|)
+        and ignores carry, which is small next to the bid/ask spread for
+        the near-dated strikes that dominate these chains. Returns None when
+        the chain has no matching call/put quotes.
+        """
+        mid = self.mid_prices()
+        valid = ~np.isnat(self.expiry) & ~np.isnan(mid)
+        keys = self.expiry.astype(np.int64) * 10 ** 9 + np.round(self.strike * 1000).astype(np.int64)
+        calls = np.flatnonzero(valid & self.is_call)
+        puts = np.flatnonzero(valid & ~self.is_call)
+        if not len(calls) or not len(puts):
+            return None
+        calls = calls[np.argsort(keys[calls], kind="stable")]
+        positions = np.searchsorted(keys[calls], keys[puts])
+        positions = np.minimum(positions, len(calls) - 1)
+        matched = keys[calls[positions]] == keys[puts]
+        if not matched.any():
+            return None
+        call_index = calls[positions[matched]]
+        put_index = puts[matched]
+        parity = mid[call_index] - mid[put_index]
+        nearest = np.argsort(np.abs(parity), kind="stable")[:pairs]
+        return float(np.median(self.strike[put_index[nearest]] + parity[nearest]))
+
+    def take(self, indices):
+        return OptionChain({name: column[indices] for name, column in self.columns.items()}, self.extra,
+                           self._parsed(indices))
+
+    def filter(self, mask):
+        return self.take(np.flatnonzero(mask))
+
+    def sort_indices(self, name, descending=False, indices=None):
+        """Positions ordered by column ``name``, like the row store orders pages.
+
+        Missing values go last in either direction and ties keep their
+        original order, so descending is not just the ascending order reversed.
+        """
+        values = self.column(name)
+        if indices is not None:
+            values = values[indices]
+        missing = _missing(values)
+        present = np.flatnonzero(~missing)
+        keys = values[present]
+        if descending:
+            # Sort on negated ranks rather than reversing, which would also reverse the ties
+            keys = -np.unique(keys, return_inverse=True)[1].reshape(-1)
+        order = np.concatenate([present[np.argsort(keys, kind="stable")], np.flatnonzero(missing)])
+        return order if indices is None else indices[order]
+
+    def total(self, name, mask=None):
+        values = self.column(name)
+        if mask is not None:
+            values = values[mask]
+        return values.sum().item() if values.dtype != np.float64 else float(np.nansum(values))
+
+    def put_call_ratio(self, name="volume"):
+        calls = self.total(name, self.is_call)
+        puts = self.total(name, ~self.is_call)
+        return puts / calls if calls else None
+
+    def to_rows(self, indices=None, fields=None):
+        names = fields or list(self.columns.keys())
+        lists = {}
+        for name in names:
+            column = self.column(name)
+            if indices is not None:
+                column = column[indices]
+            if column.dtype.kind == "S":
+                lists[name] = [value.decode("utf-8") for value in column.tolist()]
+            elif column.dtype.kind == "M":
+                lists[name] = [None if np.isnat(value) else str(value) for value in column]
+            elif column.dtype.kind == "f":
+                lists[name] = [None if value != value else value for value in column.tolist()]
+            else:
+                lists[name] = column.tolist()
+        count = len(self) if indices is None else len(indices)
+        return [{name: lists[name][index] for name in names} for index in range(count)]
+
+    def to_payload(self):
+        return {"data": self.to_rows(), **self.extra}
+
+    def page(self, offset=0, limit=None, fields=None, sort=None, descending=False):
+        indices = np.arange(len(self))
+        if sort:
+            indices = self.sort_indices(sort, descending)
+        end = None if limit is None else offset + limit
+        return len(self), self.to_rows(indices[offset:end], fields)
+
+    def to_bytes(self):
+        """Binary layout: magic, header length, JSON header, then raw column buffers."""
+        names = list(self.columns.keys())
+        buffers = [np.ascontiguousarray(self.columns[name]) for name in names]
+        header = json.dumps({
+            "columns": [[name, buffer.dtype.str, len(buffer)] for name, buffer in zip(names, buffers)],
+            "extra": self.extra,
+        }).encode("utf-8")
+        return b"".join([FORMAT_MAGIC, struct.pack("<I", len(header)), header] + [buffer.tobytes() for buffer in buffers])
+
+    @classmethod
+    def from_bytes(cls, data):
+        if not data.startswith(FORMAT_MAGIC):
+            raise ValueError("Not a serialized option chain")
+        offset = len(FORMAT_MAGIC)
+        header_length, = struct.unpack_from("<I", data, offset)
+        offset += 4
+        header = json.loads(data[offset:offset + header_length])
+        offset += header_length
+        columns = {}
+        for name, dtype, count in header["columns"]:
+            dtype = np.dtype(dtype)
+            columns[name] = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+            offset += dtype.itemsize * count
+        return cls(columns, header["extra"])
+
+    def summary(self):
+        underlyings = sorted({value.decode("ascii") for value in np.unique(self.underlying) if value})
+        return f"Option chain with {len(self)} contracts for {', '.join(underlyings) or 'unknown underlying'}"
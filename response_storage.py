@@ -0,0 +1,468 @@
+import os
+import re
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+STORAGE_BACKEND = os.getenv("API_RESPONSE_STORAGE", "sqlite")
+DB_FILE = os.getenv("API_RESPONSE_DB", "responses.db")
+TTL_SECONDS = float(os.getenv("API_RESPONSE_TTL", str(7 * 24 * 3600)))
+MAX_BYTES = int(os.getenv("API_RESPONSE_MAX_BYTES", str(256 * 1024 * 1024)))
+COMPRESSION_LEVEL = int(os.getenv("API_RESPONSE_COMPRESSION_LEVEL", "6"))
+COMMIT_BATCH_SIZE = int(os.getenv("API_RESPONSE_COMMIT_BATCH", "32"))
+COMMIT_INTERVAL = float(os.getenv("API_RESPONSE_COMMIT_INTERVAL", "0.25"))
+EVICT_EVERY = 64
+# Rows per compressed block; an unsorted page or streamed chunk decompresses only the blocks it touches
+ROW_BLOCK_ROWS = int(os.getenv("API_RESPONSE_ROW_BLOCK", "500"))
+
+FIELD_PATTERN = re.compile(r"^[A-Za-z0-9_]+$")
+
+
+def split_rows(response):
+    """Return (rows_key, rows, envelope) for row-set payloads, or None.
+
+    A row set is a list of objects, or an object holding one under "data"
+    (the shape Unusual Whales returns), which is what pagination works over.
+    """
+    if isinstance(response, list) and response and all(isinstance(row, dict) for row in response):
+        return None, response, None
+    if isinstance(response, dict):
+        rows = response.get("data")
+        if isinstance(rows, list) and rows and all(isinstance(row, dict) for row in rows):
+            return "data", rows, {k: v for k, v in response.items() if k != "data"}
+    return None
+
+
+def assemble(envelope, rows_key, row_texts):
+    """Build the full JSON document from already-encoded rows without re-parsing them."""
+    rows = b"[" + b",".join(row_texts) + b"]"
+    if rows_key is None:
+        return rows
+    rest = envelope[1:-1].strip() if envelope else b""
+    return b'{"' + rows_key.encode("utf-8") + b'": ' + rows + (b", " + rest if rest else b"") + b"}"
+
+
+def validate_fields(fields):
+    for field in fields or []:
+        if not FIELD_PATTERN.match(field):
+            raise ValueError(f"Invalid field name: {field}")
+
+
+def sort_key(value):
+    """Numbers (and numeric strings like "26956833.00") by value, then text, then missing values.
+
+    Both backends sort pages with this (through sort_rows), so a page is the
+    same whichever backend served it. The group (the first item) always
+    sorts ascending.
+    """
+    if value is None:
+        return (2, 0.0, "")
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        number = None
+    if number is not None and number == number:
+        return (0, number, "")
+    return (1, 0.0, value if isinstance(value, str) else json.dumps(value, separators=(",", ":"), ensure_ascii=False))
+
+
+def sort_rows(rows, field, descending=False):
+    """Rows ordered by ``field``; ``descending`` only reverses the order within numbers and within text.
+
+    Missing values stay last either way and ties keep their original order.
+    """
+    keys = [sort_key(row.get(field)) for row in rows]
+    order = []
+    for group in range(3):
+        members = [index for index, key in enumerate(keys) if key[0] == group]
+        order.extend(sorted(members, key=keys.__getitem__, reverse=descending))
+    return [rows[index] for index in order]
+
+
+def page_rows(rows, offset=0, limit=None, fields=None, sort=None, descending=False):
+    """In-memory pagination over decoded rows: the file backend, and sorted pages of the SQLite one."""
+    if sort:
+        rows = sort_rows(rows, sort, descending)
+    end = None if limit is None else offset + limit
+    page = rows[offset:end]
+    if fields:
+        page = [{field: row.get(field) for field in fields} for row in page]
+    return len(rows), [json.dumps(row).encode("utf-8") for row in page]
+
+
+class FileResponseStorage:
+    """The original layout: one uncompressed JSON file per response id."""
+
+    def __init__(self, response_dir):
+        self.response_dir = response_dir
+        os.makedirs(self.response_dir, exist_ok=True)
+
+    def _path(self, response_id, format="json"):
+        return os.path.join(self.response_dir, f"{response_id}.{format}")
+
+    def put(self, response_id, data, format="json"):
+        with open(self._path(response_id, format), 'wb') as f:
+            f.write(data)
+
+    def get_format(self, response_id):
+        for format in ("json", "chain"):
+            if os.path.exists(self._path(response_id, format)):
+                return format
+        return None
+
+    def put_rows(self, response_id, envelope, rows_key, row_texts):
+        self.put(response_id, assemble(envelope, rows_key, row_texts))
+
+    def get_rows(self, response_id, offset=0, limit=None, fields=None, sort=None, descending=False):
+        data = self.get(response_id)
+        if data is None:
+            return None
+        split = split_rows(json.loads(data))
+        if split is None:
+            raise ValueError("Response is not a row set")
+        return page_rows(split[1], offset, limit, fields, sort, descending)
+
+    def iter_chunks(self, response_id):
+        data = self.get(response_id)
+        return None if data is None else iter([data])
+
+    def get(self, response_id):
+        format = self.get_format(response_id)
+        if format is not None:
+            with open(self._path(response_id, format), 'rb') as f:
+                return f.read()
+        return None
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class SQLiteResponseStorage:
+    """Compressed, deduplicated, bounded response store in a single SQLite file.
+
+    Payloads are stored once per content hash; response ids point at them.
+    Row-set payloads keep their rows in compressed blocks of ROW_BLOCK_ROWS,
+    so an unsorted page decompresses only the blocks it covers and streaming
+    never holds more than a block; a sorted page decodes the whole row set
+    (about 4ms for a 500-contract chain). Other payloads are stored as one
+    compressed blob.
+    Writes are grouped into one transaction per batch (or per commit
+    interval) until flush(), so concurrent stores share an fsync; callers
+    flush before handing an id out so every worker can read it at once.
+    Expired and over-budget responses are evicted oldest first. Ids written
+    by FileResponseStorage are still served from ``legacy_dir``.
+
+    The file is shared by the workers of one host; it is not a networked
+    store, so several hosts each keep their own.
+    """
+
+    def __init__(self, db_path, legacy_dir=None, ttl=TTL_SECONDS, max_bytes=MAX_BYTES,
+                 compression_level=COMPRESSION_LEVEL, batch_size=COMMIT_BATCH_SIZE, commit_interval=COMMIT_INTERVAL):
+        self.db_path = db_path
+        self.legacy = FileResponseStorage(legacy_dir) if legacy_dir else None
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.compression_level = compression_level
+        self.batch_size = batch_size
+        self.commit_interval = commit_interval
+        self.lock = threading.RLock()
+        self.pending = 0
+        self.writes_since_eviction = 0
+        self.timer = None
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                stored_size INTEGER NOT NULL,
+                rows_key TEXT,
+                row_count INTEGER,
+                format TEXT NOT NULL DEFAULT 'json'
+            );
+            CREATE TABLE IF NOT EXISTS row_blocks (
+                hash TEXT NOT NULL,
+                block INTEGER NOT NULL,
+                data BLOB NOT NULL,
+                PRIMARY KEY (hash, block)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS responses (
+                id TEXT PRIMARY KEY,
+                hash TEXT NOT NULL REFERENCES blobs(hash),
+                created_at REAL NOT NULL,
+                expires_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS responses_created_at ON responses(created_at);
+            CREATE INDEX IF NOT EXISTS responses_hash ON responses(hash);
+        """)
+        blob_columns = {row[1] for row in self.conn.execute("PRAGMA table_info(blobs)")}
+        if "format" not in blob_columns:
+            self.conn.execute("ALTER TABLE blobs ADD COLUMN format TEXT NOT NULL DEFAULT 'json'")
+        self._migrate_rows()
+
+    def _migrate_rows(self):
+        """Compress the one-row-per-line table of earlier versions into row blocks."""
+        tables = {name for name, in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if "rows" not in tables:
+            return
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another worker may have migrated while we waited for the write lock
+            if self.conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'rows'").fetchone():
+                for digest, envelope in self.conn.execute("SELECT hash, data FROM blobs WHERE row_count IS NOT NULL").fetchall():
+                    row_texts = [text.encode("utf-8") for text, in self.conn.execute(
+                        "SELECT row FROM rows WHERE hash = ? ORDER BY idx", (digest,))]
+                    stored = self._insert_blocks(digest, row_texts)
+                    self.conn.execute("UPDATE blobs SET stored_size = ? WHERE hash = ?", (len(envelope) + stored, digest))
+                self.conn.execute("DROP TABLE rows")
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        logger.info("Compressed stored response rows into blocks")
+
+    def _insert_blocks(self, digest, row_texts):
+        stored = 0
+        for block, start in enumerate(range(0, len(row_texts), ROW_BLOCK_ROWS)):
+            # Encoded JSON never contains a raw newline, so it can separate the rows of a block
+            data = zlib.compress(b"\n".join(row_texts[start:start + ROW_BLOCK_ROWS]), self.compression_level)
+            self.conn.execute("INSERT INTO row_blocks (hash, block, data) VALUES (?, ?, ?)", (digest, block, data))
+            stored += len(data)
+        return stored
+
+    def _read_blocks(self, digest, first=0, last=None):
+        """Row texts of blocks ``first`` to ``last`` (inclusive), in order."""
+        blocks = self.conn.execute(
+            "SELECT data FROM row_blocks WHERE hash = ? AND block >= ? AND block <= ? ORDER BY block",
+            (digest, first, 2 ** 62 if last is None else last)).fetchall()
+        return [text for data, in blocks for text in zlib.decompress(data).split(b"\n")]
+
+    def _begin(self):
+        if not self.conn.in_transaction:
+            self.conn.execute("BEGIN")
+
+    def put(self, response_id, data, format="json"):
+        digest = hashlib.sha256(data).hexdigest()
+
+        def insert_blob():
+            compressed = zlib.compress(data, self.compression_level)
+            self.conn.execute(
+                "INSERT INTO blobs (hash, data, size, stored_size, format) VALUES (?, ?, ?, ?, ?)",
+                (digest, compressed, len(data), len(compressed), format))
+
+        self._put(response_id, digest, insert_blob)
+
+    def put_rows(self, response_id, envelope, rows_key, row_texts):
+        hasher = hashlib.sha256(envelope or b"")
+        hasher.update((rows_key or "").encode("utf-8"))
+        for text in row_texts:
+            hasher.update(b"\n")
+            hasher.update(text)
+        digest = hasher.hexdigest()
+
+        def insert_blob():
+            size = sum(len(text) for text in row_texts)
+            compressed = zlib.compress(envelope or b"", self.compression_level)
+            stored = self._insert_blocks(digest, row_texts)
+            self.conn.execute(
+                "INSERT INTO blobs (hash, data, size, stored_size, rows_key, row_count, format) VALUES (?, ?, ?, ?, ?, ?, 'rows')",
+                (digest, compressed, size + len(envelope or b""), stored + len(compressed), rows_key or "", len(row_texts)))
+
+        self._put(response_id, digest, insert_blob)
+
+    def _put(self, response_id, digest, insert_blob):
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl else None
+        with self.lock:
+            self._begin()
+            exists = self.conn.execute("SELECT 1 FROM blobs WHERE hash = ?", (digest,)).fetchone()
+            if not exists:
+                insert_blob()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (id, hash, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                (response_id, digest, now, expires_at))
+            self.pending += 1
+            self.writes_since_eviction += 1
+            if self.writes_since_eviction >= EVICT_EVERY:
+                self._evict()
+            if self.pending >= self.batch_size:
+                self._commit()
+            elif self.timer is None:
+                self.timer = threading.Timer(self.commit_interval, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def _lookup(self, response_id):
+        """Return (hash, data, rows_key, row_count) for a live response, or None."""
+        row = self.conn.execute(
+            "SELECT b.hash, b.data, b.rows_key, b.row_count, r.expires_at "
+            "FROM responses r JOIN blobs b ON b.hash = r.hash WHERE r.id = ?",
+            (response_id,)).fetchone()
+        if row is None:
+            return None
+        digest, data, rows_key, row_count, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            return None
+        return digest, data, rows_key, row_count
+
+    def get_format(self, response_id):
+        row = self._find_format(response_id)
+        if row is None:
+            legacy_format = self.legacy.get_format(response_id) if self.legacy else None
+            if legacy_format is not None:
+                return legacy_format
+            # The id may come from another worker, which commits before handing it out; only our own
+            # open batch can still be reading from a snapshot older than that commit
+            with self.lock:
+                stale = self.conn.in_transaction
+                if stale:
+                    self._commit()
+            if stale:
+                row = self._find_format(response_id)
+        if row is not None:
+            format, expires_at = row
+            return format if expires_at is None or expires_at > time.time() else None
+        return None
+
+    def _find_format(self, response_id):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT b.format, r.expires_at FROM responses r JOIN blobs b ON b.hash = r.hash WHERE r.id = ?",
+                (response_id,)).fetchone()
+
+    def get(self, response_id):
+        with self.lock:
+            found = self._lookup(response_id)
+            if found is not None:
+                digest, data, rows_key, row_count = found
+                if row_count is None:
+                    return zlib.decompress(data)
+                return assemble(zlib.decompress(data), rows_key or None, self._read_blocks(digest))
+        if self.legacy:
+            return self.legacy.get(response_id)
+        return None
+
+    def get_rows(self, response_id, offset=0, limit=None, fields=None, sort=None, descending=False):
+        validate_fields(fields)
+        validate_fields([sort] if sort else None)
+        with self.lock:
+            found = self._lookup(response_id)
+            if found is not None:
+                digest, _, _, row_count = found
+                if row_count is None:
+                    raise ValueError("Response is not a row set")
+                if sort:
+                    rows = [json.loads(text) for text in self._read_blocks(digest)]
+                    return page_rows(rows, offset, limit, fields, sort, descending)
+                end = row_count if limit is None else min(offset + limit, row_count)
+                if offset >= end:
+                    return row_count, []
+                first = offset // ROW_BLOCK_ROWS
+                page = self._read_blocks(digest, first, (end - 1) // ROW_BLOCK_ROWS)
+                page = page[offset - first * ROW_BLOCK_ROWS:end - first * ROW_BLOCK_ROWS]
+                if fields:
+                    page = [json.dumps({field: row.get(field) for field in fields}).encode("utf-8")
+                            for row in map(json.loads, page)]
+                return row_count, page
+        if self.legacy:
+            return self.legacy.get_rows(response_id, offset, limit, fields, sort, descending)
+        return None
+
+    def iter_chunks(self, response_id):
+        """Yield the full document in pieces, decompressing one block of rows at a time."""
+        with self.lock:
+            found = self._lookup(response_id)
+        if found is None:
+            return self.legacy.iter_chunks(response_id) if self.legacy else None
+        digest, data, rows_key, row_count = found
+        if row_count is None:
+            return iter([zlib.decompress(data)])
+        return self._iter_rows(digest, zlib.decompress(data), rows_key or None)
+
+    def _iter_rows(self, digest, envelope, rows_key):
+        # Split the document around a placeholder row to get the text before and after the rows
+        head, tail = assemble(envelope, rows_key, [b"\0"]).split(b"\0")
+        yield head
+        block = 0
+        while True:
+            with self.lock:
+                batch = self._read_blocks(digest, block, block)
+            if not batch:
+                break
+            yield (b"," if block else b"") + b",".join(batch)
+            block += 1
+        yield tail
+
+    def _commit(self):
+        if self.conn.in_transaction:
+            self.conn.execute("COMMIT")
+        self.pending = 0
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+    def flush(self):
+        with self.lock:
+            self._commit()
+
+    def _evict(self):
+        self.writes_since_eviction = 0
+        now = time.time()
+        self.conn.execute("DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        self.conn.execute("DELETE FROM row_blocks WHERE hash NOT IN (SELECT hash FROM responses)")
+        self.conn.execute("DELETE FROM blobs WHERE hash NOT IN (SELECT hash FROM responses)")
+        total = self.conn.execute("SELECT COALESCE(SUM(stored_size), 0) FROM blobs").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop the oldest responses until the blobs they leave unreferenced bring us back under budget
+        for response_id, digest in self.conn.execute(
+                "SELECT id, hash FROM responses ORDER BY created_at").fetchall():
+            self.conn.execute("DELETE FROM responses WHERE id = ?", (response_id,))
+            still_used = self.conn.execute("SELECT 1 FROM responses WHERE hash = ? LIMIT 1", (digest,)).fetchone()
+            if not still_used:
+                freed = self.conn.execute("SELECT stored_size FROM blobs WHERE hash = ?", (digest,)).fetchone()
+                self.conn.execute("DELETE FROM blobs WHERE hash = ?", (digest,))
+                self.conn.execute("DELETE FROM row_blocks WHERE hash = ?", (digest,))
+                total -= freed[0] if freed else 0
+            if total <= self.max_bytes:
+                break
+        logger.info(f"Evicted responses down to {total} stored bytes")
+
+    def evict(self):
+        with self.lock:
+            self._begin()
+            self._evict()
+            self._commit()
+
+    def stats(self):
+        with self.lock:
+            responses, = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+            blobs, raw, stored = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored_size), 0) FROM blobs").fetchone()
+        return {"responses": responses, "unique_payloads": blobs, "raw_bytes": raw, "stored_bytes": stored}
+
+    def close(self):
+        with self.lock:
+            self._commit()
+            self.conn.close()
+
+
+def create_storage(response_dir, backend=STORAGE_BACKEND):
+    if backend == "file":
+        return FileResponseStorage(response_dir)
+    if backend == "sqlite":
+        return SQLiteResponseStorage(os.path.join(response_dir, DB_FILE), legacy_dir=response_dir)
+    raise ValueError(f"Unknown API response storage backend: {backend}")
@@ -0,0 +1,193 @@
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from serialization import sse
+from metrics import ACTIVE_RUNS, QUEUED_RUNS, ADMISSION_REJECTED, RUNS_CANCELLED, STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+MAX_ACTIVE_RUNS = int(os.getenv("MAX_ACTIVE_RUNS", "32"))
+MAX_ACTIVE_RUNS_PER_SESSION = int(os.getenv("MAX_ACTIVE_RUNS_PER_SESSION", "1"))
+MAX_QUEUED_RUNS = int(os.getenv("MAX_QUEUED_RUNS", "64"))
+ADMISSION_TIMEOUT = float(os.getenv("ADMISSION_TIMEOUT", "10"))
+RUN_DEADLINE = float(os.getenv("CHAT_RUN_DEADLINE", "300"))
+DISCONNECT_POLL_INTERVAL = float(os.getenv("DISCONNECT_POLL_INTERVAL", "1.0"))
+
+# Cleanup scheduled while a stream is closing; the loop only keeps weak references to tasks
+background_tasks = set()
+
+
+def run_in_background(coroutine):
+    task = asyncio.ensure_future(coroutine)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code, detail, retry_after=None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class Ticket:
+    """An admitted chat; release() may be called more than once."""
+
+    def __init__(self, controller, session_key):
+        self.controller = controller
+        self.session_key = session_key
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.controller.release(self.session_key)
+
+
+class AdmissionController:
+    """Caps concurrent chats per worker and per session.
+
+    Chats over either cap wait in a FIFO queue for up to ``timeout`` seconds;
+    a full queue or an expired wait is rejected straight away so the client
+    can retry instead of holding a connection open.
+    """
+
+    def __init__(self, max_active=MAX_ACTIVE_RUNS, max_per_session=MAX_ACTIVE_RUNS_PER_SESSION,
+                 max_queued=MAX_QUEUED_RUNS, timeout=ADMISSION_TIMEOUT):
+        self.max_active = max_active
+        self.max_per_session = max_per_session
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self.active = 0
+        self.sessions = {}
+        self.waiters = deque()
+
+    def _can_admit(self, session_key):
+        return self.active < self.max_active and self.sessions.get(session_key, 0) < self.max_per_session
+
+    def _admit(self, session_key):
+        self.active += 1
+        self.sessions[session_key] = self.sessions.get(session_key, 0) + 1
+        ACTIVE_RUNS.set(self.active)
+
+    def _reject(self, session_key, reason):
+        ADMISSION_REJECTED.inc(reason=reason)
+        if reason == "session":
+            return AdmissionRejected(429, "A previous message in this chat is still being answered.", self.timeout)
+        return AdmissionRejected(503, "Too many chats in progress, please try again shortly.", self.timeout)
+
+    async def acquire(self, session_key):
+        if self._can_admit(session_key):
+            self._admit(session_key)
+            return Ticket(self, session_key)
+        if len(self.waiters) >= self.max_queued:
+            raise self._reject(session_key, "queue_full")
+        started = time.perf_counter()
+        waiter = (session_key, asyncio.get_running_loop().create_future())
+        self.waiters.append(waiter)
+        QUEUED_RUNS.set(len(self.waiters))
+        try:
+            await asyncio.wait_for(waiter[1], self.timeout)
+        except asyncio.TimeoutError:
+            raise self._reject(session_key, "session" if self.active < self.max_active else "timeout")
+        except asyncio.CancelledError:
+            if waiter[1].done() and not waiter[1].cancelled():
+                # Admitted just as we were cancelled; hand the slot on
+                self.release(session_key)
+            raise
+        finally:
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+            QUEUED_RUNS.set(len(self.waiters))
+            STAGE_SECONDS.observe(time.perf_counter() - started, stage="admission_wait")
+        return Ticket(self, session_key)
+
+    def release(self, session_key):
+        self.active -= 1
+        self.sessions[session_key] -= 1
+        if not self.sessions[session_key]:
+            del self.sessions[session_key]
+        for waiter in list(self.waiters):
+            if self.active >= self.max_active:
+                break
+            key, future = waiter
+            if future.done():
+                self.waiters.remove(waiter)
+            elif self._can_admit(key):
+                self.waiters.remove(waiter)
+                self._admit(key)
+                future.set_result(None)
+        ACTIVE_RUNS.set(self.active)
+        QUEUED_RUNS.set(len(self.waiters))
+
+    def stats(self):
+        return {
+            "active": self.active,
+            "queued": len(self.waiters),
+            "sessions": len(self.sessions),
+            "max_active": self.max_active,
+            "max_per_session": self.max_per_session,
+            "max_queued": self.max_queued,
+        }
+
+
+async def wait_for_disconnect(request, interval):
+    while not await request.is_disconnected():
+        await asyncio.sleep(interval)
+    return "disconnect"
+
+
+async def supervise(request, frames, ticket=None, deadline=RUN_DEADLINE, interval=DISCONNECT_POLL_INTERVAL):
+    """Relay ``frames`` until they end, the client disconnects or the deadline passes.
+
+    On disconnect or deadline the producer is cancelled where it stands, which
+    lets the chat runner cancel its run and any tool calls still in flight.
+    The admission ``ticket`` is released however the stream ends.
+    """
+    watcher = asyncio.ensure_future(asyncio.wait_for(wait_for_disconnect(request, interval), deadline))
+    next_frame = None
+    completed = False
+    # The server may notice the disconnect first and close this stream itself
+    reason = "disconnect"
+    try:
+        while True:
+            next_frame = asyncio.ensure_future(frames.__anext__())
+            await asyncio.wait({next_frame, watcher}, return_when=asyncio.FIRST_COMPLETED)
+            if next_frame.done():
+                try:
+                    frame = next_frame.result()
+                except StopAsyncIteration:
+                    completed = True
+                    return
+                except Exception:
+                    reason = "error"
+                    raise
+                next_frame = None
+                yield frame
+                continue
+            try:
+                reason = watcher.result()
+            except asyncio.TimeoutError:
+                reason = "deadline"
+            logger.info(f"Stopping chat stream: {reason}")
+            if reason == "deadline":
+                yield sse({'type': 'error', 'content': 'The assistant took too long to answer and the request was cancelled.'})
+            return
+    finally:
+        if not completed:
+            RUNS_CANCELLED.inc(reason=reason)
+        if ticket is not None:
+            ticket.release()
+        watcher.cancel()
+        # No awaiting here: the response may itself be cancelled, so cleanup runs in its own task
+        if next_frame is not None and not next_frame.done():
+            next_frame.cancel()
+        else:
+            run_in_background(frames.aclose())
+
+
+admission_controller = AdmissionController()
@@ -0,0 +1,118 @@
+import datetime
+import numpy as np
+from option_chain import OptionChain
+
+# Screener parameters that can be answered from a chain snapshot. Anything
+# else (sectors[], issue_types[], floor volume, ...) needs the remote screener.
+LOCAL_PARAMS = {
+    "ticker_symbol", "min_underlying_price", "max_underlying_price", "is_otm",
+    "min_dte", "max_dte", "min_diff", "max_diff", "min_volume", "max_volume",
+    "min_oi", "max_oi", "vol_greater_oi", "order", "order_direction",
+}
+# Remote screener sort names mapped to chain columns
+ORDER_ALIASES = {
+    "premium": "total_premium",
+    "iv": "implied_volatility",
+    "oi": "open_interest",
+}
+DERIVED_COLUMNS = {"dte", "diff", "strike", "expiry"}
+MONEYNESS_PARAMS = {"is_otm", "min_diff", "max_diff", "min_underlying_price", "max_underlying_price"}
+
+
+def parse_tickers(ticker_symbol):
+    if not ticker_symbol:
+        return []
+    return [ticker.strip().upper() for ticker in ticker_symbol.split(",") if ticker.strip()]
+
+
+def order_column(order):
+    return ORDER_ALIASES.get(order, order)
+
+
+def supports(params, chain=None):
+    """Whether ``params`` can be evaluated locally (against ``chain`` when given)."""
+    if not parse_tickers(params.get("ticker_symbol")):
+        # Market-wide screens need the full universe, which only the API has
+        return False
+    if set(params) - LOCAL_PARAMS:
+        return False
+    order = params.get("order")
+    if order and chain is not None:
+        column = order_column(order)
+        return column in DERIVED_COLUMNS or column in chain.columns
+    return True
+
+
+def screen(snapshot, params, today=None):
+    """Apply the screener parameters to one ticker's chain snapshot.
+
+    Returns the matching contracts as an OptionChain with ``dte``, ``diff``
+    and ``underlying_price`` columns added, or None if the snapshot can't
+    answer the query (e.g. moneyness filters without an underlying price).
+    """
+    chain = snapshot.chain
+    spot = snapshot.spot
+    if spot is None and MONEYNESS_PARAMS & set(params):
+        return None
+    if not supports(params, chain):
+        return None
+
+    today = np.datetime64(today or datetime.date.today(), "D")
+    dte = (chain.expiry - today).astype(np.int64)
+    if spot:
+        # Distance out of the money as a fraction of the underlying price; negative when in the money
+        diff = np.where(chain.is_call, chain.strike - spot, spot - chain.strike) / spot
+    else:
+        diff = np.full(len(chain), np.nan)
+
+    mask = ~np.isnat(chain.expiry)
+    if params.get("min_underlying_price") is not None and spot < params["min_underlying_price"]:
+        mask[:] = False
+    if params.get("max_underlying_price") is not None and spot > params["max_underlying_price"]:
+        mask[:] = False
+    if params.get("is_otm") is not None:
+        mask &= (diff > 0) == bool(params["is_otm"])
+    if params.get("min_dte") is not None:
+        mask &= dte >= params["min_dte"]
+    if params.get("max_dte") is not None:
+        mask &= dte <= params["max_dte"]
+    if params.get("min_diff") is not None:
+        mask &= diff >= params["min_diff"]
+    if params.get("max_diff") is not None:
+        mask &= diff <= params["max_diff"]
+    volume = chain.columns.get("volume")
+    open_interest = chain.columns.get("open_interest")
+    for name, column in [("volume", volume), ("oi", open_interest)]:
+        if params.get(f"min_{name}") is not None or params.get(f"max_{name}") is not None:
+            if column is None:
+                return None
+            if params.get(f"min_{name}") is not None:
+                mask &= column >= params[f"min_{name}"]
+            if params.get(f"max_{name}") is not None:
+                mask &= column <= params[f"max_{name}"]
+    if params.get("vol_greater_oi"):
+        if volume is None or open_interest is None:
+            return None
+        mask &= volume > open_interest
+
+    indices = np.flatnonzero(mask)
+    result = chain.with_columns(
+        dte=dte,
+        diff=diff,
+        underlying_price=np.full(len(chain), np.nan if spot is None else spot),
+    )
+    order = params.get("order")
+    if order:
+        descending = params.get("order_direction", "desc") != "asc"
+        indices = result.sort_indices(order_column(order), descending, indices)
+    return result.take(indices)
+
+
+def merge(chains, params):
+    """Combine per-ticker results and re-apply the requested ordering across them."""
+    merged = OptionChain.concat(chains)
+    order = params.get("order")
+    if order and len(chains) > 1:
+        descending = params.get("order_direction", "desc") != "asc"
+        merged = merged.take(merged.sort_indices(order_column(order), descending))
+    return merged
@@ -0,0 +1,125 @@
+import os
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_BACKEND = os.getenv("JSON_BACKEND", "orjson" if orjson else "json")
+if JSON_BACKEND == "orjson" and orjson is None:
+    logger.warning("JSON_BACKEND=orjson but orjson is not installed, using the json module")
+    JSON_BACKEND = "json"
+
+# orjson needs to be told about numpy values and non-string keys, both of which tools produce
+ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if orjson else 0
+
+_encoder = json.JSONEncoder()
+
+
+class JSONText(str):
+    """Tool output already known to be valid JSON, carrying its UTF-8 bytes.
+
+    It is still a ``str`` for the Assistants API, but the cache, the SSE
+    emitter and the HTTP endpoints use ``encoded`` instead of re-parsing
+    and re-encoding it.
+    """
+
+    def __new__(cls, encoded):
+        text = super().__new__(cls, encoded.decode("utf-8"))
+        text.encoded = encoded
+        return text
+
+
+def dumps(obj):
+    if JSON_BACKEND == "orjson":
+        try:
+            return orjson.dumps(obj, option=ORJSON_OPTIONS)
+        except TypeError:
+            # e.g. integers wider than 64 bits; the json module handles them
+            pass
+    return json.dumps(obj).encode("utf-8")
+
+
+def loads(data):
+    if isinstance(data, JSONText):
+        # orjson rejects str subclasses, and the bytes are already at hand
+        data = data.encoded
+    if JSON_BACKEND == "orjson":
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_text(obj):
+    return JSONText(dumps(obj))
+
+
+def encode_bounded(obj, limit):
+    """Encode ``obj`` once, giving up early if it is larger than ``limit`` bytes.
+
+    Returns ``(data, fits)``. When it fits, ``data`` is the full encoding.
+    When it doesn't, ``data`` is the full encoding if the backend produced
+    it anyway (orjson encodes in one call), or None if encoding stopped as
+    soon as the limit was crossed.
+    """
+    if JSON_BACKEND == "orjson":
+        data = dumps(obj)
+        return data, len(data) <= limit
+    chunks = []
+    size = 0
+    # ensure_ascii is on, so characters and bytes are the same count
+    for chunk in _encoder.iterencode(obj):
+        size += len(chunk)
+        if size > limit:
+            return None, False
+        chunks.append(chunk)
+    return "".join(chunks).encode("utf-8"), True
+
+
+def encoded(output):
+    """Bytes for a tool output string, reusing the encoding when it is JSONText."""
+    if isinstance(output, JSONText):
+        return output.encoded
+    return output.encode("utf-8")
+
+
+def splice(payload, raw=None):
+    """Encode ``payload`` with extra keys whose values are already JSON bytes.
+
+    The ``raw`` values are spliced into the object as-is rather than decoded
+    and encoded again.
+    """
+    body = dumps(payload)
+    if raw:
+        fields = b",".join(dumps(key) + b":" + value for key, value in raw.items())
+        separator = b"," if len(body) > 2 else b""
+        body = body[:-1] + separator + fields + b"}"
+    return body
+
+
+def sse(payload, raw=None):
+    """Encode one SSE ``data:`` frame."""
+    return b"data: " + splice(payload, raw) + b"\n\n"
+
+
+def ndjson(payload, raw=None):
+    """Encode one newline-delimited JSON record."""
+    return splice(payload, raw) + b"\n"
+
+
+def output_frame(output):
+    """JSON bytes for a tool output inside an SSE frame.
+
+    Outputs we produced ourselves are spliced in directly; arbitrary strings
+    returned by user tools are parsed when they are JSON, otherwise sent as
+    a JSON string.
+    """
+    if isinstance(output, JSONText):
+        return output.encoded
+    try:
+        return dumps(loads(output))
+    except ValueError:
+        return dumps(output)
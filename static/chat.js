@@ -11,6 +11,9 @@ document.addEventListener('DOMContentLoaded', () => {
 
     let currentApiResponse = null;
     let currentToolName = null;
+    let currentToolArgs = null;
+    let streamingMessage = null;
+    let streamingContent = '';
 
     function addMessage(content, isUser = false) {
         const messageElement = document.createElement('div');
@@ -26,182 +29,27 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
-    function formatMessage(content) {
-        // Handle code blocks
-        content = content.replace(/```([\s\S]*?)```/g, '<pre><code>$1</code></pre>');
-        
-        // Handle inline code
-        content = content.replace(/`([^`]+)`/g, '<code>$1</code>');
-        
-        // Handle line breaks
-        content = content.replace(/\n/g, '<br>');
-        
-        return content;
-    }
-
-    function showTypingIndicator() {
-        typingIndicator.style.display = 'block';
-        chatMessages.scrollTo({
-            top: chatMessages.scrollHeight,
-            behavior: 'smooth'
-        });
-    }
-
-    function hideTypingIndicator() {
-        typingIndicator.style.display = 'none';
-    }
-
-    function displayApiResponse(response, toolName) {
-        if (response.type === 'large_response') {
-            apiResponseContainer.innerHTML = `
-                <p>${response.summary}</p>
-                <button onclick="fetchFullResponse('${response.id}')">Load Full Response</button>
-            `;
-        } else {
-            apiResponseContainer.innerHTML = `<pre>${JSON.stringify(response, null, 2)}</pre>`;
-        }
-        currentApiResponse = response;
-        currentToolName = toolName;
-        addToDashboardButton.style.display = 'block';
-    }
-
-    addToDashboardButton.addEventListener('click', () => {
-        if (currentApiResponse && currentToolName) {
-            const dashboardItem = {
-                apiResponse: currentApiResponse,
-                toolName: currentToolName,
-                description: ''
-            };
-            let dashboardItems = JSON.parse(localStorage.getItem('dashboardItems') || '[]');
-            dashboardItems.push(dashboardItem);
-            localStorage.setItem('dashboardItems', JSON.stringify(dashboardItems));
-            alert('Added to dashboard!');
-        }
-    });
-
-    window.fetchFullResponse = async function(responseId) {
-        try {
-            const response = await fetch(`/api/response/${responseId}`);
-            const data = await response.json();
-            apiResponseContainer.innerHTML = `<pre>${JSON.stringify(data, null, 2)}</pre>`;
-        } catch (error) {
-            console.error('Error fetching full response:', error);
-            apiResponseContainer.innerHTML += '<p>Error loading full response</p>';
-        }
-    }
-
-    async function sendMessage(message) {
-        addMessage(message, true);
-        showTypingIndicator();
-
-        try {
-            const response = await fetch('/chat', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/x-www-form-urlencoded',
-                },
-                body: new URLSearchParams({
-                    'message': message
-                })
-            });
-
-            if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
-            }
-
-            const reader = response.body.getReader();
-            const decoder = new TextDecoder();
-
-            while (true) {
-                const { value, done } = await reader.read();
-                if (done) break;
-                const decodedChunk = decoder.decode(value, { stream: true });
-                const lines = decodedChunk.split('\n');
-                for (const line of lines) {
-                    if (line.startsWith('data: ')) {
-                        const content = line.slice(6);
-                        try {
-                            const parsedContent = JSON.parse(content);
-                            switch(parsedContent.type) {
-                                case 'assistant_message':
-                                    addMessage(parsedContent.content);
-                                    break;
-                                case 'tool_output':
-                                    displayApiResponse(parsedContent.output, parsedContent.name);
-                                    break;
-                                case 'error':
-                                    addMessage(`Error: ${parsedContent.content}`);
-                                    break;
-                                default:
-                                    console.warn('Unknown message type:', parsedContent.type);
-                            }
-                        } catch (error) {
-                            console.error('Error parsing server message:', error);
-                            addMessage(content);
-                        }
-                    }
-                }
-            }
-
-            hideTypingIndicator();
-        } catch (error) {
-            console.error('Error sending message:', error);
+    function appendDelta(content) {
+        if (!streamingMessage) {
             hideTypingIndicator();
-            addMessage('An error occurred while processing your message.');
+            streamingMessage = document.createElement('div');
+            streamingMessage.classList.add('message', 'assistant-message');
+            chatMessages.appendChild(streamingMessage);
+            streamingContent = '';
         }
+        streamingContent += content;
+        streamingMessage.innerHTML = `<strong>Assistant:</strong> ${formatMessage(streamingContent)}`;
+        chatMessages.scrollTop = chatMessages.scrollHeight;
     }
 
-    messageForm.addEventListener('submit', async (e) => {
-        e.preventDefault();
-        const message = messageInput.value.trim();
-        if (message) {
-            messageInput.value = '';
-            await sendMessage(message);
+    function finishAssistantMessage(content) {
+        if (streamingMessage) {
+            streamingMessage.innerHTML = `<strong>Assistant:</strong> ${formatMessage(content)}`;
+            streamingMessage = null;
+            streamingContent = '';
+        } else {
+            addMessage(content);
         }
-    });
-
-    clearChatButton.addEventListener('click', () => {
-        chatMessages.innerHTML = '';
-        apiResponseContainer.innerHTML = '';
-        addToDashboardButton.style.display = 'none';
-    });
-
-    goToToolsButton.addEventListener('click', () => {
-        window.location.href = '/tools';
-    });
-
-    goToDashboardButton.addEventListener('click', () => {
-        window.location.href = '/dashboard';
-    });
-
-    // Focus on input when page loads
-    messageInput.focus();
-});document.addEventListener('DOMContentLoaded', () => {
-    const chatMessages = document.getElementById('chat-messages');
-    const messageForm = document.getElementById('message-form');
-    const messageInput = document.getElementById('message-input');
-    const typingIndicator = document.getElementById('typing-indicator');
-    const clearChatButton = document.getElementById('clear-chat');
-    const goToToolsButton = document.getElementById('go-to-tools');
-    const goToDashboardButton = document.getElementById('go-to-dashboard');
-    const apiResponseContainer = document.getElementById('api-response');
-    const addToDashboardButton = document.getElementById('add-to-dashboard');
-
-    let currentApiResponse = null;
-    let currentToolName = null;
-
-    function addMessage(content, isUser = false) {
-        const messageElement = document.createElement('div');
-        messageElement.classList.add('message');
-        messageElement.classList.add(isUser ? 'user-message' : 'assistant-message');
-        messageElement.innerHTML = `<strong>${isUser ? 'You' : 'Assistant'}:</strong> ${formatMessage(content)}`;
-        chatMessages.appendChild(messageElement);
-        
-        // Animate scroll
-        chatMessages.scrollTo({
-            top: chatMessages.scrollHeight,
-            behavior: 'smooth'
-        });
     }
 
     function formatMessage(content) {
@@ -229,7 +77,7 @@ document.addEventListener('DOMContentLoaded', () => {
         typingIndicator.style.display = 'none';
     }
 
-    function displayApiResponse(response, toolName) {
+    function displayApiResponse(response, toolName, toolArgs) {
         if (response.type === 'large_response') {
             apiResponseContainer.innerHTML = `
                 <p>${response.summary}</p>
@@ -240,6 +88,7 @@ document.addEventListener('DOMContentLoaded', () => {
         }
         currentApiResponse = response;
         currentToolName = toolName;
+        currentToolArgs = toolArgs;
         addToDashboardButton.style.display = 'block';
     }
 
@@ -248,6 +97,7 @@ document.addEventListener('DOMContentLoaded', () => {
             const dashboardItem = {
                 apiResponse: currentApiResponse,
                 toolName: currentToolName,
+                toolArgs: currentToolArgs,
                 description: ''
             };
             let dashboardItems = JSON.parse(localStorage.getItem('dashboardItems') || '[]');
@@ -257,11 +107,30 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     });
 
-    window.fetchFullResponse = async function(responseId) {
+    const RESPONSE_PAGE_SIZE = 50;
+
+    window.fetchFullResponse = async function(responseId, offset = 0) {
         try {
-            const response = await fetch(`/api/response/${responseId}`);
-            const data = await response.json();
-            apiResponseContainer.innerHTML = `<pre>${JSON.stringify(data, null, 2)}</pre>`;
+            // Row sets are paged server-side; anything else comes back whole
+            const response = await fetch(`/api/response/${responseId}?offset=${offset}&limit=${RESPONSE_PAGE_SIZE}`);
+            if (response.status === 400) {
+                const full = await fetch(`/api/response/${responseId}`);
+                const data = await full.json();
+                apiResponseContainer.innerHTML = `<pre>${JSON.stringify(data, null, 2)}</pre>`;
+                return;
+            }
+            const page = await response.json();
+            if (offset === 0) {
+                apiResponseContainer.innerHTML = '<pre class="response-rows"></pre><p class="response-status"></p>';
+            }
+            const rowsElement = apiResponseContainer.querySelector('.response-rows');
+            rowsElement.textContent += page.data.map(row => JSON.stringify(row)).join('\n') + '\n';
+            const shown = offset + page.data.length;
+            const status = apiResponseContainer.querySelector('.response-status');
+            status.innerHTML = `Showing ${shown} of ${page.total} rows`;
+            if (shown < page.total) {
+                status.innerHTML += ` <button onclick="fetchFullResponse('${responseId}', ${shown})">Load more</button>`;
+            }
         } catch (error) {
             console.error('Error fetching full response:', error);
             apiResponseContainer.innerHTML += '<p>Error loading full response</p>';
@@ -283,29 +152,42 @@ document.addEventListener('DOMContentLoaded', () => {
                 })
             });
 
+            if (response.status === 429 || response.status === 503) {
+                // Turned away by admission control; the detail says why
+                const error = await response.json().catch(() => ({}));
+                hideTypingIndicator();
+                addMessage(error.detail || 'The server is busy, please try again shortly.');
+                return;
+            }
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
             }
 
             const reader = response.body.getReader();
             const decoder = new TextDecoder();
+            let buffer = '';
 
             while (true) {
                 const { value, done } = await reader.read();
                 if (done) break;
-                const decodedChunk = decoder.decode(value, { stream: true });
-                const lines = decodedChunk.split('\n');
+                // Token deltas arrive as many small frames, so keep any partial line for the next chunk
+                buffer += decoder.decode(value, { stream: true });
+                const lines = buffer.split('\n');
+                buffer = lines.pop();
                 for (const line of lines) {
                     if (line.startsWith('data: ')) {
                         const content = line.slice(6);
                         try {
                             const parsedContent = JSON.parse(content);
                             switch(parsedContent.type) {
+                                case 'assistant_delta':
+                                    appendDelta(parsedContent.content);
+                                    break;
                                 case 'assistant_message':
-                                    addMessage(parsedContent.content);
+                                    finishAssistantMessage(parsedContent.content);
                                     break;
                                 case 'tool_output':
-                                    displayApiResponse(parsedContent.output, parsedContent.name);
+                                    displayApiResponse(parsedContent.output, parsedContent.name, parsedContent.args);
                                     break;
                                 case 'error':
                                     addMessage(`Error: ${parsedContent.content}`);
@@ -2,9 +2,14 @@ document.addEventListener('DOMContentLoaded', () => {
     const dashboardItems = document.getElementById('dashboard-items');
     const goToChatButton = document.getElementById('go-to-chat');
     const goToToolsButton = document.getElementById('go-to-tools');
+    const refreshAllButton = document.getElementById('refresh-all');
+    const goLiveButton = document.getElementById('go-live');
+    let liveSources = [];
 
     goToChatButton.addEventListener('click', () => window.location.href = '/');
     goToToolsButton.addEventListener('click', () => window.location.href = '/tools');
+    refreshAllButton.addEventListener('click', () => refreshApiCalls());
+    goLiveButton.addEventListener('click', () => liveSources.length ? stopLive() : goLive());
 
     function loadDashboardItems() {
         const items = JSON.parse(localStorage.getItem('dashboardItems') || '[]');
@@ -59,8 +64,111 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 
     async function refreshApiCall(item, index) {
-        // Implement API call refresh logic here
-        console.log('Refreshing API call:', item.apiResponse.name);
+        await refreshApiCalls([index]);
+    }
+
+    // Refresh many widgets with one request; identical calls run once and
+    // each result is applied as soon as its NDJSON line arrives.
+    async function refreshApiCalls(indices) {
+        const items = JSON.parse(localStorage.getItem('dashboardItems') || '[]');
+        const targets = (indices || items.map((_, index) => index))
+            .filter(index => items[index] && items[index].toolName && items[index].toolArgs);
+        if (targets.length === 0) return;
+
+        refreshAllButton.disabled = true;
+        try {
+            const response = await fetch('/api/refresh_batch', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({
+                    calls: targets.map(index => ({ tool_name: items[index].toolName, args: items[index].toolArgs }))
+                })
+            });
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                const lines = buffer.split('\n');
+                buffer = lines.pop();
+                for (const line of lines) {
+                    if (!line.trim()) continue;
+                    const result = JSON.parse(line);
+                    result.indices.forEach(position => {
+                        const index = targets[position];
+                        items[index].apiResponse = result.output;
+                        const element = dashboardItems.children[index];
+                        if (element) {
+                            element.querySelector('.api-response pre').textContent = JSON.stringify(result.output, null, 2);
+                        }
+                    });
+                }
+            }
+            localStorage.setItem('dashboardItems', JSON.stringify(items));
+        } catch (error) {
+            console.error('Error refreshing API calls:', error);
+            alert('Error refreshing dashboard. Please try again.');
+        } finally {
+            refreshAllButton.disabled = false;
+        }
+    }
+
+    // Live mode subscribes each widget to the server's shared poller for its
+    // call; the first message is a full snapshot, later ones only carry the
+    // rows that changed or were removed.
+    function goLive() {
+        const items = JSON.parse(localStorage.getItem('dashboardItems') || '[]');
+        items.forEach((item, index) => {
+            if (!item.toolName || !item.toolArgs) return;
+            const params = new URLSearchParams({ tool_name: item.toolName, args: JSON.stringify(item.toolArgs) });
+            const source = new EventSource(`/api/subscribe?${params}`);
+            let state = null;
+            source.onmessage = (event) => {
+                const message = JSON.parse(event.data);
+                if (message.type === 'snapshot') {
+                    state = message.data;
+                } else if (message.type === 'delta' && state) {
+                    applyDelta(state, message);
+                } else if (message.type === 'error') {
+                    console.error(`Live update failed for ${item.toolName}:`, message.content);
+                    return;
+                }
+                const element = dashboardItems.children[index];
+                if (element && state) {
+                    element.querySelector('.api-response pre').textContent = JSON.stringify(state, null, 2);
+                }
+            };
+            liveSources.push(source);
+        });
+        goLiveButton.textContent = 'Stop Live';
+    }
+
+    function stopLive() {
+        liveSources.forEach(source => source.close());
+        liveSources = [];
+        goLiveButton.textContent = 'Go Live';
+    }
+
+    function applyDelta(state, delta) {
+        const rows = Array.isArray(state) ? state : state.data;
+        const key = delta.key_field;
+        const removed = new Set(delta.removed);
+        const changed = new Map(delta.changed.map(row => [String(row[key]), row]));
+        const updated = rows
+            .filter(row => !removed.has(String(row[key])))
+            .map(row => {
+                const replacement = changed.get(String(row[key]));
+                changed.delete(String(row[key]));
+                return replacement || row;
+            })
+            .concat([...changed.values()]);
+        rows.splice(0, rows.length, ...updated);
     }
 
     function toggleChatWindow(chatWindow) {
@@ -85,7 +193,10 @@ document.addEventListener('DOMContentLoaded', () => {
                 headers: {
                     'Content-Type': 'application/x-www-form-urlencoded',
                 },
-                body: new URLSearchParams({ query: description })
+                // With the widget's call attached the server binds its live data into the spec
+                body: new URLSearchParams(item.toolName && item.toolArgs
+                    ? { query: description, tool_name: item.toolName, args: JSON.stringify(item.toolArgs) }
+                    : { query: description })
             });
 
             if (!response.ok) {
@@ -0,0 +1,143 @@
+import os
+import asyncio
+import logging
+from tool_cache import ToolResultCache
+from api_response_manager import api_response_manager
+from response_storage import split_rows
+from serialization import sse, dumps
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = float(os.getenv("SUBSCRIPTION_POLL_INTERVAL", "15"))
+HEARTBEAT_INTERVAL = float(os.getenv("SUBSCRIPTION_HEARTBEAT_INTERVAL", "20"))
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("SUBSCRIPTION_QUEUE_SIZE", "32"))
+# Fields that identify a row across polls, in order of preference
+ROW_KEY_FIELDS = ("option_symbol", "id", "date")
+
+
+def row_key_field(rows):
+    for field in ROW_KEY_FIELDS:
+        values = [row.get(field) for row in rows]
+        if None not in values and len(set(map(str, values))) == len(values):
+            return field
+    return None
+
+
+class Topic:
+    def __init__(self, tool_name, args):
+        self.tool_name = tool_name
+        self.args = args
+        self.queues = set()
+        self.task = None
+        self.snapshot = None
+        self.encoded = None
+        self.envelope = None
+        self.key_field = None
+        self.rows = {}
+        self.polls = 0
+
+
+class SubscriptionHub:
+    """One upstream poller per distinct (tool_name, args), fanned out over SSE.
+
+    The first subscriber to a call starts its poller and the last one to leave
+    stops it. New subscribers get the latest full snapshot straight away;
+    after that only rows that changed (matched on ROW_KEY_FIELDS) or were
+    removed are sent. A subscriber that falls too far behind is resynced
+    with a fresh snapshot instead of being sent every delta it missed.
+    """
+
+    def __init__(self, tool_manager, poll_interval=POLL_INTERVAL):
+        self.tool_manager = tool_manager
+        self.poll_interval = poll_interval
+        self.topics = {}
+
+    async def subscribe(self, tool_name, args):
+        key = ToolResultCache.make_key(tool_name, args)
+        topic = self.topics.get(key)
+        if topic is None:
+            topic = self.topics[key] = Topic(tool_name, args)
+            topic.task = asyncio.ensure_future(self.poll(topic))
+            logger.info(f"Started poller for {key}")
+        queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+        if topic.snapshot is not None:
+            queue.put_nowait(topic.snapshot)
+        topic.queues.add(queue)
+        try:
+            while True:
+                try:
+                    frame = await asyncio.wait_for(queue.get(), HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    # Comment frame so proxies don't close an idle stream
+                    frame = b": keepalive\n\n"
+                yield frame
+        finally:
+            topic.queues.discard(queue)
+            if not topic.queues and self.topics.get(key) is topic:
+                topic.task.cancel()
+                del self.topics[key]
+                logger.info(f"Stopped poller for {key} after {topic.polls} polls")
+
+    async def poll(self, topic):
+        while True:
+            try:
+                # Past the cache, or polls inside the tool's cache_ttl would just replay the last result
+                output = await self.tool_manager.execute_tool(topic.tool_name, topic.args, refresh=True)
+                payload = await asyncio.to_thread(api_response_manager.resolve, output)
+                self.publish(topic, payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error polling {topic.tool_name}: {str(e)}")
+                self.broadcast(topic, sse({'type': 'error', 'content': str(e)}))
+            topic.polls += 1
+            await asyncio.sleep(self.poll_interval)
+
+    def publish(self, topic, payload):
+        split = split_rows(payload)
+        key_field = row_key_field(split[1]) if split else None
+        if key_field is None:
+            encoded = dumps(payload)
+            if encoded != topic.encoded:
+                topic.encoded = encoded
+                topic.snapshot = sse({'type': 'snapshot', 'key_field': None}, raw={'data': encoded})
+                self.broadcast(topic, topic.snapshot)
+            return
+
+        rows_key, rows, envelope = split
+        encoded_rows = {str(row[key_field]): dumps(row) for row in rows}
+        first = topic.snapshot is None or topic.key_field != key_field or envelope != topic.envelope
+        changed = [row_key for row_key, encoded in encoded_rows.items() if topic.rows.get(row_key) != encoded]
+        removed = [row_key for row_key in topic.rows if row_key not in encoded_rows]
+        if not first and not changed and not removed:
+            return
+        topic.rows = encoded_rows
+        topic.key_field = key_field
+        topic.envelope = envelope
+        topic.snapshot = sse({'type': 'snapshot', 'key_field': key_field}, raw={'data': dumps(payload)})
+        if first:
+            self.broadcast(topic, topic.snapshot)
+            return
+        changed_rows = b"[" + b",".join(encoded_rows[row_key] for row_key in changed) + b"]"
+        self.broadcast(topic, sse({'type': 'delta', 'key_field': key_field, 'removed': removed},
+                                  raw={'changed': changed_rows}))
+
+    def broadcast(self, topic, frame):
+        for queue in list(topic.queues):
+            try:
+                queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(topic.snapshot or frame)
+
+    def stats(self):
+        return {
+            key: {"subscribers": len(topic.queues), "polls": topic.polls}
+            for key, topic in self.topics.items()
+        }
+
+    async def close(self):
+        for topic in list(self.topics.values()):
+            topic.task.cancel()
+        self.topics.clear()
@@ -0,0 +1,129 @@
+import os
+import asyncio
+import threading
+from types import SimpleNamespace
+import openai
+import httpx
+import pytest
+
+# The OpenAI client is created at import time; no request is made here
+os.environ.setdefault("OPENAI_API_KEY", "test")
+import assistant_registry
+import chat_runner
+from assistant_registry import AssistantRegistry
+from chat_runner import ChatRunner
+
+TOOLS = [{"type": "function", "function": {"name": "get_quote", "parameters": {}}}]
+
+
+def not_found():
+    response = httpx.Response(404, request=httpx.Request("POST", "https://api.openai.com/v1/threads/runs"))
+    return openai.NotFoundError("No assistant found", response=response, body=None)
+
+
+@pytest.fixture
+def created(monkeypatch):
+    created = []
+
+    async def create_assistant(tools):
+        # Slow enough that a second worker would also miss without the file lock
+        await asyncio.sleep(0.05)
+        created.append(f"asst_{len(created) + 1}")
+        return SimpleNamespace(id=created[-1])
+
+    async def update_assistant(assistant_id, tools):
+        raise not_found()
+
+    monkeypatch.setattr(assistant_registry, "create_assistant", create_assistant)
+    monkeypatch.setattr(assistant_registry, "update_assistant", update_assistant)
+    return created
+
+
+def test_workers_that_miss_together_create_one_assistant(tmp_path, created):
+    path = str(tmp_path / "registry.json")
+    # One registry per worker process, each with its own event loop
+    workers = [AssistantRegistry(path) for _ in range(2)]
+    ids = []
+    threads = [threading.Thread(target=lambda r=registry: ids.append(asyncio.run(r.get_assistant_id(TOOLS))))
+               for registry in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert created == ["asst_1"]
+    assert ids == ["asst_1", "asst_1"]
+    assert AssistantRegistry(path).data["assistants"] == {assistant_registry.fingerprint(TOOLS): "asst_1"}
+
+
+def test_replace_drops_the_stale_id_once(tmp_path, created):
+    path = str(tmp_path / "registry.json")
+    first, second = AssistantRegistry(path), AssistantRegistry(path)
+
+    async def scenario():
+        stale = await first.get_assistant_id(TOOLS)
+        await second.get_assistant_id(TOOLS)
+        replaced = await first.replace(stale, TOOLS)
+        # The other worker hits the same missing assistant and picks up the replacement
+        assert await second.replace(stale, TOOLS) == replaced
+        return stale, replaced
+
+    assert asyncio.run(scenario()) == ("asst_1", "asst_2")
+    assert created == ["asst_1", "asst_2"]
+    assert AssistantRegistry(path).data["assistants"] == {assistant_registry.fingerprint(TOOLS): "asst_2"}
+
+
+class FakeTools:
+    def get_available_tools(self):
+        return TOOLS
+
+
+def test_run_on_a_deleted_assistant_recreates_it(tmp_path, created, monkeypatch):
+    registry = AssistantRegistry(str(tmp_path / "registry.json"))
+    started = []
+
+    async def run_assistant(assistant_id, thread_id):
+        if assistant_id == "asst_1":
+            raise not_found()
+        started.append(assistant_id)
+        return SimpleNamespace(id="run_1", status="queued")
+
+    async def assistant_exists(assistant_id):
+        return assistant_id != "asst_1"
+
+    async def poll_events(self, thread_id, run_id):
+        yield run_id
+
+    monkeypatch.setattr(chat_runner, "run_assistant", run_assistant)
+    monkeypatch.setattr(chat_runner, "assistant_exists", assistant_exists)
+    monkeypatch.setattr(ChatRunner, "poll_events", poll_events)
+    runner = ChatRunner(FakeTools(), mode="poll", assistant_registry=registry)
+
+    async def scenario():
+        assistant_id = await registry.get_assistant_id(TOOLS)
+        return [event async for event in runner.events(assistant_id, "thread_1")]
+
+    assert asyncio.run(scenario()) == ["run_1"]
+    assert started == ["asst_2"]
+    assert registry.data["assistants"] == {assistant_registry.fingerprint(TOOLS): "asst_2"}
+
+
+def test_missing_thread_is_not_blamed_on_the_assistant(tmp_path, created, monkeypatch):
+    registry = AssistantRegistry(str(tmp_path / "registry.json"))
+
+    async def run_assistant(assistant_id, thread_id):
+        raise not_found()
+
+    async def assistant_exists(assistant_id):
+        return True
+
+    monkeypatch.setattr(chat_runner, "run_assistant", run_assistant)
+    monkeypatch.setattr(chat_runner, "assistant_exists", assistant_exists)
+    runner = ChatRunner(FakeTools(), mode="poll", assistant_registry=registry)
+
+    async def scenario():
+        assistant_id = await registry.get_assistant_id(TOOLS)
+        return [event async for event in runner.events(assistant_id, "thread_gone")]
+
+    with pytest.raises(openai.NotFoundError):
+        asyncio.run(scenario())
+    assert created == ["asst_1"]
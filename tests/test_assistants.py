@@ -0,0 +1,98 @@
+import os
+import json
+import asyncio
+from types import SimpleNamespace
+import httpx
+import pytest
+
+# The OpenAI client is created at import time; no request is made here
+os.environ.setdefault("OPENAI_API_KEY", "test")
+import assistants
+import chat_runner
+from chat_runner import ChatRunner
+from openai import AsyncOpenAI
+
+
+@pytest.fixture
+def openai_requests(monkeypatch):
+    """Point the shared client at an in-process transport and record what it sends."""
+    seen = []
+
+    def handler(request):
+        seen.append((request.method, request.url.path, json.loads(request.content or b"null")))
+        path = request.url.path
+        if path.endswith("/assistants/asst_gone"):
+            return httpx.Response(404, json={"error": {"message": "No assistant found", "type": "invalid_request_error"}})
+        if path.endswith("/assistants/asst_1"):
+            return httpx.Response(200, json={"id": "asst_1", "object": "assistant"})
+        if path.endswith("/runs"):
+            return httpx.Response(200, json={"id": "run_1", "object": "thread.run", "status": "queued"})
+        if path.endswith("/messages"):
+            return httpx.Response(200, json={"object": "list", "data": [
+                {"id": "msg_1", "object": "thread.message", "content": [{"type": "text", "text": {"value": "Hello", "annotations": []}}]}]})
+        return httpx.Response(500, json={})
+
+    client = AsyncOpenAI(api_key="test", base_url="http://openai.test/v1", max_retries=0,
+                         http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(assistants, "client", client)
+    return seen
+
+
+def test_calls_go_through_the_async_client(openai_requests):
+    async def scenario():
+        run = await assistants.run_assistant("asst_1", "thread_1")
+        return run, await assistants.get_assistant_response("thread_1")
+
+    run, response = asyncio.run(scenario())
+    assert (run.id, run.status) == ("run_1", "queued")
+    assert response == "Hello"
+    assert openai_requests[0] == ("POST", "/v1/threads/thread_1/runs", {"assistant_id": "asst_1"})
+
+
+def test_assistant_exists(openai_requests):
+    async def scenario():
+        return await assistants.assistant_exists("asst_1"), await assistants.assistant_exists("asst_gone")
+
+    assert asyncio.run(scenario()) == (True, False)
+
+
+def test_polling_backs_off_and_relays_the_answer(monkeypatch):
+    statuses = iter(["queued", "queued", "in_progress", "in_progress", "in_progress", "completed"])
+    delays = []
+
+    async def get_run_status(thread_id, run_id):
+        return SimpleNamespace(id=run_id, status=next(statuses))
+
+    async def get_assistant_response(thread_id):
+        return "Done"
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(chat_runner, "get_run_status", get_run_status)
+    monkeypatch.setattr(chat_runner, "get_assistant_response", get_assistant_response)
+    monkeypatch.setattr(chat_runner.asyncio, "sleep", sleep)
+    monkeypatch.setattr(chat_runner, "POLL_INITIAL_DELAY", 0.2)
+    monkeypatch.setattr(chat_runner, "POLL_BACKOFF", 2.0)
+    monkeypatch.setattr(chat_runner, "POLL_MAX_DELAY", 0.5)
+
+    async def scenario():
+        return [frame async for frame in ChatRunner(None, mode="poll").poll_events("thread_1", "run_1")]
+
+    frames = asyncio.run(scenario())
+    assert [json.loads(frame[len(b"data: "):]) for frame in frames] == [{"type": "assistant_message", "content": "Done"}]
+    # Restarts from the initial delay whenever the status changes
+    assert delays == [0.2, 0.4, 0.2, 0.4, 0.5]
+
+
+def test_a_failed_run_ends_with_an_error_frame(monkeypatch):
+    async def get_run_status(thread_id, run_id):
+        return SimpleNamespace(id=run_id, status="failed", last_error="rate_limit_exceeded")
+
+    monkeypatch.setattr(chat_runner, "get_run_status", get_run_status)
+
+    async def scenario():
+        return [frame async for frame in ChatRunner(None, mode="poll").poll_events("thread_1", "run_1")]
+
+    frame, = asyncio.run(scenario())
+    assert json.loads(frame[len(b"data: "):]) == {"type": "error", "content": "Run failed with status: failed, Error: rate_limit_exceeded"}
@@ -0,0 +1,75 @@
+import json
+import asyncio
+from batch_refresh import dedupe, refresh_batch
+from tool_manager import ToolNotFoundError
+from serialization import dumps_text
+
+
+class FakeTools:
+    def __init__(self, delays=None):
+        self.delays = delays or {}
+        self.calls = []
+        self.running = 0
+        self.peak = 0
+
+    async def execute_tool(self, name, args):
+        self.calls.append((name, args))
+        if name == "missing":
+            raise ToolNotFoundError(name)
+        if name == "broken":
+            raise RuntimeError("upstream down")
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delays.get(args.get("ticker"), 0))
+        finally:
+            self.running -= 1
+        return dumps_text({"ticker": args.get("ticker")})
+
+
+def collect(tools, calls, concurrency=8):
+    async def scenario():
+        return [json.loads(line) async for line in refresh_batch(tools, calls, concurrency)]
+
+    return asyncio.run(scenario())
+
+
+def test_identical_calls_are_grouped_regardless_of_key_order_and_nulls():
+    calls = [("quote", {"ticker": "A", "limit": None}), ("quote", {"ticker": "B"}), ("quote", {"ticker": "A"})]
+    assert dedupe(calls) == [("quote", {"ticker": "A", "limit": None}, [0, 2]), ("quote", {"ticker": "B"}, [1])]
+
+
+def test_records_stream_in_completion_order_with_each_call_run_once():
+    tools = FakeTools({"SLOW": 0.05})
+    records = collect(tools, [("quote", {"ticker": "SLOW"}), ("quote", {"ticker": "FAST"}), ("quote", {"ticker": "SLOW"})])
+    assert records == [
+        {"indices": [1], "tool_name": "quote", "args": {"ticker": "FAST"}, "output": {"ticker": "FAST"}},
+        {"indices": [0, 2], "tool_name": "quote", "args": {"ticker": "SLOW"}, "output": {"ticker": "SLOW"}},
+    ]
+    assert len(tools.calls) == 2
+
+
+def test_failures_become_error_records():
+    records = collect(FakeTools(), [("missing", {}), ("broken", {})])
+    outputs = {record["tool_name"]: record["output"] for record in records}
+    assert outputs == {"missing": {"error": "Tool not found"}, "broken": {"error": "upstream down"}}
+
+
+def test_concurrency_is_bounded():
+    tools = FakeTools({f"T{index}": 0.01 for index in range(6)})
+    collect(tools, [("quote", {"ticker": f"T{index}"}) for index in range(6)], concurrency=2)
+    assert tools.peak == 2
+
+
+def test_closing_the_stream_cancels_outstanding_calls():
+    tools = FakeTools({"FAST": 0, "SLOW": 10})
+
+    async def scenario():
+        stream = refresh_batch(tools, [("quote", {"ticker": "FAST"}), ("quote", {"ticker": "SLOW"})])
+        first = await stream.__anext__()
+        await stream.aclose()
+        await asyncio.sleep(0)
+        return first
+
+    assert json.loads(asyncio.run(scenario()))["args"] == {"ticker": "FAST"}
+    assert tools.running == 0
@@ -0,0 +1,60 @@
+import datetime
+import pytest
+from zoneinfo import ZoneInfo
+from cache_warmer import CacheWarmer, CronSchedule, parse_cron_field, parse_schedule
+from chain_snapshots import chain_snapshots
+from option_chain import OptionChain
+
+NEW_YORK = ZoneInfo("America/New_York")
+
+
+@pytest.mark.parametrize("text, low, high, expected", [
+    ("*", 0, 6, set(range(7))),
+    ("5", 0, 59, {5}),
+    ("1-5", 0, 6, {1, 2, 3, 4, 5}),
+    ("*/15", 0, 59, {0, 15, 30, 45}),
+    ("10-20/5", 0, 59, {10, 15, 20}),
+    ("1,3,5-6", 0, 6, {1, 3, 5, 6}),
+    ("7", 0, 6, {0}),
+    ("0", 0, 6, {0}),
+    ("5-7", 0, 6, {5, 6, 0}),
+])
+def test_parse_cron_field(text, low, high, expected):
+    assert parse_cron_field(text, low, high) == expected
+
+
+@pytest.mark.parametrize("text, low, high", [("60", 0, 59), ("8", 0, 6), ("5-3", 0, 6), ("0", 1, 31), ("24", 0, 23)])
+def test_parse_cron_field_rejects_out_of_range(text, low, high):
+    with pytest.raises(ValueError):
+        parse_cron_field(text, low, high)
+
+
+def test_cron_expression_needs_five_fields():
+    with pytest.raises(ValueError):
+        CronSchedule("0 9 * *")
+
+
+def test_sunday_as_seven_fires_on_sunday():
+    schedule = CronSchedule("0 9 * * 7")
+    # Friday 2026-10-16 -> Sunday 2026-10-18 09:00
+    assert schedule.next_after(datetime.datetime(2026, 10, 16, 12, 0)) == datetime.datetime(2026, 10, 18, 9, 0)
+
+
+def test_next_run_takes_the_earliest_schedule():
+    warmer = CacheWarmer(None, watchlist="spy", schedule="30 8 * * 1-5; */5 9-15 * * 1-5")
+    friday_close = datetime.datetime(2026, 10, 16, 15, 57, tzinfo=NEW_YORK)
+    assert warmer.next_run(friday_close) == datetime.datetime(2026, 10, 19, 8, 30, tzinfo=NEW_YORK)
+    monday_premarket = datetime.datetime(2026, 10, 19, 8, 31, tzinfo=NEW_YORK)
+    assert warmer.next_run(monday_premarket) == datetime.datetime(2026, 10, 19, 9, 0, tzinfo=NEW_YORK)
+    assert [schedule.expression for schedule in parse_schedule(" ; 0 9 * * 1 ;")] == ["0 9 * * 1"]
+
+
+def test_top_contracts_skip_contracts_without_volume():
+    chain = OptionChain.from_rows([
+        {"option_symbol": "ZZZ240119C00180000", "volume": None},
+        {"option_symbol": "ZZZ240119P00180000", "volume": 4},
+        {"option_symbol": "ZZZ240119C00185000", "volume": 9},
+    ])
+    chain_snapshots.put("ZZZ", chain)
+    warmer = CacheWarmer(None, watchlist="ZZZ", history_contracts=2)
+    assert warmer.top_contracts("ZZZ") == ["ZZZ240119C00185000", "ZZZ240119P00180000"]
@@ -0,0 +1,139 @@
+import os
+import json
+import asyncio
+from types import SimpleNamespace
+import pytest
+
+# The OpenAI client is created at import time; no request is made here
+os.environ.setdefault("OPENAI_API_KEY", "test")
+import chat_runner
+from chat_runner import ChatRunner, ActiveRun
+
+
+@pytest.fixture
+def patched(monkeypatch):
+    created = []
+
+    async def broken_stream(assistant_id, thread_id):
+        raise ConnectionError("stream dropped")
+
+    async def run_assistant(assistant_id, thread_id):
+        created.append(thread_id)
+        return SimpleNamespace(id="run_new", status="queued")
+
+    async def poll_events(self, thread_id, run_id):
+        yield run_id
+
+    monkeypatch.setattr(chat_runner, "stream_run", broken_stream)
+    monkeypatch.setattr(chat_runner, "run_assistant", run_assistant)
+    monkeypatch.setattr(ChatRunner, "poll_events", poll_events)
+    return ChatRunner(tool_manager=None), created
+
+
+def fallback(runner, monkeypatch, latest):
+    async def get_latest_run(thread_id):
+        return latest
+
+    monkeypatch.setattr(chat_runner, "get_latest_run", get_latest_run)
+
+    async def scenario():
+        active = ActiveRun("thread_1")
+        return [event async for event in runner.stream_events("asst_1", "thread_1", active)], active
+
+    return asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("status", ["queued", "in_progress", "requires_action"])
+def test_fallback_resumes_a_run_the_stream_created(patched, monkeypatch, status):
+    runner, created = patched
+    events, active = fallback(runner, monkeypatch, SimpleNamespace(id="run_1", status=status))
+    assert events == ["run_1"]
+    assert active.run_id == "run_1"
+    assert created == []
+
+
+@pytest.mark.parametrize("latest", [None, SimpleNamespace(id="run_0", status="completed"),
+                                    SimpleNamespace(id="run_0", status="failed")])
+def test_fallback_starts_a_run_when_none_is_active(patched, monkeypatch, latest):
+    runner, created = patched
+    events, active = fallback(runner, monkeypatch, latest)
+    assert events == ["run_new"]
+    assert active.run_id == "run_new"
+    assert created == ["thread_1"]
+
+
+class SlowTools:
+    def __init__(self, delays):
+        self.delays = delays
+        self.running = 0
+        self.peak = 0
+        self.finished = []
+
+    async def execute_tool(self, name, args):
+        if name == "missing":
+            raise chat_runner.ToolNotFoundError(name)
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delays[args["ticker"]])
+        finally:
+            self.running -= 1
+        self.finished.append(args["ticker"])
+        return chat_runner.dumps_text({"ticker": args["ticker"]})
+
+    def get_compaction_config(self, name):
+        return {}
+
+
+def tool_call(call_id, ticker, name="get_quote"):
+    return SimpleNamespace(id=call_id, function=SimpleNamespace(name=name, arguments=json.dumps({"ticker": ticker})))
+
+
+def frame_payload(frame):
+    return json.loads(frame.decode("utf-8")[len("data: "):])
+
+
+def test_tool_calls_run_concurrently_and_are_submitted_in_call_order():
+    tools = SlowTools({"SLOW": 0.05, "MID": 0.02, "FAST": 0})
+    runner = ChatRunner(tools, tool_concurrency=2)
+    calls = [tool_call("call_1", "SLOW"), tool_call("call_2", "MID"), tool_call("call_3", "FAST")]
+    outputs = []
+
+    async def scenario():
+        return [frame_payload(frame) async for frame in runner.run_tool_calls(calls, outputs)]
+
+    frames = asyncio.run(scenario())
+    # Frames go out as calls finish; the third call waits for a free slot
+    assert [frame["args"]["ticker"] for frame in frames] == ["MID", "FAST", "SLOW"]
+    assert frames[0] == {"type": "tool_output", "name": "get_quote", "args": {"ticker": "MID"}, "output": {"ticker": "MID"}}
+    assert tools.peak == 2
+    assert [output["tool_call_id"] for output in outputs] == ["call_1", "call_2", "call_3"]
+    assert [json.loads(output["output"])["ticker"] for output in outputs] == ["SLOW", "MID", "FAST"]
+
+
+def test_unknown_tools_answer_with_an_error_output():
+    outputs = []
+
+    async def scenario():
+        return [frame_payload(frame) async for frame in
+                ChatRunner(SlowTools({})).run_tool_calls([tool_call("call_1", "X", name="missing")], outputs)]
+
+    assert asyncio.run(scenario())[0]["output"] == {"error": "Tool not found"}
+    assert json.loads(outputs[0]["output"]) == {"error": "Tool not found"}
+
+
+def test_closing_early_cancels_outstanding_tool_calls():
+    tools = SlowTools({"FAST": 0, "SLOW": 10})
+    runner = ChatRunner(tools)
+    outputs = []
+
+    async def scenario():
+        frames = runner.run_tool_calls([tool_call("call_1", "SLOW"), tool_call("call_2", "FAST")], outputs)
+        await frames.__anext__()
+        await frames.aclose()
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert tools.finished == ["FAST"]
+    assert tools.running == 0
+    assert outputs == []
@@ -0,0 +1,59 @@
+import json
+import pytest
+from compaction import compact_output, rows_top, chain_top
+from option_chain import OptionChain
+
+ROWS = [{"option_symbol": f"AAPL{index:03d}", "volume": index, "total_premium": 1000 - index * 10, "date": f"2024-01-{index + 1:02d}"}
+        for index in range(20)]
+CONFIG = {"token_budget": 300, "top_k": 3, "sort_key": "volume"}
+
+
+def top(output):
+    return json.loads(output)["top"]
+
+
+def test_small_outputs_pass_through():
+    output = json.dumps({"data": ROWS[:1]})
+    assert compact_output(output, CONFIG) == output
+
+
+def test_top_rows_follow_the_config_sort_key_without_an_order():
+    digest = top(compact_output(json.dumps({"data": ROWS}), CONFIG, {"ticker": "AAPL"}))
+    assert digest["sort_key"] == "volume"
+    assert [row["volume"] for row in digest["rows"]] == [19, 18, 17]
+
+
+def test_top_rows_follow_the_calls_order_and_direction():
+    digest = top(compact_output(json.dumps({"data": ROWS}), CONFIG, {"order": "volume", "order_direction": "asc"}))
+    assert digest["order_direction"] == "asc"
+    assert [row["volume"] for row in digest["rows"]] == [0, 1, 2]
+
+
+def test_order_aliases_map_to_columns():
+    digest = top(compact_output(json.dumps({"data": ROWS}), CONFIG, {"order": "premium"}))
+    assert [row["total_premium"] for row in digest["rows"]] == [1000, 990, 980]
+
+
+def test_text_columns_sort_in_the_requested_direction():
+    digest = top(compact_output(json.dumps({"data": ROWS}), CONFIG, {"order": "date", "order_direction": "asc"}))
+    assert [row["date"] for row in digest["rows"]] == ["2024-01-01", "2024-01-02", "2024-01-03"]
+
+
+@pytest.mark.parametrize("descending, expected", [(True, ["100", "10", "9", None]), (False, ["9", "10", "100", None])])
+def test_rows_top_sorts_numeric_strings_as_numbers_and_missing_values_last(descending, expected):
+    rows = [{"premium": value} for value in ["9", "10", None, "100"]]
+    assert [row["premium"] for row in rows_top(rows, "premium", descending, None, 4)] == expected
+
+
+def test_rows_top_finds_the_sort_key_past_a_first_row_without_it():
+    rows = [{"id": 0}, {"id": 1, "volume": 3}, {"id": 2, "volume": 7}]
+    assert [row["id"] for row in rows_top(rows, "volume", True, None, 3)] == [2, 1, 0]
+
+
+def test_chain_top_skips_contracts_without_a_value():
+    chain = OptionChain.from_rows([
+        {"option_symbol": "AAPL240119C00180000", "volume": None},
+        {"option_symbol": "AAPL240119P00180000", "volume": 4},
+        {"option_symbol": "AAPL240119C00185000", "volume": 9},
+    ])
+    assert [row["volume"] for row in chain_top(chain, "volume", True, ["option_symbol", "volume"], 2)] == [9, 4]
@@ -0,0 +1,17 @@
+from component_specs import normalize_query, spec_key
+
+
+def test_filler_words_case_and_plurals_are_ignored():
+    assert normalize_query("Show me the NVDA call volume chart") == normalize_query("nvda call volumes chart")
+    assert normalize_query("Display open interest for SPY") == "open interest spy"
+
+
+def test_word_order_is_kept():
+    assert normalize_query("call volume vs put open interest") != normalize_query("put volume vs call open interest")
+    assert spec_key("call volume vs put open interest") != spec_key("put volume vs call open interest")
+
+
+def test_key_depends_on_the_source_columns_and_model():
+    assert spec_key("nvda volume", ["volume", "date"]) == spec_key("NVDA volumes", ["date", "volume"])
+    assert spec_key("nvda volume", ["volume"]) != spec_key("nvda volume", ["volume", "date"])
+    assert spec_key("nvda volume", model="a") != spec_key("nvda volume", model="b")
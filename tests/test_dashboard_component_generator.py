@@ -0,0 +1,66 @@
+import os
+import json
+import asyncio
+import threading
+from types import SimpleNamespace
+import pytest
+
+# The OpenAI client is created at import time; no request is made here
+os.environ.setdefault("OPENAI_API_KEY", "test")
+import assistants
+from component_specs import ComponentSpecCache
+from tool_plugins import dashboard_component_generator
+from tool_plugins.dashboard_component_generator import DashboardComponentGenerator
+
+SPEC = {"type": "metric", "title": "NVDA volume", "id": "nvda_volume", "data": {"value": 1}}
+
+
+class SpyCache(ComponentSpecCache):
+    def __init__(self, path):
+        super().__init__(path)
+        self.threads = []
+
+    def get(self, key):
+        self.threads.append(threading.get_ident())
+        return super().get(key)
+
+    def put(self, key, spec):
+        self.threads.append(threading.get_ident())
+        super().put(key, spec)
+
+
+class FakeCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, model, messages):
+        self.calls += 1
+        content = f"```json\n{json.dumps(SPEC)}\n```"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+@pytest.fixture
+def generator(monkeypatch, tmp_path):
+    cache = SpyCache(str(tmp_path / "component_cache.json"))
+    completions = FakeCompletions()
+    monkeypatch.setattr(dashboard_component_generator, "component_spec_cache", cache)
+    monkeypatch.setattr(assistants, "client", SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+    return DashboardComponentGenerator(), cache, completions
+
+
+def test_aexecute_generates_once_and_keeps_the_cache_off_the_event_loop(generator):
+    tool, cache, completions = generator
+
+    async def scenario():
+        loop_thread = threading.get_ident()
+        first = await tool.aexecute("Show me the NVDA volume metric")
+        second = await tool.aexecute("nvda volume metric")
+        return loop_thread, first, second
+
+    loop_thread, first, second = asyncio.run(scenario())
+    assert json.loads(first) == json.loads(second) == SPEC
+    assert completions.calls == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+    # get (miss), put, get (hit)
+    assert len(cache.threads) == 3
+    assert loop_thread not in cache.threads
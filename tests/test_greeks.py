@@ -0,0 +1,84 @@
+import datetime
+import numpy as np
+import pytest
+import greeks
+from option_chain import OptionChain
+
+# Hull, Options, Futures, and Other Derivatives: S=49, K=50, r=5%, vol=20%, 20 weeks
+HULL = dict(spot=49.0, strike=np.array([50.0]), years=20 / 52, vol=0.2, rate=0.05)
+
+
+def test_norm_cdf_matches_known_values():
+    assert greeks.norm_cdf(np.array([0.0, 1.0, -1.96])) == pytest.approx([0.5, 0.841345, 0.024998], abs=1e-6)
+
+
+def test_textbook_prices():
+    # Hull example 15.6: S=42, K=40, r=10%, vol=20%, six months
+    prices = greeks.price(np.array([True, False]), 42.0, 40.0, 0.5, 0.2, rate=0.1)
+    assert prices == pytest.approx([4.76, 0.81], abs=0.005)
+
+
+def test_textbook_greeks():
+    call = greeks.black_scholes(np.array([True]), **HULL)
+    assert call["price"][0] == pytest.approx(2.40, abs=0.005)
+    assert call["delta"][0] == pytest.approx(0.522, abs=0.0005)
+    assert call["gamma"][0] == pytest.approx(0.066, abs=0.0005)
+    # Per 1% of volatility and rate, per calendar day
+    assert call["vega"][0] == pytest.approx(0.121, abs=0.0005)
+    assert call["rho"][0] == pytest.approx(0.0891, abs=0.00005)
+    assert call["theta"][0] * 365 == pytest.approx(-4.31, abs=0.005)
+
+
+def test_put_call_parity_and_put_greeks():
+    call, put = (greeks.black_scholes(np.array([is_call]), **HULL) for is_call in (True, False))
+    forward = HULL["spot"] - HULL["strike"][0] * np.exp(-HULL["rate"] * HULL["years"])
+    assert call["price"][0] - put["price"][0] == pytest.approx(forward, abs=1e-6)
+    assert call["delta"][0] - put["delta"][0] == pytest.approx(1.0, abs=1e-6)
+    assert put["gamma"][0] == pytest.approx(call["gamma"][0])
+    assert put["vega"][0] == pytest.approx(call["vega"][0])
+
+
+def test_implied_volatility_recovers_its_input():
+    is_call = np.array([True, False, True, False, True])
+    strike = np.array([80.0, 90.0, 100.0, 110.0, 130.0])
+    years = np.array([0.05, 0.25, 0.5, 1.0, 2.0])
+    vol = np.array([0.15, 0.35, 0.2, 0.6, 1.2])
+    prices = greeks.price(is_call, 100.0, strike, years, vol, rate=0.03)
+    solved = greeks.implied_volatility(prices, is_call, 100.0, strike, years, rate=0.03)
+    # Within what the normal CDF approximation allows for a deep in-the-money, short-dated call
+    assert solved == pytest.approx(vol, abs=1e-4)
+    assert greeks.price(is_call, 100.0, strike, years, solved, rate=0.03) == pytest.approx(prices, abs=1e-5)
+
+
+def test_implied_volatility_is_nan_below_intrinsic_value():
+    iv = greeks.implied_volatility(np.array([5.0]), np.array([True]), 120.0, np.array([100.0]), np.array([0.5]))
+    assert np.isnan(iv[0])
+
+
+def test_years_to_expiry_counts_to_the_close_and_drops_expired():
+    expiry = np.array(["2024-01-05", "2024-01-02", "2024-01-01", "NaT"], dtype="datetime64[D]")
+    years = greeks.years_to_expiry(expiry, datetime.datetime(2024, 1, 2, 10, 0))
+    assert years[0] == pytest.approx((3 * 24 + 6) / (365 * 24))
+    assert years[1] == pytest.approx(6 / (365 * 24))
+    assert np.isnan(years[2]) and np.isnan(years[3])
+
+
+def test_analyze_solves_missing_ivs_from_mid_prices():
+    now = datetime.datetime(2024, 1, 2, 16, 0)
+    years = greeks.years_to_expiry(np.array(["2024-02-16"], dtype="datetime64[D]"), now)[0]
+    rows = []
+    for strike in (95, 100, 105):
+        for side, is_call in (("C", True), ("P", False)):
+            mid = float(greeks.price(np.array([is_call]), 100.0, float(strike), years, 0.3)[0])
+            rows.append({"option_symbol": f"XYZ240216{side}{strike * 1000:08d}", "nbbo_bid": mid - 0.01, "nbbo_ask": mid + 0.01,
+                         "volume": strike, "open_interest": 10, "implied_volatility": None})
+    result = greeks.analyze(OptionChain.from_rows(rows), 100.0, now=now)
+    assert result["contracts"] == 6
+    assert result["iv_solved"] == 6
+    profile = result["expiries"][0]
+    assert profile["atm_strike"] == 100
+    assert profile["atm_iv"] == pytest.approx(0.3, abs=1e-3)
+    busiest = result["top_contracts"][0]
+    assert busiest["option_symbol"] == "XYZ240216C00105000"
+    expected = greeks.black_scholes(np.array([True]), 100.0, np.array([105.0]), years, 0.3)
+    assert busiest["delta"] == pytest.approx(expected["delta"][0], abs=1e-3)
@@ -0,0 +1,63 @@
+import os
+import re
+import glob
+from types import SimpleNamespace
+import pytest
+from benchmarks import load_test
+from benchmarks.load_test import percentile, parse_mix, Results, tree_snapshot
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_parse_mix():
+    assert parse_mix("chat=1,refresh=3,response=0") == {"chat": 1.0, "refresh": 3.0}
+    assert parse_mix("chat") == {"chat": 1.0}
+    with pytest.raises(ValueError):
+        parse_mix("chat=1,upload=2")
+
+
+def test_report_percentiles_in_milliseconds():
+    assert percentile([], 0.5) is None
+    results = Results()
+    for seconds in (0.1, 0.2, 0.3, 0.4):
+        results.record("refresh", seconds)
+    results.record("refresh", 9.0, ok=False)
+    results.record("chat", 1.0, ok=False)
+    chat, refresh = results.report(elapsed=2.0)
+    assert chat == {"scenario": "chat", "requests": 0, "errors": 1, "rps": 0.0,
+                    "p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    assert (refresh["requests"], refresh["errors"], refresh["rps"]) == (4, 1, 2.0)
+    assert refresh["p50_ms"] == pytest.approx(300)
+    assert refresh["max_ms"] == pytest.approx(400)
+
+
+def test_tree_snapshot_sees_ignored_files_but_not_git_or_bytecode(tmp_path):
+    for path in ("a.py", "data/responses.db", ".git/index", "__pycache__/a.pyc"):
+        (tmp_path / path).parent.mkdir(exist_ok=True)
+        (tmp_path / path).write_text("x")
+    before = tree_snapshot(str(tmp_path))
+    assert sorted(before) == ["a.py", os.path.join("data", "responses.db")]
+    (tmp_path / "data" / "responses.db").write_text("xy")
+    assert tree_snapshot(str(tmp_path)) != before
+
+
+def test_servers_write_only_to_the_workdir(tmp_path, monkeypatch):
+    started = []
+
+    def popen(args, **kwargs):
+        started.append((args, kwargs.get("env")))
+        return SimpleNamespace()
+
+    monkeypatch.setattr(load_test.subprocess, "Popen", popen)
+    options = SimpleNamespace(openai_port=1, uw_port=2, app_port=3, workers=2)
+    load_test.start_servers(options, str(tmp_path))
+    env = started[-1][1]
+    assert started[-1][0][2] == "uvicorn"
+    # Every path the app reads from the environment, so a new one can't be forgotten here
+    names = set()
+    for path in glob.glob(os.path.join(ROOT, "*.py")) + glob.glob(os.path.join(ROOT, "tool_plugins", "*.py")):
+        with open(path) as f:
+            names.update(re.findall(r'os\.getenv\("([A-Z_]+(?:_FILE|_DB|_DIR))"', f.read()))
+    assert names
+    for name in names:
+        assert env[name].startswith(str(tmp_path)), name
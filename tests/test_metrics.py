@@ -0,0 +1,68 @@
+import asyncio
+import pytest
+from metrics import (
+    Registry, Counter, Gauge, Histogram, METRICS_PREFIX, CHAT_REQUESTS, STAGE_SECONDS,
+    endpoint_label, new_trace_id, traced_stream)
+
+
+def test_counter_and_gauge_render_in_text_format():
+    registry = Registry()
+    calls = registry.register(Counter("calls", "Calls.", ["tool", "outcome"]))
+    active = registry.register(Gauge("active", "Active."))
+    calls.inc(tool="get_quote", outcome="ok")
+    calls.inc(2, tool='say "hi"\n', outcome="error")
+    active.set(3)
+    assert registry.render().splitlines() == [
+        f"# HELP {METRICS_PREFIX}_calls Calls.",
+        f"# TYPE {METRICS_PREFIX}_calls counter",
+        f'{METRICS_PREFIX}_calls_total{{tool="get_quote",outcome="ok"}} 1',
+        f'{METRICS_PREFIX}_calls_total{{tool="say \\"hi\\"\\n",outcome="error"}} 2',
+        f"# HELP {METRICS_PREFIX}_active Active.",
+        f"# TYPE {METRICS_PREFIX}_active gauge",
+        f"{METRICS_PREFIX}_active 3",
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    latency = Histogram("latency", "Latency.", ["stage"], buckets=(1.0, 0.1))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, stage="run")
+    assert latency.render()[2:] == [
+        f'{METRICS_PREFIX}_latency_bucket{{stage="run",le="0.1"}} 2',
+        f'{METRICS_PREFIX}_latency_bucket{{stage="run",le="1.0"}} 3',
+        f'{METRICS_PREFIX}_latency_bucket{{stage="run",le="+Inf"}} 4',
+        f'{METRICS_PREFIX}_latency_sum{{stage="run"}} 3.65',
+        f'{METRICS_PREFIX}_latency_count{{stage="run"}} 4',
+    ]
+
+
+def test_labels_must_match():
+    with pytest.raises(ValueError):
+        Counter("calls", "Calls.", ["tool"]).inc(outcome="ok")
+
+
+def test_endpoint_label_folds_ids():
+    assert endpoint_label("/api/stock/NVDA/option-contracts") == "/api/stock/{id}/option-contracts"
+    assert endpoint_label("api/option-contract/NVDA240119C00500000/historic") == "/api/option-contract/{id}/historic"
+    assert endpoint_label("/api/market/economic-calendar") == "/api/market/economic-calendar"
+
+
+def test_trace_ids_are_reused_only_when_well_formed():
+    assert new_trace_id("abc-123") == "abc-123"
+    generated = new_trace_id("bad id\n")
+    assert generated != "bad id\n" and len(generated) == 16
+
+
+def test_traced_stream_stamps_frames_and_counts_the_outcome():
+    async def frames():
+        yield b'data: {"type":"assistant_delta","content":"hi"}\n\n'
+        yield b'data: {"type":"error","content":"boom"}\n\n'
+
+    async def scenario():
+        return [frame async for frame in traced_stream(frames(), "t1", 0.0, endpoint="test")]
+
+    errors = CHAT_REQUESTS.series.get(("error",), 0)
+    relayed = asyncio.run(scenario())
+    assert relayed[0] == b'data: {"trace_id":"t1","type":"assistant_delta","content":"hi"}\n\n'
+    assert CHAT_REQUESTS.series[("error",)] == errors + 1
+    assert STAGE_SECONDS.series[("test_total",)][-1] > 0
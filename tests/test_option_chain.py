@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from option_chain import OptionChain
+
+ROWS = [
+    {"option_symbol": "AAPL240119C00180000", "volume": 5, "implied_volatility": "0.25", "tape_time": "2024-01-02"},
+    {"option_symbol": "AAPL240119P00180000", "volume": None, "implied_volatility": None, "tape_time": None},
+    {"option_symbol": "AAPL240216C00190000", "volume": 9, "implied_volatility": "0.31", "tape_time": "2024-01-03"},
+    {"option_symbol": "AAPL240216P00190000", "volume": 5, "implied_volatility": "0.25", "tape_time": "2024-01-01"},
+    {"option_symbol": "AAPL240119C00185000", "volume": 2, "implied_volatility": None, "tape_time": "2024-01-02"},
+]
+
+
+@pytest.fixture
+def chain():
+    return OptionChain.from_payload({"data": ROWS, "date": "2024-01-02"})
+
+
+def test_columns_are_typed_and_symbols_parsed(chain):
+    assert chain.columns["volume"].dtype == np.float64
+    assert chain.columns["implied_volatility"].dtype == np.float64
+    assert chain.columns["tape_time"].dtype.kind == "S"
+    assert chain.underlying.tolist() == [b"AAPL"] * 5
+    assert chain.is_call.tolist() == [True, False, True, False, True]
+    assert chain.strike.tolist() == [180.0, 180.0, 190.0, 190.0, 185.0]
+    assert str(chain.expiry[2]) == "2024-02-16"
+
+
+def test_payload_and_bytes_round_trip(chain):
+    payload = chain.to_payload()
+    assert payload["date"] == "2024-01-02"
+    assert [row["volume"] for row in payload["data"]] == [5, None, 9, 5, 2]
+    assert payload["data"][1]["tape_time"] == ""
+    restored = OptionChain.from_bytes(chain.to_bytes())
+    assert restored.to_payload() == payload
+    assert restored.strike.tolist() == chain.strike.tolist()
+
+
+def test_from_rows_rejects_non_contract_rows():
+    with pytest.raises(ValueError):
+        OptionChain.from_rows([{"date": "2024-01-02", "close": 1.0}])
+
+
+@pytest.mark.parametrize("name", ["volume", "implied_volatility", "tape_time"])
+def test_missing_values_sort_last_in_both_directions(chain, name):
+    ascending = chain.sort_indices(name).tolist()
+    descending = chain.sort_indices(name, descending=True).tolist()
+    missing = [index for index, row in enumerate(ROWS) if row[name] is None]
+    assert ascending[len(ROWS) - len(missing):] == missing
+    assert descending[len(ROWS) - len(missing):] == missing
+
+
+def test_descending_keeps_ties_in_original_order(chain):
+    assert chain.sort_indices("volume", descending=True).tolist() == [2, 0, 3, 4, 1]
+    assert chain.sort_indices("volume").tolist() == [4, 0, 3, 2, 1]
+    assert chain.sort_indices("tape_time", descending=True).tolist() == [2, 0, 4, 3, 1]
+
+
+def test_sort_within_a_subset(chain):
+    subset = np.array([1, 2, 3])
+    assert chain.sort_indices("volume", descending=True, indices=subset).tolist() == [2, 3, 1]
+
+
+def test_page_sorts_before_slicing(chain):
+    total, rows = chain.page(limit=2, fields=["option_symbol", "volume"], sort="volume", descending=True)
+    assert total == 5
+    assert rows == [{"option_symbol": "AAPL240216C00190000", "volume": 9}, {"option_symbol": "AAPL240119C00180000", "volume": 5}]
+    assert chain.page(offset=4, sort="volume", descending=True)[1][0]["volume"] is None
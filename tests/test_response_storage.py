@@ -0,0 +1,116 @@
+import json
+import time
+import sqlite3
+import pytest
+import response_storage
+from api_response_manager import APIResponseManager
+from response_storage import FileResponseStorage, SQLiteResponseStorage
+
+ROWS = [
+    {"id": 0, "premium": "26956833.00", "sweep": True, "legs": {"strike": 180}},
+    {"id": 1, "premium": 9.5, "sweep": False, "legs": None},
+    {"id": 2, "premium": "n/a", "sweep": True},
+    {"id": 3, "premium": 100, "sweep": False},
+    {"id": 4, "sweep": True},
+    {"id": 5, "premium": "-", "sweep": False},
+    {"id": 6, "premium": 9.5, "sweep": True},
+]
+
+
+ROW_TEXTS = [json.dumps(row).encode("utf-8") for row in ROWS]
+DOCUMENT = {"data": ROWS, "date": "2024-01-02"}
+
+
+@pytest.fixture(params=["file", "sqlite"])
+def storage(request, tmp_path, monkeypatch):
+    # Small blocks so pages and streams cross block boundaries
+    monkeypatch.setattr(response_storage, "ROW_BLOCK_ROWS", 3)
+    if request.param == "file":
+        storage = FileResponseStorage(str(tmp_path))
+    else:
+        storage = SQLiteResponseStorage(str(tmp_path / "responses.db"))
+    storage.put_rows("r", b'{"date": "2024-01-02"}', "data", ROW_TEXTS)
+    yield storage
+    storage.close()
+
+
+def page(storage, **kwargs):
+    total, rows = storage.get_rows("r", **kwargs)
+    assert total == len(ROWS)
+    return [json.loads(row) for row in rows]
+
+
+def test_projection_keeps_json_types(storage):
+    assert page(storage, limit=2, fields=["sweep", "legs", "missing"]) == [
+        {"sweep": True, "legs": {"strike": 180}, "missing": None},
+        {"sweep": False, "legs": None, "missing": None},
+    ]
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_sort_orders_numbers_then_text_then_missing(storage, descending):
+    ids = [row["id"] for row in page(storage, sort="premium", descending=descending, fields=["id"])]
+    # Missing values stay last and equal values keep their original order in both directions
+    assert ids == ([0, 3, 1, 6, 2, 5, 4] if descending else [1, 6, 3, 0, 5, 2, 4])
+
+
+@pytest.mark.parametrize("offset, limit", [(0, None), (2, 3), (3, 3), (5, 10), (7, 2)])
+def test_unsorted_pages_across_blocks(storage, offset, limit):
+    end = None if limit is None else offset + limit
+    assert page(storage, offset=offset, limit=limit) == ROWS[offset:end]
+
+
+def test_full_document_and_stream_match(storage):
+    assert json.loads(storage.get("r")) == DOCUMENT
+    assert json.loads(b"".join(storage.iter_chunks("r"))) == DOCUMENT
+
+
+def test_offset_and_limit_apply_after_sorting(storage):
+    assert [row["id"] for row in page(storage, sort="premium", offset=2, limit=2, fields=["id"])] == [3, 0]
+
+
+def test_workers_see_ids_once_they_are_handed_out_without_waiting_on_misses(tmp_path):
+    path = str(tmp_path / "shared.db")
+    writer = SQLiteResponseStorage(path, commit_interval=60)
+    reader = SQLiteResponseStorage(path, commit_interval=60)
+    manager = APIResponseManager(str(tmp_path), storage=writer)
+    try:
+        started = time.perf_counter()
+        assert reader.get_format("missing") is None
+        assert time.perf_counter() - started < 0.1
+        # Handed out while the writer's batch would otherwise stay open for a minute
+        reference = manager.format_large_response({"data": [{"id": 1}]})
+        assert reader.get_format(reference["id"]) == "rows"
+        assert json.loads(reader.get(reference["id"])) == {"data": [{"id": 1}]}
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_rows_are_stored_compressed(tmp_path):
+    storage = SQLiteResponseStorage(str(tmp_path / "responses.db"))
+    storage.put_rows("r", None, "data", [json.dumps({"option_symbol": f"AAPL240119C{index:08d}", "volume": index}).encode("utf-8")
+                                         for index in range(2000)])
+    stats = storage.stats()
+    storage.close()
+    assert stats["stored_bytes"] * 4 < stats["raw_bytes"]
+
+
+def test_rows_from_the_uncompressed_layout_are_migrated(tmp_path):
+    path = str(tmp_path / "responses.db")
+    SQLiteResponseStorage(path).close()
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("DROP TABLE row_blocks")
+    conn.execute("CREATE TABLE rows (hash TEXT NOT NULL, idx INTEGER NOT NULL, row TEXT NOT NULL, PRIMARY KEY (hash, idx)) WITHOUT ROWID")
+    conn.execute("INSERT INTO blobs (hash, data, size, stored_size, rows_key, row_count, format) VALUES ('h', ?, 0, 0, 'data', ?, 'rows')",
+                 (response_storage.zlib.compress(b'{"date": "2024-01-02"}'), len(ROWS)))
+    conn.executemany("INSERT INTO rows (hash, idx, row) VALUES ('h', ?, ?)", [(index, text.decode("utf-8")) for index, text in enumerate(ROW_TEXTS)])
+    conn.execute("INSERT INTO responses (id, hash, created_at, expires_at) VALUES ('r', 'h', 0, NULL)")
+    conn.close()
+    storage = SQLiteResponseStorage(path)
+    try:
+        assert json.loads(storage.get("r")) == DOCUMENT
+        assert [json.loads(row)["id"] for row in storage.get_rows("r", 2, 2)[1]] == [2, 3]
+        assert not storage.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'rows'").fetchone()
+    finally:
+        storage.close()
@@ -0,0 +1,213 @@
+import json
+import asyncio
+import pytest
+from metrics import RUNS_CANCELLED
+from run_control import AdmissionController, AdmissionRejected, Ticket, supervise, run_in_background, background_tasks
+
+
+def cancelled(reason):
+    return RUNS_CANCELLED.series.get((reason,), 0)
+
+
+def test_waiters_are_admitted_in_order():
+    async def scenario():
+        controller = AdmissionController(max_active=1, max_per_session=1, max_queued=8, timeout=1)
+        first = await controller.acquire("a")
+        waiters = [asyncio.ensure_future(controller.acquire(key)) for key in ("b", "c")]
+        await asyncio.sleep(0)
+        assert controller.stats()["queued"] == 2
+        first.release()
+        second = await waiters[0]
+        assert not waiters[1].done()
+        second.release()
+        third = await waiters[1]
+        assert controller.stats()["active"] == 1
+        third.release()
+        assert (controller.active, len(controller.waiters), controller.sessions) == (0, 0, {})
+
+    asyncio.run(scenario())
+
+
+def test_release_skips_waiters_still_over_their_session_cap():
+    async def scenario():
+        controller = AdmissionController(max_active=2, max_per_session=1, max_queued=8, timeout=1)
+        a = await controller.acquire("a")
+        b = await controller.acquire("b")
+        same_session = asyncio.ensure_future(controller.acquire("a"))
+        other = asyncio.ensure_future(controller.acquire("c"))
+        await asyncio.sleep(0)
+        b.release()
+        c = await other
+        assert not same_session.done()
+        a.release()
+        (await same_session).release()
+        c.release()
+        assert controller.stats()["active"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_expired_wait_is_503_when_the_worker_is_full():
+    async def scenario():
+        controller = AdmissionController(max_active=1, max_per_session=1, max_queued=8, timeout=0.01)
+        ticket = await controller.acquire("a")
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire("b")
+        assert controller.stats()["queued"] == 0
+        ticket.release()
+        return rejected.value
+
+    rejected = asyncio.run(scenario())
+    assert rejected.status_code == 503
+    assert rejected.retry_after == 0.01
+
+
+def test_session_cap_is_429_when_the_worker_has_room():
+    async def scenario():
+        controller = AdmissionController(max_active=4, max_per_session=1, max_queued=8, timeout=0.01)
+        ticket = await controller.acquire("a")
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire("a")
+        ticket.release()
+        return rejected.value
+
+    assert asyncio.run(scenario()).status_code == 429
+
+
+def test_full_queue_is_rejected_without_waiting():
+    async def scenario():
+        controller = AdmissionController(max_active=1, max_per_session=1, max_queued=0, timeout=10)
+        ticket = await controller.acquire("a")
+        with pytest.raises(AdmissionRejected) as rejected:
+            await asyncio.wait_for(controller.acquire("b"), 1)
+        ticket.release()
+        return rejected.value
+
+    assert asyncio.run(scenario()).status_code == 503
+
+
+def test_waiter_cancelled_as_it_is_admitted_hands_the_slot_on():
+    async def scenario():
+        controller = AdmissionController(max_active=1, max_per_session=1, max_queued=8, timeout=1)
+        first = await controller.acquire("a")
+        admitted = asyncio.ensure_future(controller.acquire("b"))
+        next_in_line = asyncio.ensure_future(controller.acquire("c"))
+        await asyncio.sleep(0)
+        # Admit "b", then cancel it before it gets to run
+        first.release()
+        admitted.cancel()
+        result = (await asyncio.gather(admitted, return_exceptions=True))[0]
+        if isinstance(result, Ticket):
+            # Python versions whose wait_for returns a result that arrived with the cancellation
+            result.release()
+        else:
+            assert isinstance(result, asyncio.CancelledError)
+        (await asyncio.wait_for(next_in_line, 1)).release()
+        assert controller.stats()["active"] == 0
+
+    asyncio.run(scenario())
+
+
+class FakeRequest:
+    def __init__(self):
+        self.disconnected = False
+
+    async def is_disconnected(self):
+        return self.disconnected
+
+
+def producer(state, frames=(), error=None):
+    async def generate():
+        try:
+            for frame in frames:
+                yield frame
+            if error:
+                raise error
+            await asyncio.sleep(10)
+            yield b"never"
+        finally:
+            state["closed"] = True
+    return generate()
+
+
+async def admitted():
+    controller = AdmissionController(max_active=1, max_per_session=1, max_queued=0, timeout=1)
+    return controller, await controller.acquire("a")
+
+
+def test_supervise_relays_frames_until_the_producer_ends():
+    async def scenario():
+        controller, ticket = await admitted()
+
+        async def frames():
+            yield b"one"
+            yield b"two"
+
+        before = {reason: cancelled(reason) for reason in ("disconnect", "deadline", "error")}
+        relayed = [frame async for frame in supervise(FakeRequest(), frames(), ticket, deadline=1, interval=0.01)]
+        assert relayed == [b"one", b"two"]
+        assert controller.stats()["active"] == 0
+        assert {reason: cancelled(reason) for reason in before} == before
+
+    asyncio.run(scenario())
+
+
+def test_supervise_cancels_the_producer_on_disconnect():
+    async def scenario():
+        controller, ticket = await admitted()
+        request, state = FakeRequest(), {}
+        before = cancelled("disconnect")
+        relayed = []
+        async for frame in supervise(request, producer(state, [b"one"]), ticket, deadline=5, interval=0.01):
+            relayed.append(frame)
+            request.disconnected = True
+        await asyncio.sleep(0.01)
+        assert relayed == [b"one"]
+        assert state.get("closed")
+        assert controller.stats()["active"] == 0
+        assert cancelled("disconnect") == before + 1
+
+    asyncio.run(scenario())
+
+
+def test_supervise_stops_at_the_deadline_with_an_error_frame():
+    async def scenario():
+        controller, ticket = await admitted()
+        state = {}
+        before = cancelled("deadline")
+        relayed = [frame async for frame in supervise(FakeRequest(), producer(state), ticket, deadline=0.05, interval=0.01)]
+        await asyncio.sleep(0.01)
+        assert len(relayed) == 1
+        assert json.loads(relayed[0].decode("utf-8")[len("data: "):])["type"] == "error"
+        assert state.get("closed")
+        assert controller.stats()["active"] == 0
+        assert cancelled("deadline") == before + 1
+
+    asyncio.run(scenario())
+
+
+def test_supervise_counts_a_failed_producer_as_an_error():
+    async def scenario():
+        controller, ticket = await admitted()
+        before = {reason: cancelled(reason) for reason in ("disconnect", "error")}
+        with pytest.raises(RuntimeError):
+            async for _ in supervise(FakeRequest(), producer({}, [b"one"], RuntimeError("boom")), ticket, deadline=5, interval=0.01):
+                pass
+        assert controller.stats()["active"] == 0
+        assert cancelled("error") == before["error"] + 1
+        assert cancelled("disconnect") == before["disconnect"]
+
+    asyncio.run(scenario())
+
+
+def test_background_tasks_are_held_until_done():
+    async def scenario():
+        release = asyncio.Event()
+        task = run_in_background(release.wait())
+        assert task in background_tasks
+        release.set()
+        await task
+        await asyncio.sleep(0)
+        assert task not in background_tasks
+
+    asyncio.run(scenario())
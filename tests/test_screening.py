@@ -0,0 +1,71 @@
+import datetime
+import screening
+from chain_snapshots import ChainSnapshot
+from option_chain import OptionChain
+
+TODAY = datetime.date(2024, 1, 2)
+
+
+def snapshot(ticker, rows, spot=100.0):
+    return ChainSnapshot(ticker, OptionChain.from_rows(rows), 0.0, spot=spot)
+
+
+def contract(symbol, volume, open_interest, premium):
+    return {"option_symbol": symbol, "volume": volume, "open_interest": open_interest, "total_premium": premium}
+
+
+AAPL = snapshot("AAPL", [
+    contract("AAPL240119C00110000", 50, 10, "5000.00"),
+    contract("AAPL240119P00110000", 20, 40, None),
+    contract("AAPL240216C00090000", 80, 100, "12000.00"),
+    contract("AAPL240119C00105000", None, 5, "5000.00"),
+    contract("AAPL240301P00095000", 10, 1, "800.00"),
+])
+
+
+def symbols(chain):
+    return [symbol.decode("ascii") for symbol in chain.column("option_symbol").tolist()]
+
+
+def test_supports_only_ticker_scoped_local_params():
+    assert screening.supports({"ticker_symbol": "AAPL", "min_dte": 1})
+    assert not screening.supports({"min_dte": 1})
+    assert not screening.supports({"ticker_symbol": "AAPL", "sectors[]": ["Technology"]})
+    assert screening.supports({"ticker_symbol": "AAPL", "order": "premium"}, AAPL.chain)
+    assert not screening.supports({"ticker_symbol": "AAPL", "order": "bid_ask_vol"}, AAPL.chain)
+
+
+def test_filters_combine():
+    result = screening.screen(AAPL, {"ticker_symbol": "AAPL", "is_otm": True, "max_dte": 30, "min_volume": 10}, TODAY)
+    assert symbols(result) == ["AAPL240119C00110000"]
+    assert result.column("dte").tolist() == [17]
+    assert result.column("diff").tolist() == [0.1]
+
+
+def test_vol_greater_oi():
+    result = screening.screen(AAPL, {"ticker_symbol": "AAPL", "vol_greater_oi": True}, TODAY)
+    assert symbols(result) == ["AAPL240119C00110000", "AAPL240301P00095000"]
+
+
+def test_moneyness_filters_need_a_spot():
+    assert screening.screen(snapshot("AAPL", [contract("AAPL240119C00110000", 1, 1, "1")], spot=None),
+                            {"ticker_symbol": "AAPL", "is_otm": True}, TODAY) is None
+
+
+def test_missing_values_sort_last_in_either_direction():
+    descending = screening.screen(AAPL, {"ticker_symbol": "AAPL", "order": "premium"}, TODAY)
+    assert symbols(descending) == ["AAPL240216C00090000", "AAPL240119C00110000", "AAPL240119C00105000",
+                                   "AAPL240301P00095000", "AAPL240119P00110000"]
+    ascending = screening.screen(AAPL, {"ticker_symbol": "AAPL", "order": "volume", "order_direction": "asc"}, TODAY)
+    assert symbols(ascending)[-1] == "AAPL240119C00105000"
+
+
+def test_merge_reorders_across_tickers_with_missing_values_last():
+    msft = snapshot("MSFT", [
+        contract("MSFT240119C00110000", None, 1, "1.00"),
+        contract("MSFT240119P00110000", 60, 1, "1.00"),
+    ])
+    params = {"ticker_symbol": "AAPL,MSFT", "order": "volume"}
+    merged = screening.merge([screening.screen(AAPL, params, TODAY), screening.screen(msft, params, TODAY)], params)
+    assert symbols(merged)[:3] == ["AAPL240216C00090000", "MSFT240119P00110000", "AAPL240119C00110000"]
+    assert set(symbols(merged)[-2:]) == {"AAPL240119C00105000", "MSFT240119C00110000"}
@@ -0,0 +1,57 @@
+import json
+import numpy as np
+import pytest
+import serialization
+from serialization import JSONText, dumps, loads, dumps_text, encode_bounded, encoded, splice, sse, ndjson, output_frame
+
+BACKENDS = ["json"] + (["orjson"] if serialization.orjson else [])
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, monkeypatch):
+    monkeypatch.setattr(serialization, "JSON_BACKEND", request.param)
+    return request.param
+
+
+def test_json_text_carries_its_bytes(backend):
+    text = dumps_text({"ticker": "NVDA", "note": "é"})
+    assert isinstance(text, str)
+    assert json.loads(text) == {"ticker": "NVDA", "note": "é"}
+    assert encoded(text) is text.encoded
+    assert loads(text) == {"ticker": "NVDA", "note": "é"}
+    assert encoded("plain") == b"plain"
+
+
+def test_wide_integers_fall_back_to_the_json_module(backend):
+    assert loads(dumps({"big": 2 ** 70})) == {"big": 2 ** 70}
+
+
+def test_numpy_values_encode_with_orjson(monkeypatch):
+    if serialization.orjson is None:
+        pytest.skip("orjson is not installed")
+    monkeypatch.setattr(serialization, "JSON_BACKEND", "orjson")
+    assert loads(dumps({"values": np.array([1.5, 2.0]), 1: "x"})) == {"values": [1.5, 2.0], "1": "x"}
+
+
+@pytest.mark.parametrize("limit, fits", [(100, True), (10, False)])
+def test_encode_bounded(backend, limit, fits):
+    data, result = encode_bounded({"rows": [1, 2, 3]}, limit)
+    assert result is fits
+    if fits or backend == "orjson":
+        assert json.loads(data) == {"rows": [1, 2, 3]}
+    else:
+        assert data is None
+
+
+def test_splice_inserts_raw_values_without_reencoding(backend):
+    assert json.loads(splice({"type": "tool_output"}, {"output": b'{"a":1}'})) == {"type": "tool_output", "output": {"a": 1}}
+    assert json.loads(splice({}, {"output": b"[1]"})) == {"output": [1]}
+    assert sse({"type": "x"}).startswith(b"data: {") and sse({"type": "x"}).endswith(b"}\n\n")
+    assert ndjson({"a": 1}).endswith(b"}\n")
+
+
+def test_output_frame_handles_every_output_kind(backend):
+    text = dumps_text({"a": 1})
+    assert output_frame(text) is text.encoded
+    assert json.loads(output_frame('{"b": 2}')) == {"b": 2}
+    assert json.loads(output_frame("not json")) == "not json"
@@ -0,0 +1,33 @@
+import json
+import asyncio
+from subscriptions import SubscriptionHub
+
+
+class FakeToolManager:
+    def __init__(self):
+        self.calls = []
+
+    async def execute_tool(self, name, args, refresh=False):
+        self.calls.append(refresh)
+        return json.dumps({"data": [{"id": 1, "volume": len(self.calls)}]})
+
+
+def frame_payload(frame):
+    return json.loads(frame.decode("utf-8")[len("data: "):])
+
+
+def test_polls_bypass_the_tool_cache_and_stream_deltas():
+    async def scenario():
+        tool_manager = FakeToolManager()
+        hub = SubscriptionHub(tool_manager, poll_interval=0.01)
+        frames = hub.subscribe("get_option_contracts", {"ticker": "AAPL"})
+        snapshot = frame_payload(await frames.__anext__())
+        delta = frame_payload(await frames.__anext__())
+        await frames.aclose()
+        await hub.close()
+        assert snapshot["type"] == "snapshot"
+        assert delta["type"] == "delta"
+        assert delta["changed"] == [{"id": 1, "volume": 2}]
+        assert tool_manager.calls and all(tool_manager.calls)
+
+    asyncio.run(scenario())
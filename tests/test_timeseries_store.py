@@ -0,0 +1,70 @@
+import os
+import pytest
+from timeseries_store import TimeSeriesStore, TEXT_WIDTH
+
+
+def history(*days, note="x"):
+    return {"chains": [{"date": f"2024-06-{day:02d}", "volume": day * 10, "note": note} for day in days]}
+
+
+def test_append_merges_and_rewrites_last_day(tmp_path):
+    store = TimeSeriesStore(root=str(tmp_path))
+    store.append("C1", history(1, 2, 3))
+    store.append("C1", {"chains": [{"date": "2024-06-03", "volume": 99, "note": "x"},
+                                   {"date": "2024-06-04", "volume": 40, "note": "x"}]})
+    rows = store.query("C1")["chains"]
+    assert [row["date"] for row in rows] == ["2024-06-01", "2024-06-02", "2024-06-03", "2024-06-04"]
+    assert rows[2]["volume"] == 99
+    assert [row["date"] for row in store.query("C1", "2024-06-02", "2024-06-03")["chains"]] == ["2024-06-02", "2024-06-03"]
+
+
+def test_reader_with_older_meta_still_maps_after_rewrite(tmp_path):
+    store = TimeSeriesStore(root=str(tmp_path))
+    store.append("C1", history(1, 2, 3, 3))
+    old_meta = store.meta("C1")
+    # The last day comes back as a single row, so the committed count shrinks
+    store.append("C1", {"chains": [{"date": "2024-06-03", "volume": 7, "note": "x"}]})
+    assert store.meta("C1")["count"] == old_meta["count"] - 1
+    columns = store._columns(store._dir("C1"), old_meta)
+    assert len(columns["date"]) == old_meta["count"]
+    assert store.query("C1")["chains"][-1]["volume"] == 7
+
+
+def test_text_columns_are_sized_from_the_data(tmp_path):
+    store = TimeSeriesStore(root=str(tmp_path))
+    long_note = "n" * (TEXT_WIDTH * 2)
+    store.append("C1", history(1, note=long_note))
+    assert store.query("C1")["chains"][0]["note"] == long_note
+
+
+def test_text_longer_than_the_column_is_rejected_without_partial_writes(tmp_path):
+    store = TimeSeriesStore(root=str(tmp_path))
+    store.append("C1", history(1, 2))
+    with pytest.raises(ValueError):
+        store.append("C1", {"chains": [{"date": "2024-06-02", "volume": 5, "note": "n" * (TEXT_WIDTH + 1)}]})
+    assert store.query("C1")["chains"][-1] == {"date": "2024-06-02", "volume": 20, "note": "x"}
+
+
+@pytest.mark.parametrize("payload", [[], {"chains": []}])
+def test_first_append_without_rows_is_rejected(tmp_path, payload):
+    store = TimeSeriesStore(root=str(tmp_path))
+    with pytest.raises(ValueError):
+        store.append("C1", payload)
+    assert store.meta("C1") is None
+
+
+def test_empty_append_after_history_keeps_it(tmp_path):
+    store = TimeSeriesStore(root=str(tmp_path))
+    store.append("C1", history(1, 2))
+    store.append("C1", {"chains": []})
+    assert [row["date"] for row in store.query("C1")["chains"]] == ["2024-06-01", "2024-06-02"]
+
+
+def test_query_of_a_history_without_columns_is_empty(tmp_path):
+    store = TimeSeriesStore(root=str(tmp_path))
+    path = tmp_path / "C1"
+    path.mkdir()
+    store._write_meta(str(path), {"columns": {}, "count": 0, "last_date": None, "rows_key": None, "refreshed_at": 0})
+    assert store.query("C1") == []
+    assert store.query("C1", "2024-06-01", "2024-06-30") == []
+    assert sorted(os.listdir(path)) == ["meta.json"]
@@ -0,0 +1,106 @@
+import asyncio
+import pytest
+from tool_cache import ToolResultCache
+
+
+def test_concurrent_calls_share_one_execution():
+    async def scenario():
+        cache = ToolResultCache()
+        calls = 0
+
+        async def execute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "out", True
+
+        results = await asyncio.gather(*[cache.get_or_execute("tool", {"a": 1}, 30, execute) for _ in range(5)])
+        assert results == ["out"] * 5
+        assert calls == 1
+        assert cache.stats()["coalesced"] == 4
+        # Cached now
+        assert await cache.get_or_execute("tool", {"a": 1}, 30, execute) == "out"
+        assert calls == 1
+
+    asyncio.run(scenario())
+
+
+def test_uncacheable_results_are_shared_but_not_cached():
+    async def scenario():
+        cache = ToolResultCache()
+        calls = 0
+
+        async def execute():
+            nonlocal calls
+            calls += 1
+            return '{"error":"upstream"}', False
+
+        await cache.get_or_execute("tool", {}, 30, execute)
+        await cache.get_or_execute("tool", {}, 30, execute)
+        assert calls == 2
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_leader_hands_execution_to_waiters():
+    async def scenario():
+        cache = ToolResultCache()
+        started = asyncio.Event()
+        calls = 0
+
+        async def execute():
+            nonlocal calls
+            calls += 1
+            started.set()
+            await asyncio.sleep(0.05)
+            return f"out{calls}", True
+
+        leader = asyncio.ensure_future(cache.get_or_execute("tool", {}, 30, execute))
+        await started.wait()
+        waiters = [asyncio.ensure_future(cache.get_or_execute("tool", {}, 30, execute)) for _ in range(3)]
+        await asyncio.sleep(0)
+        # e.g. the leader's client disconnected
+        leader.cancel()
+        results = await asyncio.gather(*waiters)
+        assert leader.cancelled()
+        # One waiter re-ran the tool and the others joined it
+        assert results == ["out2"] * 3
+        assert calls == 2
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_is_cancelled():
+    async def scenario():
+        cache = ToolResultCache()
+
+        async def execute():
+            await asyncio.sleep(0.05)
+            return "out", True
+
+        leader = asyncio.ensure_future(cache.get_or_execute("tool", {}, 30, execute))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(cache.get_or_execute("tool", {}, 30, execute))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert await leader == "out"
+
+    asyncio.run(scenario())
+
+
+def test_refresh_skips_the_cached_value():
+    async def scenario():
+        cache = ToolResultCache()
+        outputs = iter(["first", "second"])
+
+        async def execute():
+            return next(outputs), True
+
+        assert await cache.get_or_execute("tool", {}, 30, execute) == "first"
+        assert await cache.get_or_execute("tool", {}, 30, execute) == "first"
+        assert await cache.get_or_execute("tool", {}, 30, execute, refresh=True) == "second"
+        assert await cache.get_or_execute("tool", {}, 30, execute) == "second"
+
+    asyncio.run(scenario())
@@ -0,0 +1,192 @@
+import os
+import sys
+import json
+import asyncio
+import pytest
+import tool_manager
+from tool_manager import ToolManager, LazyTool
+from tool_registry import SQLiteToolRegistry
+
+PLUGIN = '''
+from tool_plugins.base_tool import BaseTool
+
+with open({log!r}, "a") as f:
+    f.write("{name}\\n")
+
+class Probe(BaseTool):
+    def execute(self, value=None):
+        return {{"tool": "{name}", "version": {version}, "value": value}}
+
+    def get_schema(self):
+        return {{"type": "object", "properties": {{"value": {{"type": "string"}}}}}}
+
+    def get_description(self):
+        return "{name} v{version}"
+'''
+
+
+class Plugins:
+    """A plugin directory of trusted probe tools that log every import."""
+
+    def __init__(self, root):
+        self.dir = root / "plugins"
+        self.dir.mkdir()
+        self.log = str(root / "imports.log")
+        self.registry_db = str(root / "registry.db")
+        self.config = {}
+
+    def write(self, name, version=1, enabled=True):
+        path = self.dir / f"{name}.py"
+        path.write_text(PLUGIN.format(log=self.log, name=name, version=version))
+        # Rewrites within one mtime tick must still look changed
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + version * 1_000_000))
+        self.configure(name, enabled=enabled)
+
+    def configure(self, name, **options):
+        self.config[name] = {"trusted": True, **options}
+        config_path = self.dir / "tools_config.json"
+        config_path.write_text(json.dumps(self.config))
+        stat = os.stat(config_path)
+        os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    def imports(self):
+        try:
+            with open(self.log) as f:
+                return f.read().split()
+        except FileNotFoundError:
+            return []
+
+    def manager(self, lazy=True):
+        return ToolManager(str(self.dir), lazy=lazy, registry=SQLiteToolRegistry(self.registry_db))
+
+
+@pytest.fixture
+def plugins(tmp_path, monkeypatch):
+    monkeypatch.setattr(tool_manager, "MANIFEST_FILE", None)
+    monkeypatch.setattr(sys, "path", list(sys.path))
+    return Plugins(tmp_path)
+
+
+def run(manager, name, **args):
+    return json.loads(str(asyncio.run(manager.execute_tool(name, args))))
+
+
+def test_first_start_imports_and_writes_the_manifest(plugins):
+    plugins.write("probe_manifest_a")
+    plugins.write("probe_manifest_b")
+    manager = plugins.manager()
+    assert plugins.imports() == ["probe_manifest_a", "probe_manifest_b"]
+    manifest = json.loads((plugins.dir / "tool_manifest.json").read_text())
+    assert manifest["probe_manifest_a"]["class"] == "Probe"
+    assert manifest["probe_manifest_a"]["description"] == "probe_manifest_a v1"
+    assert not any(isinstance(tool, LazyTool) for tool in manager.tools.values())
+
+
+def test_restart_serves_schemas_from_the_manifest_and_imports_on_first_use(plugins):
+    plugins.write("probe_lazy")
+    schemas = plugins.manager().get_available_tools()
+    restarted = plugins.manager()
+    assert plugins.imports() == ["probe_lazy"]
+    assert restarted.get_available_tools() == schemas
+    assert isinstance(restarted.get_tool("probe_lazy"), LazyTool)
+    assert run(restarted, "probe_lazy", value="x") == {"tool": "probe_lazy", "version": 1, "value": "x"}
+    assert plugins.imports() == ["probe_lazy", "probe_lazy"]
+    assert not isinstance(restarted.get_tool("probe_lazy"), LazyTool)
+    assert restarted.get_load_report()["tools"]["probe_lazy"]["imported"]
+
+
+def test_a_plugin_changed_since_the_manifest_is_imported(plugins):
+    plugins.write("probe_stale")
+    plugins.manager()
+    plugins.write("probe_stale", version=2)
+    restarted = plugins.manager()
+    assert plugins.imports() == ["probe_stale", "probe_stale"]
+    assert restarted.get_tool("probe_stale").get_description() == "probe_stale v2"
+    assert json.loads((plugins.dir / "tool_manifest.json").read_text())["probe_stale"]["description"] == "probe_stale v2"
+
+
+def test_eager_mode_ignores_the_manifest(plugins):
+    plugins.write("probe_eager")
+    plugins.manager()
+    plugins.manager(lazy=False)
+    assert plugins.imports() == ["probe_eager", "probe_eager"]
+
+
+def test_refresh_reimports_only_changed_plugins(plugins):
+    plugins.write("probe_reload_a")
+    plugins.write("probe_reload_b")
+    manager = plugins.manager(lazy=False)
+    before = manager.tools
+    # Touched without changing the content: hashed, not imported
+    path = plugins.dir / "probe_reload_a.py"
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000))
+    manager.refresh()
+    assert manager.tools is before
+    plugins.write("probe_reload_b", version=2)
+    manager.refresh()
+    assert plugins.imports() == ["probe_reload_a", "probe_reload_b", "probe_reload_b"]
+    assert run(manager, "probe_reload_b")["version"] == 2
+    # Callers that already resolved the old mapping keep the old instance
+    assert before["probe_reload_b"].get_description() == "probe_reload_b v1"
+    assert manager.get_load_report()["tools"]["probe_reload_b"]["load_time_ms"] > 0
+
+
+def test_refresh_drops_removed_and_disabled_plugins(plugins):
+    for name in ("probe_keep", "probe_remove", "probe_disable"):
+        plugins.write(name)
+    manager = plugins.manager(lazy=False)
+    version = manager.version
+    (plugins.dir / "probe_remove.py").unlink()
+    plugins.configure("probe_disable", enabled=False)
+    manager.refresh()
+    assert list(manager.tools) == ["probe_keep"]
+    assert manager.version == version + 2
+
+
+def test_a_broken_plugin_is_skipped_until_it_changes(plugins):
+    plugins.write("probe_ok")
+    plugins.configure("probe_broken")
+    broken = plugins.dir / "probe_broken.py"
+    broken.write_text(f"open({plugins.log!r}, 'a').write('probe_broken\\n')\nraise RuntimeError('broken')\n")
+    manager = plugins.manager(lazy=False)
+    assert list(manager.tools) == ["probe_ok"]
+    manager.refresh()
+    assert plugins.imports() == ["probe_broken", "probe_ok"]
+    plugins.write("probe_broken")
+    manager.refresh()
+    assert sorted(manager.tools) == ["probe_broken", "probe_ok"]
+
+
+def test_tools_created_in_one_worker_load_in_the_others(plugins, monkeypatch):
+    # API-created tools aren't marked trusted; run them in-process here
+    monkeypatch.setattr(tool_manager, "SANDBOX_ENABLED", False)
+    plugins.write("probe_builtin")
+    first, second = plugins.manager(), plugins.manager()
+    code = PLUGIN.format(log=plugins.log, name="probe_api", version=1)
+    first.create_tool("probe_api", code)
+    assert run(first, "probe_api")["version"] == 1
+    assert second.sync_registry() == ["probe_api"]
+    assert second.sync_registry() == []
+    assert run(second, "probe_api")["version"] == 1
+
+    second.update_tool("probe_api", PLUGIN.format(log=plugins.log, name="probe_api", version=2))
+
+    async def watch():
+        changed = asyncio.Event()
+
+        async def on_change():
+            changed.set()
+
+        watcher = asyncio.ensure_future(first.watch_registry(on_change, interval=0.01))
+        try:
+            await asyncio.wait_for(changed.wait(), 5)
+        finally:
+            watcher.cancel()
+
+    asyncio.run(watch())
+    assert first.get_tool("probe_api").get_description() == "probe_api v2"
+    assert first.registry_version == second.registry_version == 2
+    # A worker started later picks the tool up with its initial load
+    assert plugins.manager().get_tool("probe_api").get_description() == "probe_api v2"
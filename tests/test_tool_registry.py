@@ -0,0 +1,36 @@
+import threading
+import pytest
+from tool_registry import SQLiteToolRegistry, create_registry
+
+
+def test_changes_come_back_in_version_order(tmp_path):
+    registry = SQLiteToolRegistry(str(tmp_path / "registry.db"))
+    assert registry.version() == 0
+    assert registry.put("a", "code a", {"enabled": True}) == 1
+    assert registry.put("b", "code b") == 2
+    assert registry.put("a", "code a2", {"enabled": False}) == 3
+    assert registry.changes_since(1) == [("b", "code b", None, 2), ("a", "code a2", {"enabled": False}, 3)]
+    assert registry.changes_since(3) == []
+
+
+def test_workers_writing_at_once_get_distinct_versions(tmp_path):
+    path = str(tmp_path / "registry.db")
+    workers = [SQLiteToolRegistry(path) for _ in range(4)]
+    versions = []
+
+    def put(index, registry):
+        for change in range(10):
+            versions.append(registry.put(f"tool_{index}_{change}", "code"))
+
+    threads = [threading.Thread(target=put, args=(index, registry)) for index, registry in enumerate(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(versions) == list(range(1, 41))
+    assert [change[3] for change in workers[0].changes_since(0)] == list(range(1, 41))
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        create_registry("etcd")
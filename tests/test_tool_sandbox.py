@@ -0,0 +1,117 @@
+import json
+import asyncio
+import pytest
+from tool_sandbox import ToolSandbox, SandboxedTool, SandboxError
+
+PLUGIN = '''
+import os
+import time
+from tool_plugins.base_tool import BaseTool
+
+class SandboxProbe(BaseTool):
+    def execute(self, mode, size_mb=0):
+        if mode == "sleep":
+            time.sleep(10)
+        elif mode == "crash":
+            os._exit(3)
+        elif mode == "allocate":
+            return {"allocated": len(bytearray(size_mb * 1024 * 1024))}
+        elif mode == "raise":
+            raise RuntimeError("bad input")
+        return {"pid": os.getpid()}
+
+    def get_schema(self):
+        return {"type": "object", "properties": {"mode": {"type": "string"}}}
+
+    def get_description(self):
+        return "Misbehaves on request"
+'''
+
+
+class FakeManager:
+    def __init__(self, options):
+        self.options = options
+
+    def get_sandbox_config(self, name):
+        return self.options
+
+
+@pytest.fixture
+def probe(tmp_path, monkeypatch):
+    # Workers inherit the environment; keep their response store out of the tree
+    monkeypatch.setenv("API_RESPONSE_DB", str(tmp_path / "responses.db"))
+    path = tmp_path / "sandbox_probe.py"
+    path.write_text(PLUGIN)
+    sandbox = ToolSandbox(size=1, timeout=10, memory_mb=64)
+    manager = FakeManager({})
+    tool = SandboxedTool(manager, sandbox, "sandbox_probe", str(path))
+    yield sandbox, manager, tool
+    sandbox.close()
+
+
+def test_describe_runs_in_the_worker(probe):
+    _, _, tool = probe
+    assert tool.class_name == "SandboxProbe"
+    assert tool.get_description() == "Misbehaves on request"
+    assert tool.get_schema()["properties"] == {"mode": {"type": "string"}}
+
+
+def test_results_come_back_as_json_text_from_a_warm_worker(probe):
+    sandbox, _, tool = probe
+
+    async def scenario():
+        return [await tool.aexecute(mode="ok") for _ in range(2)]
+
+    first, second = asyncio.run(scenario())
+    assert first.encoded == second.encoded
+    assert sandbox.stats()["restarts"] == 0
+
+
+def test_timeout_replaces_the_worker(probe):
+    sandbox, manager, tool = probe
+
+    async def scenario():
+        before = await tool.aexecute(mode="ok")
+        manager.options = {"timeout": 0.2}
+        with pytest.raises(SandboxError, match="timed out"):
+            await tool.aexecute(mode="sleep")
+        # The replacement worker gets the default timeout to start up and import the tool
+        manager.options = {}
+        return before, await tool.aexecute(mode="ok")
+
+    before, after = asyncio.run(scenario())
+    assert before.encoded != after.encoded
+    assert sandbox.stats() == {"workers": 1, "idle": 1, "restarts": 1}
+
+
+def test_crash_replaces_the_worker(probe):
+    sandbox, _, tool = probe
+
+    async def scenario():
+        with pytest.raises(SandboxError, match="crashed"):
+            await tool.aexecute(mode="crash")
+        return await tool.aexecute(mode="ok")
+
+    assert b"pid" in asyncio.run(scenario()).encoded
+    assert sandbox.stats()["restarts"] == 1
+
+
+def test_memory_limit_fails_the_call_but_keeps_the_worker(probe):
+    sandbox, manager, tool = probe
+
+    async def scenario():
+        over = await tool.aexecute(mode="allocate", size_mb=256)
+        manager.options = {"memory_mb": 512}
+        return over, await tool.aexecute(mode="allocate", size_mb=256)
+
+    over, under = asyncio.run(scenario())
+    assert over == {"error": "Tool exceeded its memory limit"}
+    assert json.loads(under.encoded) == {"allocated": 256 * 1024 * 1024}
+    assert sandbox.stats()["restarts"] == 0
+
+
+def test_tool_exceptions_are_raised_in_the_parent(probe):
+    sandbox, _, tool = probe
+    with pytest.raises(SandboxError, match="RuntimeError: bad input"):
+        asyncio.run(tool.aexecute(mode="raise"))
+    assert sandbox.stats()["restarts"] == 0
@@ -0,0 +1,132 @@
+import asyncio
+from types import SimpleNamespace
+import httpx
+import pytest
+from tool_plugins import unusual_whales_client as client_module
+from tool_plugins.unusual_whales_client import TokenBucket, UnusualWhalesClient, UnusualWhalesError
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_bucket_allows_a_burst_then_spaces_requests(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(client_module.time, "monotonic", clock)
+    bucket = TokenBucket(rate_per_second=2.0, capacity=3)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Each reservation past the burst waits behind the ones before it
+    assert [bucket.reserve() for _ in range(2)] == [0.5, 1.0]
+    clock.now += 10
+    assert bucket.reserve() == 0.0
+    assert bucket.tokens == 2.0
+
+
+def test_async_and_sync_callers_share_one_budget(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(client_module.time, "monotonic", clock)
+    slept = []
+
+    async def sleep(delay):
+        slept.append(delay)
+
+    monkeypatch.setattr(client_module.asyncio, "sleep", sleep)
+    monkeypatch.setattr(client_module.time, "sleep", slept.append)
+    bucket = TokenBucket(rate_per_second=1.0, capacity=1)
+    bucket.acquire()
+    asyncio.run(bucket.acquire_async())
+    bucket.acquire()
+    assert slept == [1.0, 2.0]
+
+
+def responder(*responses):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        status, headers = responses[min(len(calls), len(responses)) - 1]
+        return httpx.Response(status, headers=headers, json={"data": [len(calls)]})
+
+    return handler, calls
+
+
+def async_client(handler, **options):
+    client = UnusualWhalesClient(base_url="http://upstream", api_key="key", rate_limit_per_minute=60000, **options)
+    client._async_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+def fetch(client, path, **kwargs):
+    async def scenario():
+        try:
+            return await client.aget(path, **kwargs)
+        finally:
+            await client.aclose()
+
+    return asyncio.run(scenario())
+
+
+def test_aget_retries_retryable_statuses_honouring_retry_after(monkeypatch):
+    delays = []
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(client_module.asyncio, "sleep", sleep)
+    handler, calls = responder((429, {"Retry-After": "2"}), (503, {}), (200, {}))
+    assert fetch(async_client(handler), "/api/stock/NVDA/flow", params={"limit": 5}) == {"data": [3]}
+    assert len(calls) == 3
+    assert str(calls[0].url) == "http://upstream/api/stock/NVDA/flow?limit=5"
+    assert calls[0].headers["Authorization"] == "Bearer key"
+    assert delays[0] == 2.0
+    assert 0 <= delays[1] <= client_module.BACKOFF_BASE * 2
+
+
+def test_aget_gives_up_after_max_retries(monkeypatch):
+    async def sleep(delay):
+        pass
+
+    monkeypatch.setattr(client_module.asyncio, "sleep", sleep)
+    handler, calls = responder((502, {}))
+    with pytest.raises(UnusualWhalesError) as error:
+        fetch(async_client(handler, max_retries=2), "/api/x")
+    assert error.value.status_code == 502
+    assert len(calls) == 3
+
+
+def test_aget_does_not_retry_client_errors():
+    handler, calls = responder((404, {}))
+    with pytest.raises(UnusualWhalesError) as error:
+        fetch(async_client(handler), "/api/x")
+    assert error.value.status_code == 404
+    assert len(calls) == 1
+
+
+def test_get_retries_connection_errors(monkeypatch):
+    monkeypatch.setattr(client_module.time, "sleep", lambda delay: None)
+    client = UnusualWhalesClient(base_url="http://upstream", api_key="key", rate_limit_per_minute=60000)
+    attempts = []
+
+    def get(url, headers, params, timeout):
+        attempts.append(url)
+        if len(attempts) == 1:
+            raise client_module.requests.ConnectionError("reset")
+        return SimpleNamespace(status_code=200, json=lambda: {"ok": True}, headers={})
+
+    monkeypatch.setattr(client.session, "get", get)
+    assert client.get("api/x") == {"ok": True}
+    assert attempts == ["http://upstream/api/x"] * 2
+
+
+def test_missing_api_key_fails_before_any_request(monkeypatch):
+    monkeypatch.delenv("UNUSUAL_WHALES_API_KEY", raising=False)
+    handler, calls = responder((200, {}))
+    client = async_client(handler)
+    client._api_key = None
+    with pytest.raises(UnusualWhalesError, match="API key is missing"):
+        fetch(client, "/api/x")
+    assert calls == []
@@ -0,0 +1,251 @@
+import os
+import re
+import json
+import time
+import threading
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TIMESERIES_DIR = os.getenv("TIMESERIES_DIR", os.path.join("api_responses", "timeseries"))
+# How long a contract's local history is served before asking upstream for the new tail
+REFRESH_INTERVAL = float(os.getenv("TIMESERIES_REFRESH_INTERVAL", "300"))
+DATE_COLUMN = "date"
+TEXT_WIDTH = 64
+CONTRACT_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]+$")
+
+
+def find_rows(payload, rows_key=None):
+    """Return (rows_key, rows, envelope) for a historic payload, or None.
+
+    ``rows_key`` is the key a previous payload used, which is accepted even
+    when it holds no rows (nothing new upstream).
+    """
+    if isinstance(payload, list):
+        return None, payload, {}
+    if isinstance(payload, dict):
+        if rows_key is not None and isinstance(payload.get(rows_key), list):
+            return rows_key, payload[rows_key], {k: v for k, v in payload.items() if k != rows_key}
+        for key, value in payload.items():
+            if isinstance(value, list) and value and all(isinstance(row, dict) for row in value):
+                return key, value, {k: v for k, v in payload.items() if k != key}
+    return None
+
+
+def parse_date(value):
+    try:
+        return np.datetime64(value, "D")
+    except ValueError:
+        raise ValueError(f"Invalid date: {value}, expected YYYY-MM-DD")
+
+
+def column_dtype(name, values):
+    if name == DATE_COLUMN:
+        return np.dtype("datetime64[D]")
+    present = [value for value in values if value is not None]
+    if present and all(isinstance(value, bool) for value in present):
+        return np.dtype(np.bool_)
+    if present and all(isinstance(value, int) and not isinstance(value, bool) for value in present):
+        return np.dtype(np.int64)
+    try:
+        # Prices and IVs arrive as decimal strings
+        [float(value) for value in present]
+        return np.dtype(np.float64)
+    except (TypeError, ValueError):
+        # Wide enough for the longest value seen so far; later rows can't grow the column
+        width = max([TEXT_WIDTH] + [len(str(value).encode("utf-8")) for value in present])
+        return np.dtype(f"S{width}")
+
+
+def to_array(values, dtype):
+    if dtype.kind == "M":
+        return np.array([value or "NaT" for value in values], dtype=dtype)
+    if dtype.kind == "S":
+        encoded = [b"" if value is None else str(value).encode("utf-8") for value in values]
+        if any(len(value) > dtype.itemsize for value in encoded):
+            raise ValueError(f"Text value longer than the column's {dtype.itemsize} bytes")
+        return np.array(encoded, dtype=dtype)
+    converted = []
+    for value in values:
+        try:
+            converted.append(float(value))
+        except (TypeError, ValueError):
+            converted.append(np.nan)
+    array = np.array(converted, dtype=np.float64)
+    if dtype.kind in "ib":
+        # Missing values in integer columns are stored as 0
+        array = np.nan_to_num(array)
+    return array.astype(dtype)
+
+
+class TimeSeriesStore:
+    """Append-only, memory-mapped columnar history per option contract.
+
+    Each contract gets a directory with one raw binary file per column and a
+    ``meta.json`` holding the column dtypes, the committed row count and when
+    upstream was last asked for new rows. Rows are kept in date order, so a
+    date range is two binary searches over the memory-mapped date column.
+
+    Column files are only ever extended, except that the most recent day is
+    rewritten in place when upstream sends it again (its values change
+    intraday). Files are never truncated, so a reader holding an older
+    ``meta.json`` can always map its row count; bytes past the committed
+    count are ignored until they are overwritten. ``meta.json`` is replaced
+    atomically after the column data is written, so readers never see rows
+    beyond the committed count.
+    """
+
+    def __init__(self, root=TIMESERIES_DIR, refresh_interval=REFRESH_INTERVAL):
+        self.root = root
+        self.refresh_interval = refresh_interval
+        self.locks = {}
+        self.lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _dir(self, contract_id):
+        if not CONTRACT_ID_PATTERN.match(contract_id):
+            raise ValueError(f"Invalid contract id: {contract_id}")
+        return os.path.join(self.root, contract_id)
+
+    def _lock(self, contract_id):
+        with self.lock:
+            return self.locks.setdefault(contract_id, threading.Lock())
+
+    def meta(self, contract_id):
+        try:
+            with open(os.path.join(self._dir(contract_id), "meta.json"), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_meta(self, path, meta):
+        # Per process: workers sharing the directory each hold their own contract locks
+        tmp_path = os.path.join(path, f"meta.json.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(path, "meta.json"))
+
+    def _columns(self, path, meta):
+        count = meta["count"]
+        columns = {}
+        for name, dtype in meta["columns"].items():
+            dtype = np.dtype(dtype)
+            if count == 0:
+                columns[name] = np.empty(0, dtype=dtype)
+            else:
+                columns[name] = np.memmap(os.path.join(path, f"{name}.bin"), dtype=dtype, mode="r", shape=(count,))
+        return columns
+
+    def fetch_params(self, contract_id):
+        """Upstream query params for the missing tail, or None if the local copy is fresh."""
+        meta = self.meta(contract_id)
+        if meta is None:
+            return {}
+        if time.time() - meta["refreshed_at"] < self.refresh_interval:
+            return None
+        if not meta["count"] or not meta["last_date"]:
+            return {}
+        # Calendar days since the last stored row bound the trading days we can be missing
+        missing = (np.datetime64("today", "D") - np.datetime64(meta["last_date"], "D")).astype(int)
+        return {"limit": int(max(missing, 0)) + 1}
+
+    def append(self, contract_id, payload):
+        """Merge an upstream payload into the contract's history.
+
+        Raises ValueError if the payload isn't a dated row set.
+        """
+        path = self._dir(contract_id)
+        with self._lock(contract_id):
+            meta = self.meta(contract_id) or {"columns": {}, "count": 0, "last_date": None, "rows_key": None}
+            found = find_rows(payload, meta["rows_key"])
+            if found is None:
+                raise ValueError("Payload has no rows to store")
+            rows_key, rows, envelope = found
+            if not rows and DATE_COLUMN not in meta["columns"]:
+                # An empty list is only "nothing new" for a contract we already hold
+                raise ValueError("Payload has no rows to store")
+            if any(not isinstance(row, dict) or DATE_COLUMN not in row for row in rows):
+                raise ValueError(f"Rows have no '{DATE_COLUMN}' column")
+            os.makedirs(path, exist_ok=True)
+            descending = len(rows) > 1 and rows[0][DATE_COLUMN] > rows[-1][DATE_COLUMN]
+            rows = sorted(rows, key=lambda row: row[DATE_COLUMN])
+            count = meta["count"]
+            keep = count
+            if meta["last_date"]:
+                # History before the last stored day doesn't change; the last day may have
+                rows = [row for row in rows if row[DATE_COLUMN] >= meta["last_date"]]
+                dates = self._columns(path, meta)[DATE_COLUMN]
+                keep = int(np.searchsorted(dates, np.datetime64(meta["last_date"], "D"), side="left")) if rows else count
+                del dates
+
+            names = list(meta["columns"])
+            for row in rows:
+                for name in row:
+                    if name not in names and CONTRACT_ID_PATTERN.match(name):
+                        names.append(name)
+            # Convert every column before writing any, so a bad value can't leave the last row half rewritten
+            columns = {}
+            backfill = {}
+            for name in names:
+                values = [row.get(name) for row in rows]
+                if name in meta["columns"]:
+                    dtype = np.dtype(meta["columns"][name])
+                else:
+                    dtype = column_dtype(name, values)
+                    # Columns that appear later are backfilled for the rows already stored
+                    backfill[name] = to_array([None] * keep, dtype)
+                columns[name] = to_array(values, dtype)
+            for name, array in backfill.items():
+                meta["columns"][name] = array.dtype.str
+                self._write_column(path, name, array, 0)
+            for name, array in columns.items():
+                self._write_column(path, name, array, keep)
+
+            meta["count"] = keep + len(rows)
+            if rows:
+                meta["last_date"] = rows[-1][DATE_COLUMN]
+            meta["rows_key"] = rows_key
+            meta["envelope"] = envelope
+            meta["descending"] = meta.get("descending", False) if len(rows) < 2 else descending
+            meta["refreshed_at"] = time.time()
+            self._write_meta(path, meta)
+            logger.info(f"History for {contract_id}: kept {keep} rows, appended {len(rows)}")
+
+    def _write_column(self, path, name, array, offset):
+        file_path = os.path.join(path, f"{name}.bin")
+        # No truncate: another reader may have this file mapped at the previously committed length
+        with open(file_path, "r+b" if os.path.exists(file_path) else "w+b") as f:
+            f.seek(offset * array.dtype.itemsize)
+            f.write(array.tobytes())
+
+    def query(self, contract_id, start_date=None, end_date=None):
+        """Rows between start_date and end_date (inclusive, YYYY-MM-DD), in upstream order."""
+        meta = self.meta(contract_id)
+        if meta is None:
+            return None
+        columns = self._columns(self._dir(contract_id), meta)
+        # Histories written by an empty first append (no longer accepted) have no columns
+        dates = columns.get(DATE_COLUMN, np.empty(0, dtype="datetime64[D]"))
+        start = 0 if start_date is None else int(np.searchsorted(dates, parse_date(start_date), side="left"))
+        end = len(dates) if end_date is None else int(np.searchsorted(dates, parse_date(end_date), side="right"))
+        lists = {}
+        for name, column in columns.items():
+            window = column[start:end]
+            if window.dtype.kind == "S":
+                lists[name] = [value.decode("utf-8") for value in window.tolist()]
+            elif window.dtype.kind == "M":
+                lists[name] = [None if np.isnat(value) else str(value) for value in window]
+            elif window.dtype.kind == "f":
+                lists[name] = [None if value != value else value for value in window.tolist()]
+            else:
+                lists[name] = window.tolist()
+        rows = [{name: lists[name][index] for name in columns} for index in range(end - start)]
+        if meta.get("descending"):
+            rows.reverse()
+        if meta.get("rows_key") is None:
+            return rows
+        return {meta["rows_key"]: rows, **meta.get("envelope", {})}
+
+
+timeseries_store = TimeSeriesStore()
@@ -0,0 +1,129 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from serialization import encoded
+
+logger = logging.getLogger(__name__)
+
+MAX_BYTES = int(os.getenv("TOOL_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+class ToolResultCache:
+    """TTL + LRU cache of tool outputs with single-flight execution.
+
+    Entries are bounded by the total encoded size of the cached outputs.
+    Concurrent requests for the same key share one in-flight execution
+    whether or not the result ends up cached.
+    """
+
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(tool_name, args):
+        canonical = {k: v for k, v in (args or {}).items() if v is not None}
+        return f"{tool_name}:{json.dumps(canonical, sort_keys=True, separators=(',', ':'), default=str)}"
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        value, size, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value, ttl):
+        if ttl <= 0:
+            return
+        size = len(encoded(value)) if isinstance(value, str) else len(value)
+        if size > self.max_bytes:
+            return
+        if key in self.entries:
+            self._remove(key)
+        self.entries[key] = (value, size, time.monotonic() + ttl)
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes:
+            oldest = next(iter(self.entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key):
+        _, size, _ = self.entries.pop(key)
+        self.total_bytes -= size
+
+    def invalidate(self, tool_name=None):
+        prefix = f"{tool_name}:" if tool_name else ""
+        for key in [key for key in self.entries if key.startswith(prefix)]:
+            self._remove(key)
+
+    async def get_or_execute(self, tool_name, args, ttl, execute, refresh=False):
+        """Return the cached output for (tool_name, args) or run ``execute``.
+
+        ``execute`` is a coroutine function returning ``(output, cacheable)``.
+        ``refresh`` skips the cached value (but still joins an in-flight run).
+        """
+        key = self.make_key(tool_name, args)
+        value = None if refresh else self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        inflight = self.inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # The caller that owned the execution went away (e.g. its client disconnected);
+                # run it ourselves unless we were cancelled too
+                if not inflight.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                return await self.get_or_execute(tool_name, args, ttl, execute, refresh)
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        try:
+            value, cacheable = await execute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception retrieved in case no other caller was waiting on it
+            future.exception()
+            raise
+        else:
+            if cacheable:
+                self.put(key, value, ttl)
+            future.set_result(value)
+            return value
+        finally:
+            del self.inflight[key]
+
+    def stats(self):
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            "entries": len(self.entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+tool_cache = ToolResultCache()
@@ -1,18 +1,119 @@
 import os
 import sys
 import json
-import importlib
+import time
+import threading
+import hashlib
+import asyncio
 import importlib.util
 import logging
 from tool_plugins.base_tool import BaseTool
+from tool_cache import tool_cache
+from serialization import dumps_text
+from metrics import TOOL_SECONDS, TOOL_CALLS
+from tool_sandbox import tool_sandbox, SandboxedTool
+from tool_registry import create_registry, POLL_INTERVAL as REGISTRY_POLL_INTERVAL
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+
+# Shared modules in the plugin directory that are not tools themselves
+SUPPORT_MODULES = {'__init__.py', 'base_tool.py', 'unusual_whales_client.py'}
+
+LAZY_LOAD = os.getenv("TOOL_LAZY_LOAD", "1") == "1"
+# Defaults to tool_manifest.json in the plugin directory
+MANIFEST_FILE = os.getenv("TOOL_MANIFEST_FILE")
+# Tools not marked "trusted" in tools_config.json run in the process sandbox
+SANDBOX_ENABLED = os.getenv("TOOL_SANDBOX", "1") == "1"
+
+class ToolNotFoundError(Exception):
+    pass
+
+def import_tool(module_name, file_path):
+    """Execute a plugin file and return an instance of its BaseTool subclass."""
+    # Execute a fresh module object every time; import_module would hand back the cached one
+    spec = importlib.util.spec_from_file_location(module_name, file_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    tool_class = None
+    for item_name in dir(module):
+        item = getattr(module, item_name)
+        if isinstance(item, type) and issubclass(item, BaseTool) and item != BaseTool:
+            tool_class = item
+            if item.__module__ == module_name:
+                break
+    if tool_class is None:
+        raise ValueError(f"No BaseTool subclass found in {module_name}")
+    instance = tool_class()
+    sys.modules[module_name] = module
+    return instance
+
+def tool_class_name(tool):
+    # Proxies report the class of the tool they stand in for
+    return getattr(tool, "class_name", None) or tool.__class__.__name__
+
+class LazyTool(BaseTool):
+    """Stands in for a plugin whose name, description and schema come from the manifest.
+
+    The plugin module is imported on the first execute and the real instance
+    then replaces this proxy in the ToolManager.
+    """
+
+    def __init__(self, manager, name, file_path, entry):
+        self.manager = manager
+        self.name = name
+        self.file_path = file_path
+        self.class_name = entry["class"]
+        self.description = entry["description"]
+        self.schema = entry["schema"]
+        self.instance = None
+        self.lock = threading.Lock()
+
+    def resolve(self):
+        if self.instance is None:
+            with self.lock:
+                if self.instance is None:
+                    self.instance = self.manager._import_on_demand(self)
+        return self.instance
+
+    def execute(self, *args, **kwargs):
+        return self.resolve().execute(*args, **kwargs)
+
+    async def aexecute(self, *args, **kwargs):
+        if self.instance is None:
+            # Importing runs module-level code, keep it off the event loop
+            await asyncio.to_thread(self.resolve)
+        return await self.instance.aexecute(*args, **kwargs)
+
+    def get_schema(self):
+        return self.schema
+
+    def get_description(self):
+        return self.description
+
 class ToolManager:
-    def __init__(self, plugin_dir='tool_plugins'):
+    def __init__(self, plugin_dir='tool_plugins', lazy=LAZY_LOAD, registry=None):
         self.plugin_dir = plugin_dir
         self.config_file = os.path.join(plugin_dir, 'tools_config.json')
+        self.manifest_file = MANIFEST_FILE or os.path.join(plugin_dir, 'tool_manifest.json')
+        self.lazy = lazy
+        self.manifest = self._read_manifest()
+        self.manifest_dirty = False
+        self.startup_time_ms = None
         self.tools = {}
+        self.cache_ttls = {}
+        self.config = {}
+        self.file_config = {}
+        self.config_mtime = None
+        # Tools created or changed through the API, shared with every other worker
+        self.registry = registry or create_registry()
+        self.registry_version = 0
+        self.registry_config = {}
+        self.registry_lock = threading.Lock()
+        # Per-module file state used to decide what actually needs re-importing
+        self.module_state = {}
+        self.load_times = {}
+        self.version = 0
         
         # Add the plugin directory to the Python path
         plugin_path = os.path.abspath(plugin_dir)
@@ -24,41 +125,220 @@ class ToolManager:
 
     def load_tools(self):
         logger.info(f"Loading tools from {self.plugin_dir}")
+        start = time.perf_counter()
+        self.sync_registry()
+        self.refresh()
+        self.startup_time_ms = (time.perf_counter() - start) * 1000
+        imported = [name for name, tool in self.tools.items() if not isinstance(tool, LazyTool)]
+        logger.info(f"Loaded tools: {list(self.tools.keys())} in {self.startup_time_ms:.1f}ms "
+                    f"({len(imported)} imported, {len(self.tools) - len(imported)} deferred)")
+
+    def _read_manifest(self):
+        try:
+            with open(self.manifest_file, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write_manifest(self):
+        if not self.manifest_dirty:
+            return
+        tmp_path = f"{self.manifest_file}.tmp"
         try:
-            with open(self.config_file, 'r') as f:
-                config = json.load(f)
-            logger.info(f"Loaded config: {config}")
+            with open(tmp_path, 'w') as f:
+                json.dump(self.manifest, f, indent=4)
+            os.replace(tmp_path, self.manifest_file)
+            self.manifest_dirty = False
+        except OSError as e:
+            logger.warning(f"Could not write tool manifest: {str(e)}")
+
+    def _read_config(self):
+        try:
+            mtime = os.stat(self.config_file).st_mtime_ns
         except FileNotFoundError:
             logger.warning(f"Config file not found: {self.config_file}")
-            config = {}
-
-        logger.info(f"Files in {self.plugin_dir}: {os.listdir(self.plugin_dir)}")
-
-        for filename in os.listdir(self.plugin_dir):
-            logger.info(f"Checking file: {filename}")
-            if filename.endswith('.py') and filename != 'base_tool.py':
-                module_name = filename[:-3]
-                logger.info(f"Found potential tool: {module_name}")
-                if module_name in config and config[module_name].get('enabled', True):
-                    logger.info(f"Attempting to load tool: {module_name}")
-                    try:
-                        module = importlib.import_module(module_name)
-                        logger.info(f"Imported module: {module}")
-                        for item_name in dir(module):
-                            item = getattr(module, item_name)
-                            logger.info(f"Checking item: {item_name}, type: {type(item)}")
-                            if isinstance(item, type) and issubclass(item, BaseTool) and item != BaseTool:
-                                logger.info(f"Loaded tool class: {item_name}")
-                                self.tools[module_name] = item()
-                    except Exception as e:
-                        logger.error(f"Error loading tool {module_name}: {str(e)}", exc_info=True)
-                else:
-                    logger.info(f"Tool {module_name} is disabled or not in config")
-
-        logger.info(f"Loaded tools: {list(self.tools.keys())}")
+            self.file_config, self.config_mtime = {}, None
+        else:
+            if mtime != self.config_mtime:
+                with open(self.config_file, 'r') as f:
+                    self.file_config = json.load(f)
+                self.config_mtime = mtime
+                logger.info(f"Loaded config: {self.file_config}")
+        # Registry entries win; tools registered without a config keep the file's
+        self.config = {**self.file_config, **{
+            name: config for name, config in self.registry_config.items() if config is not None}}
+
+    def _candidate_modules(self):
+        return {
+            filename[:-3] for filename in os.listdir(self.plugin_dir)
+            if filename.endswith('.py') and filename not in SUPPORT_MODULES
+        }
+
+    def _is_enabled(self, module_name):
+        return module_name in self.config and self.config[module_name].get('enabled', True)
+
+    def refresh(self):
+        """Re-import only plugins whose file changed and drop removed or disabled ones."""
+        self._read_config()
+        candidates = self._candidate_modules()
+        for module_name in sorted(candidates):
+            if not self._is_enabled(module_name):
+                if module_name in self.tools:
+                    self._unload(module_name)
+                continue
+            try:
+                self._load_if_changed(module_name)
+            except Exception as e:
+                logger.error(f"Error loading tool {module_name}: {str(e)}", exc_info=True)
+        for module_name in list(self.tools):
+            if module_name not in candidates:
+                self._unload(module_name)
+        for module_name in self.tools:
+            self.cache_ttls[module_name] = self.config.get(module_name, {}).get('cache_ttl', 0)
+        self._write_manifest()
+
+    def reload_tool(self, name):
+        self._read_config()
+        if not self._is_enabled(name):
+            self._unload(name)
+            return
+        self._load_if_changed(name, force_hash=True)
+        self.cache_ttls[name] = self.config[name].get('cache_ttl', 0)
+        self._write_manifest()
+
+    def _load_if_changed(self, module_name, force_hash=False):
+        file_path = os.path.join(self.plugin_dir, f"{module_name}.py")
+        mtime = os.stat(file_path).st_mtime_ns
+        state = self.module_state.get(module_name)
+        if state and module_name in self.tools and state["mtime"] == mtime and not force_hash:
+            return
+        if state and state.get("failed") and state["mtime"] == mtime and not force_hash:
+            return
+        with open(file_path, 'rb') as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+        if state and module_name in self.tools and state["hash"] == digest:
+            state["mtime"] = mtime
+            return
+        try:
+            entry = self.manifest.get(module_name)
+            if self.lazy and not force_hash and entry and entry.get("hash") == digest:
+                self._install(module_name, LazyTool(self, module_name, file_path, entry))
+            else:
+                self._load_module(module_name, file_path, digest)
+        except Exception:
+            # Remember the broken version so periodic refreshes don't re-import it until it changes
+            self.module_state[module_name] = {"mtime": mtime, "hash": digest, "failed": True}
+            raise
+        self.module_state[module_name] = {"mtime": mtime, "hash": digest}
+
+    def _load_module(self, module_name, file_path, digest):
+        instance, elapsed_ms = self._import_tool(module_name, file_path)
+        self._install(module_name, instance)
+        self.load_times[module_name] = elapsed_ms
+        self.manifest[module_name] = {
+            "hash": digest,
+            "class": tool_class_name(instance),
+            "description": instance.get_description(),
+            "schema": instance.get_schema(),
+        }
+        self.manifest_dirty = True
+
+    def _import_on_demand(self, proxy):
+        instance, elapsed_ms = self._import_tool(proxy.name, proxy.file_path)
+        # Only replace the proxy if a reload hasn't already swapped in something newer
+        if self.tools.get(proxy.name) is proxy:
+            self._install(proxy.name, instance)
+            self.load_times[proxy.name] = elapsed_ms
+        return instance
+
+    def _import_tool(self, module_name, file_path):
+        start = time.perf_counter()
+        if self.is_sandboxed(module_name):
+            # Untrusted code is never executed in this process, not even to read its schema
+            instance = SandboxedTool(self, tool_sandbox, module_name, file_path)
+        else:
+            instance = import_tool(module_name, file_path)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"Loaded tool class {tool_class_name(instance)} for {module_name} in {elapsed_ms:.1f}ms"
+                    f"{' (sandboxed)' if isinstance(instance, SandboxedTool) else ''}")
+        return instance, elapsed_ms
+
+    def is_sandboxed(self, name):
+        return SANDBOX_ENABLED and not self.config.get(name, {}).get('trusted', False)
+
+    def get_sandbox_config(self, name):
+        return self.config.get(name, {}).get('sandbox', {})
+
+    def _install(self, module_name, tool):
+        # Swap in a new dict so in-flight executions keep the instance they already resolved
+        tools = dict(self.tools)
+        tools[module_name] = tool
+        self.tools = tools
+        self.version += 1
+
+    def _unload(self, module_name):
+        tools = dict(self.tools)
+        tools.pop(module_name, None)
+        self.tools = tools
+        self.module_state.pop(module_name, None)
+        self.load_times.pop(module_name, None)
+        self.version += 1
+        tool_cache.invalidate(module_name)
+        logger.info(f"Tool {module_name} is disabled or was removed")
+
+    def get_load_report(self):
+        return {
+            "version": self.version,
+            "lazy": self.lazy,
+            "startup_time_ms": round(self.startup_time_ms or 0.0, 3),
+            "sandbox": tool_sandbox.stats(),
+            "tools": {
+                name: {
+                    "class": self.get_tool_class_name(name),
+                    "imported": not isinstance(tool, LazyTool),
+                    "sandboxed": self.is_sandboxed(name),
+                    "load_time_ms": round(self.load_times.get(name, 0.0), 3),
+                    "hash": self.module_state.get(name, {}).get("hash"),
+                }
+                for name, tool in self.tools.items()
+            }
+        }
+
     def get_tool(self, name):
         return self.tools.get(name)
 
+    def get_tool_class_name(self, name):
+        return tool_class_name(self.tools[name])
+
+    async def execute_tool(self, name, args, refresh=False):
+        tool = self.get_tool(name)
+        if tool is None:
+            raise ToolNotFoundError(f"Tool not found: {name}")
+
+        executed = False
+
+        async def execute():
+            nonlocal executed
+            executed = True
+            with TOOL_SECONDS.time(tool=name):
+                result = await tool.aexecute(**args)
+            # Upstream failures come back as error payloads; share them with waiters but never cache them
+            cacheable = not (isinstance(result, dict) and "error" in result)
+            output = result if isinstance(result, str) else dumps_text(result)
+            return output, cacheable
+
+        try:
+            output = await tool_cache.get_or_execute(name, args, self.cache_ttls.get(name, 0), execute, refresh)
+        except Exception:
+            TOOL_CALLS.inc(tool=name, outcome="error")
+            raise
+        # "cached" covers both cache hits and callers that shared an in-flight execution
+        TOOL_CALLS.inc(tool=name, outcome="executed" if executed else "cached")
+        return output
+
+    def get_compaction_config(self, name):
+        return self.config.get(name, {}).get('compaction', {})
+
     def get_all_tools(self):
         return self.tools
 
@@ -76,24 +356,59 @@ class ToolManager:
         ]
 
     def create_tool(self, name, code):
-        file_path = os.path.join(self.plugin_dir, f"{name}.py")
-        with open(file_path, 'w') as f:
-            f.write(code)
-        
-        with open(self.config_file, 'r+') as f:
-            config = json.load(f)
-            config[name] = {"enabled": True}
-            f.seek(0)
-            json.dump(config, f, indent=4)
-            f.truncate()
-        
-        self.load_tools()
+        self.registry.put(name, code, {"enabled": True})
+        self.sync_registry(raise_errors=True)
 
     def update_tool(self, name, code):
-        file_path = os.path.join(self.plugin_dir, f"{name}.py")
-        with open(file_path, 'w') as f:
-            f.write(code)
-        self.load_tools()
+        # Built-in tools keep their tools_config.json entry; API-created ones keep their registry config
+        self.registry.put(name, code, self.registry_config.get(name))
+        self.sync_registry(raise_errors=True)
+
+    def sync_registry(self, raise_errors=False):
+        """Apply registry changes since the last sync: write the plugin files and reload them.
+
+        Returns the names of the tools that changed. Load errors are logged,
+        or raised after every change is applied when ``raise_errors`` is set.
+        """
+        with self.registry_lock:
+            if self.registry.version() == self.registry_version:
+                return []
+            changes = self.registry.changes_since(self.registry_version)
+            error = None
+            for name, code, config, version in changes:
+                file_path = os.path.join(self.plugin_dir, f"{name}.py")
+                if self.get_tool_code(name) != code:
+                    # Workers on one host share the directory; an atomic replace keeps readers off half-written files
+                    tmp_path = f"{file_path}.{os.getpid()}.tmp"
+                    with open(tmp_path, 'w') as f:
+                        f.write(code)
+                    os.replace(tmp_path, file_path)
+                self.registry_config[name] = config
+                self.registry_version = max(self.registry_version, version)
+                if not self.tools and not self.module_state:
+                    # Initial load; refresh() picks these up with everything else
+                    continue
+                try:
+                    self.reload_tool(name)
+                except Exception as e:
+                    logger.error(f"Error loading registered tool {name}: {str(e)}", exc_info=True)
+                    error = error or e
+                tool_cache.invalidate(name)
+            logger.info(f"Applied {len(changes)} tool registry changes, now at version {self.registry_version}")
+            if error is not None and raise_errors:
+                raise error
+            return [name for name, _, _, _ in changes]
+
+    async def watch_registry(self, on_change=None, interval=REGISTRY_POLL_INTERVAL):
+        """Poll the registry so tools changed by other workers load here within ``interval``."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                changed = await asyncio.to_thread(self.sync_registry)
+                if changed and on_change is not None:
+                    await on_change()
+            except Exception as e:
+                logger.error(f"Error syncing tool registry: {str(e)}")
 
     def get_tool_code(self, name):
         file_path = os.path.join(self.plugin_dir, f"{name}.py")
@@ -1,12 +1,20 @@
 from abc import ABC, abstractmethod
-import json
+import asyncio
 from api_response_manager import api_response_manager
+from option_chain import OptionChain
+from serialization import JSONText, dumps_text, encode_bounded
+
+LARGE_RESPONSE_THRESHOLD = 500
 
 class BaseTool(ABC):
     @abstractmethod
     def execute(self, *args, **kwargs):
         pass
 
+    async def aexecute(self, *args, **kwargs):
+        # Tools without a native async path run on a worker thread so they never block the event loop
+        return await asyncio.to_thread(self.execute, *args, **kwargs)
+
     @abstractmethod
     def get_schema(self):
         pass
@@ -15,13 +23,24 @@ class BaseTool(ABC):
     def get_description(self):
         pass
 
-    def handle_large_response(self, response):
-        if isinstance(response, (dict, list)) and len(json.dumps(response)) > 500:
-            return api_response_manager.format_large_response(response)
+    def handle_large_response(self, response, encoded=None):
+        if isinstance(response, OptionChain):
+            # Chains are stored columnar and referenced by id rather than inlined
+            return api_response_manager.format_large_response(response) if len(response) else response.to_payload()
+        if isinstance(response, (dict, list)):
+            if encoded is None:
+                encoded, fits = encode_bounded(response, LARGE_RESPONSE_THRESHOLD)
+            else:
+                fits = len(encoded) <= LARGE_RESPONSE_THRESHOLD
+            if not fits:
+                return api_response_manager.format_large_response(response, encoded)
         return response
 
     def format_response(self, response):
-        handled_response = self.handle_large_response(response)
-        if isinstance(handled_response, dict) and handled_response.get('type') == 'large_response':
-            return json.dumps(handled_response)
-        return json.dumps(response)
\ No newline at end of file
+        if isinstance(response, (dict, list)):
+            # Encode once: small responses are returned as-is, large ones reuse the buffer for storage
+            encoded, fits = encode_bounded(response, LARGE_RESPONSE_THRESHOLD)
+            if fits:
+                return JSONText(encoded)
+            return dumps_text(self.handle_large_response(response, encoded))
+        return dumps_text(self.handle_large_response(response))
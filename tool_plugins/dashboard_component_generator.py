@@ -1,13 +1,34 @@
-import json
+import time
+import asyncio
 from tool_plugins.base_tool import BaseTool
 from openai import OpenAI
+from component_specs import component_spec_cache, spec_key, parse_spec
 import os
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+MODEL = os.getenv("DASHBOARD_COMPONENT_MODEL", "gpt-4")
+SYSTEM_PROMPT = "You are a helpful assistant that generates dashboard components based on user queries."
 
-class DashboardComponentGenerator(BaseTool):
-    def execute(self, query):
-        prompt = f"""
+client = None
+
+def get_client():
+    # Created on first use so importing the plugin stays cheap
+    global client
+    if client is None:
+        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return client
+
+def build_prompt(query, columns=None):
+    binding = ""
+    if columns:
+        binding = f"""
+        The component will be filled from rows with these fields: {', '.join(columns)}.
+        Also include a 'binding' that says which fields to use, so fresh rows can be
+        plugged in later without asking you again:
+        - chart: {{"x": "field", "y": ["field", ...], "trace_type": "bar|scatter|line"}}
+        - table: {{"columns": ["field", ...], "limit": 50}}
+        - metric: {{"field": "field", "aggregate": "sum|mean|max|min|count", "label": "Label"}}
+        """
+    return f"""
         Given the following user query for a dashboard component, generate a Python dictionary
         that describes how to create this component. The dictionary should include:
         - 'type': The type of component (e.g., 'chart', 'table', 'metric')
@@ -15,7 +36,7 @@ class DashboardComponentGenerator(BaseTool):
         - 'id': A unique identifier for the component
         - 'data': Sample data for the component
         - 'layout': Layout information for the component (for charts only)
-
+        {binding}
         User query: {query}
 
         Response format:
@@ -24,20 +45,57 @@ class DashboardComponentGenerator(BaseTool):
             "title": "Component Title",
             "id": "unique_id",
             "data": [...],
-            "layout": {{...}} (for charts only)
+            "layout": {{...}} (for charts only),
+            "binding": {{...}} (only when fields are given)
         }}
         """
 
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that generates dashboard components based on user queries."},
-                {"role": "user", "content": prompt}
-            ]
-        )
+def build_messages(query, columns=None):
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": build_prompt(query, columns)}
+    ]
+
+class DashboardComponentGenerator(BaseTool):
+    """Generates component specs, reusing cached specs for equivalent queries.
+
+    Only a cache miss asks the model; the caller re-binds fresh data into the
+    cached spec (see component_specs.bind).
+    """
+
+    def execute(self, query, columns=None):
+        started = time.perf_counter()
+        key, spec = self.lookup(query, columns)
+        hit = spec is not None
+        if not hit:
+            response = get_client().chat.completions.create(model=MODEL, messages=build_messages(query, columns))
+            spec = self.store(key, response.choices[0].message.content)
+        return self.finish(started, hit, spec)
+
+    async def aexecute(self, query, columns=None):
+        # Imported on use so loading the plugin doesn't require the OpenAI key
+        from assistants import client as async_client
+        started = time.perf_counter()
+        # A miss re-reads the shared cache file, so neither lookup nor store runs on the event loop
+        key, spec = await asyncio.to_thread(self.lookup, query, columns)
+        hit = spec is not None
+        if not hit:
+            response = await async_client.chat.completions.create(model=MODEL, messages=build_messages(query, columns))
+            spec = await asyncio.to_thread(self.store, key, response.choices[0].message.content)
+        return self.finish(started, hit, spec)
+
+    def lookup(self, query, columns):
+        key = spec_key(query, columns, MODEL)
+        return key, component_spec_cache.get(key)
+
+    def store(self, key, content):
+        spec = parse_spec(content)
+        component_spec_cache.put(key, spec)
+        return spec
 
-        component_description = response.choices[0].message.content
-        return self.format_response(json.loads(component_description))
+    def finish(self, started, hit, spec):
+        component_spec_cache.record(hit, time.perf_counter() - started)
+        return self.format_response(spec)
 
     def get_schema(self):
         return {
@@ -46,10 +104,15 @@ class DashboardComponentGenerator(BaseTool):
                 "query": {
                     "type": "string",
                     "description": "The user's query describing the desired dashboard component"
+                },
+                "columns": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Fields of the data the component will display, if known"
                 }
             },
             "required": ["query"]
         }
 
     def get_description(self):
-        return "Generates a dashboard component based on a user's description"
\ No newline at end of file
+        return "Generates a dashboard component based on a user's description"
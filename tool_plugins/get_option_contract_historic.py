@@ -1,19 +1,65 @@
-import os
-import requests
+import asyncio
+import logging
 from tool_plugins.base_tool import BaseTool
+from tool_plugins.unusual_whales_client import unusual_whales_client, UnusualWhalesError
+from timeseries_store import timeseries_store
 
 class GetOptionContractHistoric(BaseTool):
-    def execute(self, contract_id):
-        api_key = os.getenv("UNUSUAL_WHALES_API_KEY")
-        url = f"https://api.unusualwhales.com/api/option-contract/{contract_id}/historic"
-        headers = {"Authorization": f"Bearer {api_key}"}
+    """Serves contract history from the local time-series store.
 
-        response = requests.get(url, headers=headers)
+    Upstream is only asked for the days since the last stored row, and only
+    once the local copy is older than TIMESERIES_REFRESH_INTERVAL.
+    """
 
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return {"error": f"Failed to fetch data: {response.status_code}"}
+    def execute(self, contract_id, start_date=None, end_date=None):
+        try:
+            params = timeseries_store.fetch_params(contract_id)
+        except ValueError as e:
+            return {"error": str(e)}
+        if params is not None:
+            try:
+                data = unusual_whales_client.get(f"/api/option-contract/{contract_id}/historic", params=params or None)
+            except UnusualWhalesError as e:
+                if timeseries_store.meta(contract_id) is None:
+                    return {"error": str(e)}
+                logging.warning(f"Serving stored history for {contract_id}: {str(e)}")
+            else:
+                if not self.store(contract_id, data):
+                    return data
+        return self.respond(contract_id, start_date, end_date)
+
+    async def aexecute(self, contract_id, start_date=None, end_date=None):
+        try:
+            params = await asyncio.to_thread(timeseries_store.fetch_params, contract_id)
+        except ValueError as e:
+            return {"error": str(e)}
+        if params is not None:
+            try:
+                data = await unusual_whales_client.aget(f"/api/option-contract/{contract_id}/historic", params=params or None)
+            except UnusualWhalesError as e:
+                if timeseries_store.meta(contract_id) is None:
+                    return {"error": str(e)}
+                logging.warning(f"Serving stored history for {contract_id}: {str(e)}")
+            else:
+                if not await asyncio.to_thread(self.store, contract_id, data):
+                    return data
+        return await asyncio.to_thread(self.respond, contract_id, start_date, end_date)
+
+    def store(self, contract_id, data):
+        try:
+            timeseries_store.append(contract_id, data)
+            return True
+        except ValueError as e:
+            # Not a dated row set; hand it back unchanged like before
+            logging.warning(f"Not storing history for {contract_id}: {str(e)}")
+            return False
+
+    def respond(self, contract_id, start_date, end_date):
+        try:
+            history = timeseries_store.query(contract_id, start_date, end_date)
+        except ValueError as e:
+            return {"error": str(e)}
+        return self.format_response(history)
 
     def get_schema(self):
         return {
@@ -22,10 +68,18 @@ class GetOptionContractHistoric(BaseTool):
                 "contract_id": {
                     "type": "string",
                     "description": "The ID of the option contract."
+                },
+                "start_date": {
+                    "type": "string",
+                    "description": "Only return history on or after this date (YYYY-MM-DD)."
+                },
+                "end_date": {
+                    "type": "string",
+                    "description": "Only return history on or before this date (YYYY-MM-DD)."
                 }
             },
             "required": ["contract_id"]
         }
 
     def get_description(self):
-        return "Fetch historical data for a specific option contract from the Unusual Whales API."
\ No newline at end of file
+        return "Fetch historical data for a specific option contract from the Unusual Whales API, optionally limited to a date range."
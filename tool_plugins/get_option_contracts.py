@@ -1,20 +1,31 @@
-import os
-import requests
 from tool_plugins.base_tool import BaseTool
+from tool_plugins.unusual_whales_client import unusual_whales_client, UnusualWhalesError
+from option_chain import OptionChain
+from chain_snapshots import chain_snapshots
 
 class GetOptionContracts(BaseTool):
     def execute(self, ticker):
-        api_key = os.getenv("UNUSUAL_WHALES_API_KEY")
-        url = f"https://api.unusualwhales.com/api/stock/{ticker}/option-contracts"
-        headers = {"Authorization": f"Bearer {api_key}"}
+        try:
+            data = unusual_whales_client.get(f"/api/stock/{ticker}/option-contracts")
+        except UnusualWhalesError as e:
+            return {"error": str(e)}
+        return self.format_response(self.to_chain(ticker, data))
 
-        response = requests.get(url, headers=headers)
+    async def aexecute(self, ticker):
+        try:
+            data = await unusual_whales_client.aget(f"/api/stock/{ticker}/option-contracts")
+        except UnusualWhalesError as e:
+            return {"error": str(e)}
+        return self.format_response(self.to_chain(ticker, data))
 
-        if response.status_code == 200:
-            data = response.json()
-            return self.format_response(data)
-        else:
-            return {"error": f"Failed to fetch data: {response.status_code}"}
+    def to_chain(self, ticker, data):
+        try:
+            chain = OptionChain.from_payload(data)
+        except ValueError:
+            return data
+        # Keep the latest chain so options_screener can answer follow-up screens locally
+        chain_snapshots.put(ticker, chain)
+        return chain
 
     def get_schema(self):
         return {
@@ -0,0 +1,97 @@
+import time
+import asyncio
+import greeks
+from chain_snapshots import chain_snapshots, ChainSnapshot
+from option_chain import OptionChain
+from tool_plugins.base_tool import BaseTool
+from tool_plugins.unusual_whales_client import unusual_whales_client, UnusualWhalesError
+
+class OptionGreeks(BaseTool):
+    """Chain-wide Greeks and volatility analytics, computed in NumPy.
+
+    Works from the ticker's chain snapshot when get_option_contracts fetched
+    it recently, otherwise fetches the chain once (and keeps the snapshot).
+    Only the aggregates go back to the model, never the contract rows.
+    """
+
+    def execute(self, ticker, expiry=None, max_dte=None, underlying_price=None, risk_free_rate=None, dividend_yield=0.0):
+        snapshot = chain_snapshots.get(ticker)
+        if snapshot is None:
+            try:
+                data = unusual_whales_client.get(f"/api/stock/{ticker}/option-contracts")
+            except UnusualWhalesError as e:
+                return {"error": str(e)}
+            snapshot = self.snapshot(ticker, data)
+        return self.analyze(snapshot, expiry, max_dte, underlying_price, risk_free_rate, dividend_yield)
+
+    async def aexecute(self, ticker, expiry=None, max_dte=None, underlying_price=None, risk_free_rate=None, dividend_yield=0.0):
+        snapshot = chain_snapshots.get(ticker)
+        if snapshot is None:
+            try:
+                data = await unusual_whales_client.aget(f"/api/stock/{ticker}/option-contracts")
+            except UnusualWhalesError as e:
+                return {"error": str(e)}
+            snapshot = await asyncio.to_thread(self.snapshot, ticker, data)
+        return await asyncio.to_thread(self.analyze, snapshot, expiry, max_dte, underlying_price, risk_free_rate, dividend_yield)
+
+    def snapshot(self, ticker, data):
+        try:
+            chain = OptionChain.from_payload(data)
+        except ValueError:
+            return None
+        chain_snapshots.put(ticker, chain)
+        return ChainSnapshot(ticker.upper(), chain, time.time())
+
+    def analyze(self, snapshot, expiry, max_dte, underlying_price, risk_free_rate, dividend_yield):
+        if snapshot is None:
+            return {"error": "No option contracts found for this ticker"}
+        spot = underlying_price or snapshot.spot
+        if spot is None:
+            return {"error": "Could not estimate the underlying price from the chain; pass underlying_price"}
+        try:
+            result = greeks.analyze(snapshot.chain, spot, rate=greeks.RISK_FREE_RATE if risk_free_rate is None else risk_free_rate,
+                                    dividend=dividend_yield or 0.0, expiry=expiry, max_dte=max_dte)
+        except ValueError as e:
+            return {"error": str(e)}
+        if not result["contracts"]:
+            return {"error": "No unexpired contracts with a usable price or implied volatility", **result}
+        # Already the compact form, so it goes to the model inline rather than as a stored large response
+        return {"ticker": snapshot.ticker, "spot_source": "given" if underlying_price else "put_call_parity",
+                "snapshot_age": round(snapshot.age, 1), **result}
+
+    def get_schema(self):
+        return {
+            "type": "object",
+            "properties": {
+                "ticker": {
+                    "type": "string",
+                    "description": "The stock ticker."
+                },
+                "expiry": {
+                    "type": "string",
+                    "description": "Only analyze contracts expiring on this date (YYYY-MM-DD)."
+                },
+                "max_dte": {
+                    "type": "integer",
+                    "description": "Only analyze contracts expiring within this many days."
+                },
+                "underlying_price": {
+                    "type": "number",
+                    "description": "Underlying price to use; estimated from put-call parity when omitted."
+                },
+                "risk_free_rate": {
+                    "type": "number",
+                    "description": "Annual risk-free rate as a decimal, e.g. 0.045."
+                },
+                "dividend_yield": {
+                    "type": "number",
+                    "description": "Annual dividend yield as a decimal."
+                }
+            },
+            "required": ["ticker"]
+        }
+
+    def get_description(self):
+        return ("Compute Black-Scholes Greeks, the implied volatility smile and 25-delta skew per expiry, expected moves, "
+                "gamma exposure by strike and put/call aggregates across a ticker's whole option chain. "
+                "Use this instead of fetching contract rows to do the arithmetic.")
@@ -1,36 +1,89 @@
-import os
-import requests
+import time
+import asyncio
 import logging
+import screening
+from chain_snapshots import chain_snapshots, ChainSnapshot
+from option_chain import OptionChain
 from tool_plugins.base_tool import BaseTool
+from tool_plugins.unusual_whales_client import unusual_whales_client, UnusualWhalesError
 
 class OptionsScreener(BaseTool):
-    def execute(self, kwargs):
-        api_key = os.getenv("UNUSUAL_WHALES_API_KEY")
-        if not api_key:
-            error_message = "API key is missing"
-            logging.error(error_message)
-            return {"error": error_message}
-        
-        url = "https://api.unusualwhales.com/api/screener/option-contracts"
-        headers = {"Authorization": f"Bearer {api_key}"}
-        
+    """Screens contracts locally when the tickers' chain snapshots are fresh.
+
+    Filters and ordering over cached chains run as vectorized NumPy masks and
+    sorts; tickers without a usable snapshot, market-wide screens and filters
+    the chains can't answer (sectors, issue types, floor volume) go to the
+    remote screener as before.
+    """
+
+    def execute(self, **kwargs):
         # Filter out None values from kwargs
         params = {k: v for k, v in kwargs.items() if v is not None}
-        
+        if not screening.supports(params):
+            return self.fetch(params)
+        local, missing = self.screen_locally(params)
+        remote = self.fetch({**params, "ticker_symbol": ",".join(missing)}) if missing else None
+        return self.combine(params, local, remote)
+
+    async def aexecute(self, **kwargs):
+        params = {k: v for k, v in kwargs.items() if v is not None}
+        if not screening.supports(params):
+            return await self.afetch(params)
+        local, missing = await asyncio.to_thread(self.screen_locally, params)
+        remote = await self.afetch({**params, "ticker_symbol": ",".join(missing)}) if missing else None
+        return await asyncio.to_thread(self.combine, params, local, remote)
+
+    def fetch(self, params):
         try:
-            response = requests.get(url, headers=headers, params=params)
-            response.raise_for_status()  # This will raise an HTTPError for bad responses
-            return response.json()
-        except requests.RequestException as e:
-            error_message = f"Failed to fetch data: {str(e)}"
-            logging.error(error_message)
-            return {"error": error_message}
+            return unusual_whales_client.get("/api/screener/option-contracts", params=params)
+        except UnusualWhalesError as e:
+            logging.error(str(e))
+            return {"error": str(e)}
+
+    async def afetch(self, params):
+        try:
+            return await unusual_whales_client.aget("/api/screener/option-contracts", params=params)
+        except UnusualWhalesError as e:
+            logging.error(str(e))
+            return {"error": str(e)}
+
+    def screen_locally(self, params):
+        local = []
+        missing = []
+        for ticker in screening.parse_tickers(params["ticker_symbol"]):
+            snapshot = chain_snapshots.get(ticker)
+            result = screening.screen(snapshot, params) if snapshot else None
+            if result is None:
+                missing.append(ticker)
+            else:
+                local.append((snapshot, result))
+        return local, missing
+
+    def combine(self, params, local, remote):
+        if remote is not None and (not local or "error" in remote):
+            return remote
+        chains = [result for _, result in local]
+        if remote is not None:
+            try:
+                remote_chain = OptionChain.from_payload(remote)
+            except ValueError:
+                rows = [row for chain in chains for row in chain.to_rows()]
+                return {"data": rows + (remote.get("data", []) if isinstance(remote, dict) else remote)}
+            # Derive dte/diff for the remote rows too so the merged ordering covers both
+            ordering = {k: v for k, v in params.items() if k in ("ticker_symbol", "order", "order_direction")}
+            annotated = screening.screen(ChainSnapshot(None, remote_chain, time.time()), ordering)
+            chains.append(annotated if annotated is not None else remote_chain)
+        merged = screening.merge(chains, params)
+        merged.extra = {
+            "source": "local_snapshot" if remote is None else "local_snapshot+remote",
+            "snapshot_age": round(max(snapshot.age for snapshot, _ in local), 1),
+        }
+        return self.format_response(merged)
 
     def get_schema(self):
         return {
             "type": "object",
             "properties": {
-                "api_key": {"type": "string", "description": "Your API key for authentication"},
                 "ticker_symbol": {"type": "string", "description": "Ticker symbol"},
                 "sectors[]": {"type": "array", "items": {"type": "string"}, "description": "Sectors"},
                 "min_underlying_price": {"type": "number", "description": "Minimum underlying price"},
@@ -50,9 +103,8 @@ class OptionsScreener(BaseTool):
                 "issue_types[]": {"type": "array", "items": {"type": "string"}, "description": "Issue types"},
                 "order": {"type": "string", "description": "Order by field"},
                 "order_direction": {"type": "string", "enum": ["asc", "desc"], "description": "Order direction"}
-            },
-            "required": ["api_key"]
+            }
         }
 
     def get_description(self):
-        return "Screen option contracts based on various parameters using the Unusual Whales API"
\ No newline at end of file
+        return "Screen option contracts based on various parameters using the Unusual Whales API. Screens for specific tickers run locally against recently fetched option chains."
\ No newline at end of file
@@ -0,0 +1,172 @@
+import os
+import time
+import random
+import asyncio
+import threading
+import logging
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from metrics import UPSTREAM_SECONDS, endpoint_label
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = os.getenv("UNUSUAL_WHALES_BASE_URL", "https://api.unusualwhales.com")
+# Requests per minute allowed by our API plan, and how many may be sent back to back.
+RATE_LIMIT_PER_MINUTE = float(os.getenv("UNUSUAL_WHALES_RATE_LIMIT", "120"))
+RATE_LIMIT_BURST = int(os.getenv("UNUSUAL_WHALES_RATE_BURST", "10"))
+TIMEOUT = float(os.getenv("UNUSUAL_WHALES_TIMEOUT", "15"))
+MAX_RETRIES = int(os.getenv("UNUSUAL_WHALES_MAX_RETRIES", "3"))
+BACKOFF_BASE = float(os.getenv("UNUSUAL_WHALES_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX = float(os.getenv("UNUSUAL_WHALES_BACKOFF_MAX", "10"))
+POOL_SIZE = int(os.getenv("UNUSUAL_WHALES_POOL_SIZE", "20"))
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class UnusualWhalesError(Exception):
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by the sync and async call paths.
+
+    Callers reserve a token up front and are told how long to wait for it,
+    so blocking threads and coroutines draw from the same budget.
+    """
+
+    def __init__(self, rate_per_second, capacity):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def acquire(self):
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class UnusualWhalesClient:
+    def __init__(self, base_url=BASE_URL, api_key=None, timeout=TIMEOUT, max_retries=MAX_RETRIES,
+                 rate_limit_per_minute=RATE_LIMIT_PER_MINUTE, burst=RATE_LIMIT_BURST, pool_size=POOL_SIZE):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.pool_size = pool_size
+        self.bucket = TokenBucket(rate_limit_per_minute / 60.0, burst)
+        self._api_key = api_key
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._async_client = None
+
+    @property
+    def api_key(self):
+        if not self._api_key:
+            self._api_key = os.getenv("UNUSUAL_WHALES_API_KEY")
+        return self._api_key
+
+    def _headers(self):
+        if not self.api_key:
+            raise UnusualWhalesError("API key is missing")
+        return {"Authorization": f"Bearer {self.api_key}"}
+
+    def _url(self, path):
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def _retry_delay(self, attempt, retry_after=None):
+        if retry_after:
+            try:
+                return min(float(retry_after), BACKOFF_MAX)
+            except ValueError:
+                pass
+        # Full jitter keeps many workers from retrying in lockstep after a shared 429
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+                timeout=self.timeout,
+            )
+        return self._async_client
+
+    def get(self, path, params=None, timeout=None):
+        url = self._url(path)
+        endpoint = endpoint_label(path)
+        headers = self._headers()
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            started = time.perf_counter()
+            try:
+                response = self.session.get(url, headers=headers, params=params, timeout=timeout or self.timeout)
+            except requests.RequestException as e:
+                UPSTREAM_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, status="error")
+                error = UnusualWhalesError(f"Failed to fetch data: {str(e)}")
+                delay = self._retry_delay(attempt)
+            else:
+                UPSTREAM_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, status=response.status_code)
+                if response.status_code == 200:
+                    return response.json()
+                error = UnusualWhalesError(f"Failed to fetch data: {response.status_code}", response.status_code)
+                if response.status_code not in RETRY_STATUS_CODES:
+                    raise error
+                delay = self._retry_delay(attempt, response.headers.get("Retry-After"))
+            if attempt == self.max_retries:
+                raise error
+            logger.warning(f"Retrying {url} in {delay:.2f}s after: {str(error)}")
+            time.sleep(delay)
+
+    async def aget(self, path, params=None, timeout=None):
+        url = self._url(path)
+        endpoint = endpoint_label(path)
+        headers = self._headers()
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire_async()
+            started = time.perf_counter()
+            try:
+                response = await self.async_client.get(url, headers=headers, params=params, timeout=timeout or self.timeout)
+            except httpx.HTTPError as e:
+                UPSTREAM_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, status="error")
+                error = UnusualWhalesError(f"Failed to fetch data: {str(e)}")
+                delay = self._retry_delay(attempt)
+            else:
+                UPSTREAM_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, status=response.status_code)
+                if response.status_code == 200:
+                    return response.json()
+                error = UnusualWhalesError(f"Failed to fetch data: {response.status_code}", response.status_code)
+                if response.status_code not in RETRY_STATUS_CODES:
+                    raise error
+                delay = self._retry_delay(attempt, response.headers.get("Retry-After"))
+            if attempt == self.max_retries:
+                raise error
+            logger.warning(f"Retrying {url} in {delay:.2f}s after: {str(error)}")
+            await asyncio.sleep(delay)
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        self.session.close()
+
+
+unusual_whales_client = UnusualWhalesClient()
@@ -0,0 +1,84 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_BACKEND = os.getenv("TOOL_REGISTRY_BACKEND", "sqlite")
+REGISTRY_DB = os.getenv("TOOL_REGISTRY_DB", "tool_registry.db")
+POLL_INTERVAL = float(os.getenv("TOOL_REGISTRY_POLL_INTERVAL", "0.5"))
+
+
+class SQLiteToolRegistry:
+    """Versioned record of tools created or changed through the API.
+
+    Every worker that opens the same file sees the same tools: each change
+    gets the next version number, and workers poll ``version()`` (one index
+    lookup) and pull ``changes_since`` the last version they applied. The
+    file works for any number of workers on one host; several hosts need a
+    networked backend with the same three methods (see ``BACKENDS``).
+    """
+
+    def __init__(self, db_path=REGISTRY_DB):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=10)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS tools (
+                name TEXT PRIMARY KEY,
+                code TEXT NOT NULL,
+                config TEXT,
+                version INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS tools_version ON tools(version);
+        """)
+
+    def put(self, name, code, config=None):
+        """Record a tool's code and config (None keeps tools_config.json's); returns the new version."""
+        with self.lock:
+            # IMMEDIATE takes the write lock up front so two workers can't hand out the same version
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                version, = self.conn.execute("SELECT COALESCE(MAX(version), 0) + 1 FROM tools").fetchone()
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO tools (name, code, config, version, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    (name, code, json.dumps(config) if config is not None else None, version, time.time()))
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        logger.info(f"Registered tool {name} at version {version}")
+        return version
+
+    def version(self):
+        with self.lock:
+            return self.conn.execute("SELECT COALESCE(MAX(version), 0) FROM tools").fetchone()[0]
+
+    def changes_since(self, version):
+        """[(name, code, config, version)] for tools changed after ``version``, oldest first."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT name, code, config, version FROM tools WHERE version > ? ORDER BY version",
+                (version,)).fetchall()
+        return [(name, code, json.loads(config) if config is not None else None, row_version)
+                for name, code, config, row_version in rows]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+BACKENDS = {"sqlite": SQLiteToolRegistry}
+
+
+def create_registry(backend=REGISTRY_BACKEND):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown tool registry backend: {backend}")
+    return BACKENDS[backend]()
@@ -0,0 +1,247 @@
+import os
+import sys
+import queue
+import socket
+import asyncio
+import hashlib
+import logging
+import threading
+import subprocess
+from multiprocessing.connection import Connection
+from tool_plugins.base_tool import BaseTool
+from serialization import JSONText, dumps
+
+try:
+    import resource
+except ImportError:
+    # No address-space limits on platforms without setrlimit
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+SANDBOX_WORKERS = int(os.getenv("TOOL_SANDBOX_WORKERS", "2"))
+SANDBOX_TIMEOUT = float(os.getenv("TOOL_SANDBOX_TIMEOUT", "30"))
+SANDBOX_MEMORY_MB = int(os.getenv("TOOL_SANDBOX_MEMORY_MB", "512"))
+SANDBOX_LOAD_TIMEOUT = float(os.getenv("TOOL_SANDBOX_LOAD_TIMEOUT", "60"))
+
+
+class SandboxError(Exception):
+    pass
+
+
+def address_space():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def limit_memory(limit_bytes):
+    """Cap further growth of this process at ``limit_bytes``; None lifts the cap."""
+    if resource is None:
+        return
+    current = address_space()
+    if current is None:
+        return
+    soft = resource.RLIM_INFINITY if limit_bytes is None else current + limit_bytes
+    resource.setrlimit(resource.RLIMIT_AS, (soft, resource.RLIM_INFINITY))
+
+
+def run_request(instances, request):
+    from tool_manager import import_tool
+    kind, name, file_path, digest = request[:4]
+    key = (file_path, digest)
+    instance = instances.get(key)
+    if instance is None:
+        for old_key in [old_key for old_key in instances if old_key[0] == file_path]:
+            del instances[old_key]
+        instance = instances[key] = import_tool(name, file_path)
+    if kind == "describe":
+        return "describe", {
+            "class": instance.__class__.__name__,
+            "description": instance.get_description(),
+            "schema": instance.get_schema(),
+        }
+    args, memory_mb = request[4:]
+    limit_memory(memory_mb * 1024 * 1024 if memory_mb else None)
+    try:
+        result = instance.execute(**args)
+    finally:
+        limit_memory(None)
+    if isinstance(result, JSONText):
+        return "json", result.encoded
+    if isinstance(result, str):
+        return "text", result
+    if isinstance(result, dict) and "error" in result:
+        # Kept as a dict so the parent knows not to cache it
+        return "error", result
+    return "json", dumps(result)
+
+
+def worker_main(conn):
+    # One BLAS thread per worker; the pool is the parallelism
+    os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+    logging.basicConfig(level=logging.INFO)
+    from api_response_manager import api_response_manager
+    instances = {}
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        try:
+            reply = run_request(instances, request)
+        except MemoryError:
+            reply = "error", {"error": "Tool exceeded its memory limit"}
+        except Exception as e:
+            reply = "raise", f"{type(e).__name__}: {str(e)}"
+        # Large responses stored by the tool must be visible to the parent before it sees their id
+        api_response_manager.storage.flush()
+        conn.send(reply)
+
+
+class SandboxWorker:
+    """A fresh interpreter running worker_main, connected over a socket pair.
+
+    Started as its own program rather than through multiprocessing so the
+    child never re-imports the web app's main module.
+    """
+
+    def __init__(self):
+        parent_socket, child_socket = socket.socketpair()
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(path for path in sys.path if path)
+        self.process = subprocess.Popen([sys.executable, "-m", "tool_sandbox", str(child_socket.fileno())],
+                                        pass_fds=[child_socket.fileno()], env=env)
+        child_socket.close()
+        self.conn = Connection(parent_socket.detach())
+        self.calls = 0
+
+    def call(self, request, timeout):
+        self.conn.send(request)
+        if not self.conn.poll(timeout):
+            raise TimeoutError()
+        self.calls += 1
+        return self.conn.recv()
+
+    def kill(self):
+        self.process.kill()
+        self.process.wait()
+        self.conn.close()
+
+
+class ToolSandbox:
+    """A pool of warm worker processes that run untrusted tools.
+
+    Each call goes to an idle worker over a pipe. A worker that times out,
+    crashes or is killed for memory is replaced with a fresh one, so a bad
+    tool costs its own call rather than the web worker. Results come back as
+    the JSON bytes the tool produced and are handed on without re-parsing.
+
+    Per-tool settings come from the tool's "sandbox" entry in
+    tools_config.json: timeout (seconds), memory_mb and concurrency.
+    """
+
+    def __init__(self, size=SANDBOX_WORKERS, timeout=SANDBOX_TIMEOUT, memory_mb=SANDBOX_MEMORY_MB):
+        self.size = size
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.idle = queue.Queue()
+        self.lock = threading.Lock()
+        self.started = False
+        self.restarts = 0
+        self.slots = None
+        self.tool_slots = {}
+
+    def start(self):
+        with self.lock:
+            if not self.started:
+                for _ in range(self.size):
+                    self.idle.put(SandboxWorker())
+                self.started = True
+                logger.info(f"Started {self.size} tool sandbox workers")
+
+    def _call(self, request, timeout):
+        self.start()
+        worker = self.idle.get()
+        try:
+            reply = worker.call(request, timeout)
+        except TimeoutError:
+            self._replace(worker, f"timed out after {timeout}s")
+            raise SandboxError(f"Tool {request[1]} timed out after {timeout}s")
+        except (EOFError, OSError):
+            self._replace(worker, f"crashed ({worker.process.poll()})")
+            raise SandboxError(f"Tool {request[1]} crashed the sandbox worker")
+        self.idle.put(worker)
+        return reply
+
+    def _replace(self, worker, reason):
+        logger.warning(f"Restarting sandbox worker {worker.process.pid}: {reason}")
+        worker.kill()
+        self.restarts += 1
+        self.idle.put(SandboxWorker())
+
+    def describe(self, name, file_path):
+        """Import a tool in a worker and return (digest, class name, description, schema)."""
+        with open(file_path, "rb") as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+        kind, payload = self._call(("describe", name, file_path, digest), SANDBOX_LOAD_TIMEOUT)
+        if kind == "raise":
+            raise SandboxError(payload)
+        return digest, payload["class"], payload["description"], payload["schema"]
+
+    async def execute(self, tool, args, options):
+        if self.slots is None:
+            # Never queue more calls than there are workers, so waiting happens here and not in threads
+            self.slots = asyncio.Semaphore(self.size)
+        concurrency = options.get("concurrency", self.size)
+        tool_slots = self.tool_slots.get(tool.name)
+        if tool_slots is None or tool_slots[0] != concurrency:
+            tool_slots = self.tool_slots[tool.name] = (concurrency, asyncio.Semaphore(concurrency))
+        request = ("execute", tool.name, tool.file_path, tool.digest, args, options.get("memory_mb", self.memory_mb))
+        async with tool_slots[1], self.slots:
+            kind, payload = await asyncio.to_thread(self._call, request, options.get("timeout", self.timeout))
+        if kind == "json":
+            return JSONText(payload)
+        if kind == "raise":
+            raise SandboxError(payload)
+        return payload
+
+    def stats(self):
+        return {"workers": self.size if self.started else 0, "idle": self.idle.qsize(), "restarts": self.restarts}
+
+    def close(self):
+        while not self.idle.empty():
+            self.idle.get_nowait().kill()
+
+
+class SandboxedTool(BaseTool):
+    """Stands in for a tool whose code only ever runs in the sandbox."""
+
+    def __init__(self, manager, sandbox, name, file_path):
+        self.manager = manager
+        self.sandbox = sandbox
+        self.name = name
+        self.file_path = file_path
+        self.digest, self.class_name, self.description, self.schema = sandbox.describe(name, file_path)
+
+    def execute(self, *args, **kwargs):
+        raise SandboxError("Sandboxed tools only run through aexecute")
+
+    async def aexecute(self, **kwargs):
+        return await self.sandbox.execute(self, kwargs, self.manager.get_sandbox_config(self.name))
+
+    def get_schema(self):
+        return self.schema
+
+    def get_description(self):
+        return self.description
+
+
+tool_sandbox = ToolSandbox()
+
+
+if __name__ == "__main__":
+    worker_main(Connection(int(sys.argv[1])))